@@ -0,0 +1,39 @@
+"""keyset pagination indexes
+
+Revision ID: 3f9a1c2d7e45
+Revises:
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '3f9a1c2d7e45'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns) matching the (created_at, id) seek of each listing
+INDEXES = [
+    ("ix_debate_sessions_user_created_id", "debate_sessions", ["user_id", "created_at", "id"]),
+    ("ix_notifications_user_created_id", "notifications", ["user_id", "created_at", "id"]),
+    ("ix_resources_created_id", "improve_yourself_resources", ["created_at", "id"]),
+    ("ix_resources_category_created_id", "improve_yourself_resources", ["category", "created_at", "id"]),
+    ("ix_users_created_id", "users", ["created_at", "id"]),
+    ("ix_country_debate_messages_debate_created_id", "country_debate_messages", ["debate_id", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY avoids locking writes on large tables but can't run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
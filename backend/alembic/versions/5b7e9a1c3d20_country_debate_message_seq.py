@@ -0,0 +1,69 @@
+"""country debate message sequence
+
+Revision ID: 5b7e9a1c3d20
+Revises: 8c4d2e6f1a93
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '5b7e9a1c3d20'
+down_revision: Union[str, None] = '8c4d2e6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Adding the column locks the table until this migration commits, so no
+    # message can be inserted between the backfill and the default
+    op.execute("CREATE SEQUENCE country_debate_messages_seq_seq AS BIGINT")
+    op.add_column("country_debate_messages", sa.Column("seq", sa.BigInteger(), nullable=True))
+    op.execute("""
+        UPDATE country_debate_messages m
+        SET seq = o.n
+        FROM (
+            SELECT id, row_number() OVER (ORDER BY created_at, id) AS n
+            FROM country_debate_messages
+        ) o
+        WHERE o.id = m.id
+    """)
+    op.execute("""
+        SELECT setval(
+            'country_debate_messages_seq_seq',
+            COALESCE((SELECT max(seq) FROM country_debate_messages), 0) + 1,
+            false
+        )
+    """)
+    op.execute("""
+        ALTER TABLE country_debate_messages
+            ALTER COLUMN seq SET DEFAULT nextval('country_debate_messages_seq_seq'),
+            ALTER COLUMN seq SET NOT NULL
+    """)
+    op.execute("ALTER SEQUENCE country_debate_messages_seq_seq OWNED BY country_debate_messages.seq")
+
+    op.create_index(
+        "ix_country_debate_messages_debate_seq",
+        "country_debate_messages",
+        ["debate_id", "seq"],
+        unique=True
+    )
+    op.drop_index(
+        "ix_country_debate_messages_debate_created_id",
+        table_name="country_debate_messages",
+        if_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_country_debate_messages_debate_created_id",
+        "country_debate_messages",
+        ["debate_id", "created_at", "id"]
+    )
+    op.drop_index("ix_country_debate_messages_debate_seq", table_name="country_debate_messages")
+    # Dropping the column also drops the sequence it owns
+    op.drop_column("country_debate_messages", "seq")
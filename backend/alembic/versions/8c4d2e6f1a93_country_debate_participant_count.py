@@ -0,0 +1,57 @@
+"""country debate participant count and unique participants
+
+Revision ID: 8c4d2e6f1a93
+Revises: 3f9a1c2d7e45
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '8c4d2e6f1a93'
+down_revision: Union[str, None] = '3f9a1c2d7e45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Racing joins could insert the same participant twice; keep the first row
+    op.execute("""
+        DELETE FROM country_debate_participants a
+        USING country_debate_participants b
+        WHERE a.debate_id = b.debate_id
+          AND a.user_id = b.user_id
+          AND a.ctid > b.ctid
+    """)
+    op.create_unique_constraint(
+        "uq_country_debate_participants_debate_user",
+        "country_debate_participants",
+        ["debate_id", "user_id"]
+    )
+
+    op.add_column(
+        "country_debates",
+        sa.Column("participant_count", sa.Integer(), nullable=False, server_default="0")
+    )
+    op.execute("""
+        UPDATE country_debates d
+        SET participant_count = c.count
+        FROM (
+            SELECT debate_id, COUNT(*) AS count
+            FROM country_debate_participants
+            GROUP BY debate_id
+        ) c
+        WHERE c.debate_id = d.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column("country_debates", "participant_count")
+    op.drop_constraint(
+        "uq_country_debate_participants_debate_user",
+        "country_debate_participants",
+        type_="unique"
+    )
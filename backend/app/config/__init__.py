@@ -1,4 +1,15 @@
 from .settings import settings, get_settings
-from .database import get_db, init_db, Base, engine
+from .database import get_db, get_async_db, init_db, use_primary, Base, engine, async_engine, READ_REPLICA
 
-__all__ = ["settings", "get_settings", "get_db", "init_db", "Base", "engine"]
+__all__ = [
+    "settings",
+    "get_settings",
+    "get_db",
+    "get_async_db",
+    "init_db",
+    "use_primary",
+    "Base",
+    "engine",
+    "async_engine",
+    "READ_REPLICA"
+]
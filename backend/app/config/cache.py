@@ -0,0 +1,113 @@
+"""
+Small read-through caches for hot lookups.
+
+TTLCache is a bounded in-process LRU whose entries expire after a fixed
+time. ModelCache stores pydantic models by key either in a TTLCache or, when
+given a Redis URL, in Redis so every API process sees the same entries and
+the same invalidations.
+"""
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Type, TypeVar
+import time
+from pydantic import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class TTLCache:
+    """Bounded LRU map whose entries expire `ttl` seconds after being set"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class ModelCache(Generic[ModelT]):
+    """Pydantic models by string key, in process or in Redis"""
+
+    def __init__(
+        self,
+        model: Type[ModelT],
+        maxsize: int,
+        ttl: float,
+        redis_url: Optional[str] = None,
+        prefix: str = "cache:"
+    ):
+        self.model = model
+        self.ttl = ttl
+        self.prefix = prefix
+        self._local = TTLCache(maxsize, ttl)
+        self._redis_url = redis_url
+        self._redis = None
+        self._sync_redis = None
+
+    def _async_client(self):
+        if self._redis is None:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.from_url(self._redis_url)
+        return self._redis
+
+    def _sync_client(self):
+        if self._sync_redis is None:
+            import redis
+            self._sync_redis = redis.Redis.from_url(self._redis_url)
+        return self._sync_redis
+
+    async def get(self, key: str) -> Optional[ModelT]:
+        if self._redis_url is None:
+            return self._local.get(key)
+
+        value = await self._async_client().get(self.prefix + key)
+        return self.model.model_validate_json(value) if value else None
+
+    async def set(self, key: str, value: ModelT) -> None:
+        if self._redis_url is None:
+            self._local.set(key, value)
+            return
+
+        await self._async_client().set(self.prefix + key, value.model_dump_json(), px=int(self.ttl * 1000))
+
+    async def invalidate(self, key: str) -> None:
+        if self._redis_url is None:
+            self._local.delete(key)
+            return
+
+        await self._async_client().delete(self.prefix + key)
+
+    def invalidate_sync(self, key: str) -> None:
+        """For sync code paths, which run in the threadpool rather than the loop"""
+        if self._redis_url is None:
+            self._local.delete(key)
+            return
+
+        self._sync_client().delete(self.prefix + key)
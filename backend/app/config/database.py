@@ -1,19 +1,97 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Select, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Any, AsyncGenerator, Callable, Generator, Union
+import itertools
+from .pool import engine_options
 from .settings import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    echo=settings.DEBUG
-)
+engine = create_engine(settings.DATABASE_URL, **engine_options("primary"))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_database_url(database_url: str) -> str:
+    """Point a postgresql:// URL at the asyncpg driver"""
+    url = make_url(database_url)
+    if not url.drivername.startswith("postgres"):
+        # Already an async URL, e.g. sqlite+aiosqlite for local replicas
+        return database_url
+
+    query = dict(url.query)
+
+    # asyncpg takes `ssl` rather than libpq's `sslmode`
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+
+    if settings.DB_PGBOUNCER:
+        query["prepared_statement_cache_size"] = "0"
+
+    url = url.set(drivername="postgresql+asyncpg", query=query)
+    return url.render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    **engine_options("primary_async", is_async=True)
+)
+
+replica_engines = [
+    create_async_engine(get_async_database_url(url), **engine_options(f"replica_{index}", is_async=True))
+    for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+]
+_replica_cycle = itertools.cycle(replica_engines)
+
+# Pass as `bind_arguments` to let a read go to a replica
+READ_REPLICA = {"replica": True}
+
+
+class RoutingSession(Session):
+    """
+    Session that sends opted-in reads to a read replica, round-robin by session.
+
+    A session keeps the replica it first read from, so its reads never mix
+    replicas that lag by different amounts. Once the session has written
+    anything (a flush, or any statement that is not a SELECT) it stays on the
+    primary, so a request reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, replica: bool = False, **kw):
+        if replica and replica_engines and not self.info.get("use_primary"):
+            if "replica" not in self.info:
+                self.info["replica"] = next(_replica_cycle)
+            return self.info["replica"].sync_engine
+
+        if clause is not None and not isinstance(clause, Select):
+            self.info["use_primary"] = True
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_to_primary(session, flush_context):
+    session.info["use_primary"] = True
+
+
+def use_primary(db: AsyncSession) -> None:
+    """Send every remaining read in this session to the primary"""
+    db.info["use_primary"] = True
+
+
+def after_commit(db: Union[Session, AsyncSession], callback: Callable[[], Any]) -> None:
+    """Run `callback` once the unit of work on `db` commits; dropped on rollback"""
+    db.info.setdefault("after_commit", []).append(callback)
+
+
+# Objects stay usable after commit, since async sessions cannot lazy-load
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -25,5 +103,10 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
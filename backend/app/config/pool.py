@@ -0,0 +1,61 @@
+"""
+Connection pool options for the database engines.
+
+Sizing, timeout, recycle and pre-ping come from Settings. The queue pools
+used here time every checkout and hand the wait to `checkout_observer`,
+which app.utils.db_metrics points at a histogram, so an exhausted pool shows
+up as checkout latency instead of as unexplained slow requests.
+"""
+from typing import Any, Callable, Dict, Optional
+import time
+import uuid
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from .settings import settings
+
+
+class TimedCheckout:
+    # Called with (seconds waited, pool name) after every checkout attempt
+    checkout_observer: Optional[Callable[[float, str], None]] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            observer = TimedCheckout.checkout_observer
+            if observer is not None:
+                observer(time.perf_counter() - started, self.logging_name or "default")
+
+
+class InstrumentedQueuePool(TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(name: str, is_async: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for create_engine/create_async_engine"""
+    options: Dict[str, Any] = {"echo": settings.DEBUG, "pool_logging_name": name}
+
+    if settings.DB_PGBOUNCER:
+        # PgBouncer already pools server connections, and in transaction mode
+        # a prepared statement may not exist on the next server connection
+        options["poolclass"] = NullPool
+        if is_async:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__"
+            }
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING
+    )
+    return options
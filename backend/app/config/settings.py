@@ -9,9 +9,39 @@ class Settings(BaseSettings):
     DEBUG: bool = False
 
     DATABASE_URL: str
+    DATABASE_REPLICA_URLS: list = []
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_PGBOUNCER: bool = False
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 43200
+    JWT_BACKEND: str = "jose"
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE: int = 64
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_REDIS: bool = False
+
+    MESSAGE_STREAM_REDIS: bool = False
+    MESSAGE_STREAM_QUEUE_SIZE: int = 100
+    MESSAGE_STREAM_KEEPALIVE_SECONDS: int = 15
+    PARTICIPANT_CACHE_TTL_SECONDS: int = 300
+    PARTICIPANT_CACHE_MISS_TTL_SECONDS: int = 10
+    MESSAGE_WRITE_BATCH_SIZE: int = 100
+    MESSAGE_WRITE_FLUSH_MS: int = 5
+    PARTICIPANT_CACHE_MAX_SIZE: int = 10000
 
     REDIS_HOST: Optional[str] = None
     REDIS_PORT: Optional[int] = 6379
@@ -25,6 +55,24 @@ class Settings(BaseSettings):
     API_PREFIX: str = "/api/v1"
 
     WEBSOCKET_URL: Optional[str] = None
+    WEBSOCKET_PORT: int = 8001
+    WEBSOCKET_WORKERS: int = 1
+    WEBSOCKET_USE_REDIS: bool = False
+    WEBSOCKET_USER_TTL_SECONDS: int = 300
+
+    MATCHMAKING_TICK_MS: int = 0
+    MATCHMAKING_TICK_BUDGET_MS: int = 50
+    MATCHMAKING_MAX_POOL: int = 5000
+    MATCHMAKING_BASE_TOLERANCE: float = 1.0
+    MATCHMAKING_TOLERANCE_PER_SECOND: float = 0.2
+
+    ICE_BATCH_WINDOW_MS: int = 0
+    MATCH_OFFER_TIMEOUT_SECONDS: int = 30
+
+    WEBSOCKET_HANDOFF_PATH: str = "signaling_handoff.json"
+    WEBSOCKET_HANDOFF_WINDOW_SECONDS: int = 60
+    WEBSOCKET_RECONNECT_SPREAD_MS: int = 5000
+    WEBSOCKET_DRAIN_GRACE_SECONDS: float = 1.0
 
     AI_API_KEY: Optional[str] = None
     AI_MODEL: str = "gpt-3.5-turbo"
@@ -37,6 +85,16 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
+    WEBSOCKET_LOG_LEVEL: str = "INFO"
+    WEBSOCKET_LOG_SAMPLE_EVERY: int = 100
+    WEBSOCKET_LOG_QUEUE: bool = True
+    WEBSOCKET_SOCKETIO_LOGGER: bool = False
+    WEBSOCKET_ENGINEIO_LOGGER: bool = False
+
+    @property
+    def REDIS_URL(self) -> str:
+        return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
+
     class Config:
         env_file = ".env"
         case_sensitive = True
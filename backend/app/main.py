@@ -1,7 +1,7 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.config.settings import settings
-from app.config.database import init_db
+from app.config.database import init_db, engine, async_engine, replica_engines
 from app.routes import (
     auth_router,
     debates_router,
@@ -10,7 +10,13 @@ from app.routes import (
     country_debates_router,
     referrals_router
 )
+from app.services.message_writer import message_writer
+from app.utils.broadcast import message_broadcaster
+from app.utils.db_metrics import instrument_engine, sample_pool_gauges
 from app.utils.logger import api_logger
+from app.utils.metrics import CONTENT_TYPE, registry
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.security import password_executor
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -18,12 +24,18 @@ app = FastAPI(
     debug=settings.DEBUG
 )
 
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+for replica_engine in replica_engines:
+    instrument_engine(replica_engine.sync_engine)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=settings.CORS_CREDENTIALS,
     allow_methods=settings.CORS_METHODS,
     allow_headers=settings.CORS_HEADERS,
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 
@@ -32,9 +44,22 @@ async def startup_event():
     api_logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     api_logger.info("Initializing database connection")
     init_db()
+    await message_broadcaster.start()
     api_logger.info("Application startup complete")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    api_logger.info("Flushing buffered messages")
+    await message_writer.close()
+    await message_broadcaster.stop()
+    api_logger.info("Closing database connections")
+    await async_engine.dispose()
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
+    password_executor.shutdown()
+
+
 @app.get("/")
 async def root():
     api_logger.debug("Root endpoint accessed")
@@ -54,6 +79,13 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Pool gauges are sampled on scrape so checkouts never pay for them
+    sample_pool_gauges()
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+
 app.include_router(auth_router, prefix=settings.API_PREFIX)
 app.include_router(debates_router, prefix=settings.API_PREFIX)
 app.include_router(resources_router, prefix=settings.API_PREFIX)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy import Column, String, Text, DateTime, Index
 from sqlalchemy.sql import func
 from app.config.database import Base
 import uuid
@@ -10,6 +10,10 @@ def generate_uuid():
 
 class Resource(Base):
     __tablename__ = "improve_yourself_resources"
+    __table_args__ = (
+        Index("ix_resources_created_id", "created_at", "id"),
+        Index("ix_resources_category_created_id", "category", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     title = Column(String, nullable=False, index=True)
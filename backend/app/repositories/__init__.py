@@ -1,6 +1,13 @@
-from .user_repository import UserRepository
-from .debate_repository import DebateRepository
-from .resource_repository import ResourceRepository
-from .notification_repository import NotificationRepository
+from .user_repository import AsyncUserRepository
+from .debate_repository import AsyncDebateRepository
+from .resource_repository import AsyncResourceRepository
+from .notification_repository import AsyncNotificationRepository
+from .unit_of_work import AsyncUnitOfWork
 
-__all__ = ["UserRepository", "DebateRepository", "ResourceRepository", "NotificationRepository"]
+__all__ = [
+    "AsyncUserRepository",
+    "AsyncDebateRepository",
+    "AsyncResourceRepository",
+    "AsyncNotificationRepository",
+    "AsyncUnitOfWork"
+]
@@ -1,39 +1,46 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
+from app.config.database import READ_REPLICA
+from app.repositories.pagination import Cursor, keyset
 from app.models.debate import DebateSession, DebateTranscript
 from app.schemas.debate import DebateSessionCreate, DebateSessionUpdate, TranscriptCreate
 
 
-class DebateRepository:
-    def __init__(self, db: Session):
+class AsyncDebateRepository:
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_session(self, user_id: str, session_data: DebateSessionCreate) -> DebateSession:
+    async def create_session(self, user_id: str, session_data: DebateSessionCreate) -> DebateSession:
         session = DebateSession(
             user_id=user_id,
             topic=session_data.topic,
             stance=session_data.stance
         )
         self.db.add(session)
-        self.db.commit()
-        self.db.refresh(session)
+        await self.db.flush()
+        await self.db.refresh(session)
         return session
 
-    def get_session(self, session_id: str) -> Optional[DebateSession]:
-        return self.db.query(DebateSession).filter(DebateSession.id == session_id).first()
+    async def get_session(self, session_id: str) -> Optional[DebateSession]:
+        result = await self.db.execute(select(DebateSession).where(DebateSession.id == session_id))
+        return result.scalars().first()
 
-    def get_user_sessions(self, user_id: str, skip: int = 0, limit: int = 100) -> List[DebateSession]:
-        return (
-            self.db.query(DebateSession)
-            .filter(DebateSession.user_id == user_id)
-            .order_by(DebateSession.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+    async def get_user_sessions(
+        self,
+        user_id: str,
+        cursor: Optional[Cursor] = None,
+        limit: int = 100
+    ) -> List[DebateSession]:
+        query = select(DebateSession).where(DebateSession.user_id == user_id)
+        result = await self.db.execute(
+            keyset(query, DebateSession.created_at, DebateSession.id, cursor, limit),
+            bind_arguments=READ_REPLICA
         )
+        return list(result.scalars().all())
 
-    def update_session(self, session_id: str, session_data: DebateSessionUpdate) -> Optional[DebateSession]:
-        session = self.get_session(session_id)
+    async def update_session(self, session_id: str, session_data: DebateSessionUpdate) -> Optional[DebateSession]:
+        session = await self.get_session(session_id)
         if not session:
             return None
 
@@ -41,34 +48,32 @@ class DebateRepository:
         for field, value in update_data.items():
             setattr(session, field, value)
 
-        self.db.commit()
-        self.db.refresh(session)
         return session
 
-    def delete_session(self, session_id: str) -> bool:
-        session = self.get_session(session_id)
+    async def delete_session(self, session_id: str) -> bool:
+        session = await self.get_session(session_id)
         if not session:
             return False
 
-        self.db.delete(session)
-        self.db.commit()
+        await self.db.delete(session)
         return True
 
-    def create_transcript(self, transcript_data: TranscriptCreate) -> DebateTranscript:
+    async def create_transcript(self, transcript_data: TranscriptCreate) -> DebateTranscript:
         transcript = DebateTranscript(
             session_id=transcript_data.session_id,
             speaker=transcript_data.speaker,
             text=transcript_data.text
         )
         self.db.add(transcript)
-        self.db.commit()
-        self.db.refresh(transcript)
+        await self.db.flush()
+        await self.db.refresh(transcript)
         return transcript
 
-    def get_session_transcripts(self, session_id: str) -> List[DebateTranscript]:
-        return (
-            self.db.query(DebateTranscript)
-            .filter(DebateTranscript.session_id == session_id)
-            .order_by(DebateTranscript.timestamp)
-            .all()
+    async def get_session_transcripts(self, session_id: str) -> List[DebateTranscript]:
+        result = await self.db.execute(
+            select(DebateTranscript)
+            .where(DebateTranscript.session_id == session_id)
+            .order_by(DebateTranscript.timestamp),
+            bind_arguments=READ_REPLICA
         )
+        return list(result.scalars().all())
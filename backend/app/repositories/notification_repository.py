@@ -1,48 +1,52 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
+from app.config.database import READ_REPLICA
+from app.repositories.pagination import Cursor, keyset
 from app.models.notification import Notification
 from app.schemas.notification import NotificationCreate
 
 
-class NotificationRepository:
-    def __init__(self, db: Session):
+class AsyncNotificationRepository:
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create(self, notification_data: NotificationCreate) -> Notification:
+    async def create(self, notification_data: NotificationCreate) -> Notification:
         notification = Notification(**notification_data.dict())
         self.db.add(notification)
-        self.db.commit()
-        self.db.refresh(notification)
+        await self.db.flush()
+        await self.db.refresh(notification)
         return notification
 
-    def get_by_id(self, notification_id: str) -> Optional[Notification]:
-        return self.db.query(Notification).filter(Notification.id == notification_id).first()
-
-    def get_user_notifications(self, user_id: str, skip: int = 0, limit: int = 100) -> List[Notification]:
-        return (
-            self.db.query(Notification)
-            .filter(Notification.user_id == user_id)
-            .order_by(Notification.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+    async def get_by_id(self, notification_id: str) -> Optional[Notification]:
+        result = await self.db.execute(select(Notification).where(Notification.id == notification_id))
+        return result.scalars().first()
+
+    async def get_user_notifications(
+        self,
+        user_id: str,
+        cursor: Optional[Cursor] = None,
+        limit: int = 100
+    ) -> List[Notification]:
+        query = select(Notification).where(Notification.user_id == user_id)
+        result = await self.db.execute(
+            keyset(query, Notification.created_at, Notification.id, cursor, limit),
+            bind_arguments=READ_REPLICA
         )
+        return list(result.scalars().all())
 
-    def mark_as_read(self, notification_id: str) -> Optional[Notification]:
-        notification = self.get_by_id(notification_id)
+    async def mark_as_read(self, notification_id: str) -> Optional[Notification]:
+        notification = await self.get_by_id(notification_id)
         if not notification:
             return None
 
         notification.read = True
-        self.db.commit()
-        self.db.refresh(notification)
         return notification
 
-    def delete(self, notification_id: str) -> bool:
-        notification = self.get_by_id(notification_id)
+    async def delete(self, notification_id: str) -> bool:
+        notification = await self.get_by_id(notification_id)
         if not notification:
             return False
 
-        self.db.delete(notification)
-        self.db.commit()
+        await self.db.delete(notification)
         return True
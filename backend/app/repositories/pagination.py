@@ -0,0 +1,40 @@
+"""
+Keyset pagination on (created_at, id).
+
+A page is found by seeking past the last row of the previous one instead of
+counting an OFFSET, so every page costs the same short index range scan no
+matter how deep it is. The id breaks ties between rows created in the same
+instant. Cursors hand that key to clients as opaque url-safe base64.
+"""
+from datetime import datetime
+from typing import Optional, Tuple
+import base64
+from sqlalchemy import tuple_
+
+Cursor = Tuple[datetime, str]
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Inverse of encode_cursor; raises ValueError for anything it didn't produce"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+
+
+def keyset(query, created_at_column, id_column, cursor: Optional[Cursor], limit: int, descending: bool = True):
+    """Apply the seek condition, ordering and limit to a Select or legacy Query"""
+    key = tuple_(created_at_column, id_column)
+    if cursor is not None:
+        query = query.filter(key < tuple_(*cursor) if descending else key > tuple_(*cursor))
+
+    if descending:
+        return query.order_by(created_at_column.desc(), id_column.desc()).limit(limit)
+    return query.order_by(created_at_column.asc(), id_column.asc()).limit(limit)
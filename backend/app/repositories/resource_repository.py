@@ -1,37 +1,44 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
+from app.config.database import READ_REPLICA
+from app.repositories.pagination import Cursor, keyset
 from app.models.resource import Resource
 from app.schemas.resource import ResourceCreate, ResourceUpdate
 
 
-class ResourceRepository:
-    def __init__(self, db: Session):
+class AsyncResourceRepository:
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create(self, resource_data: ResourceCreate) -> Resource:
+    async def create(self, resource_data: ResourceCreate) -> Resource:
         resource = Resource(**resource_data.dict())
         self.db.add(resource)
-        self.db.commit()
-        self.db.refresh(resource)
+        await self.db.flush()
+        await self.db.refresh(resource)
         return resource
 
-    def get_by_id(self, resource_id: str) -> Optional[Resource]:
-        return self.db.query(Resource).filter(Resource.id == resource_id).first()
+    async def get_by_id(self, resource_id: str) -> Optional[Resource]:
+        result = await self.db.execute(select(Resource).where(Resource.id == resource_id))
+        return result.scalars().first()
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[Resource]:
-        return self.db.query(Resource).offset(skip).limit(limit).all()
+    async def get_all(self, cursor: Optional[Cursor] = None, limit: int = 100) -> List[Resource]:
+        result = await self.db.execute(
+            keyset(select(Resource), Resource.created_at, Resource.id, cursor, limit),
+            bind_arguments=READ_REPLICA
+        )
+        return list(result.scalars().all())
 
-    def get_by_category(self, category: str, skip: int = 0, limit: int = 100) -> List[Resource]:
-        return (
-            self.db.query(Resource)
-            .filter(Resource.category == category)
-            .offset(skip)
-            .limit(limit)
-            .all()
+    async def get_by_category(self, category: str, cursor: Optional[Cursor] = None, limit: int = 100) -> List[Resource]:
+        query = select(Resource).where(Resource.category == category)
+        result = await self.db.execute(
+            keyset(query, Resource.created_at, Resource.id, cursor, limit),
+            bind_arguments=READ_REPLICA
         )
+        return list(result.scalars().all())
 
-    def update(self, resource_id: str, resource_data: ResourceUpdate) -> Optional[Resource]:
-        resource = self.get_by_id(resource_id)
+    async def update(self, resource_id: str, resource_data: ResourceUpdate) -> Optional[Resource]:
+        resource = await self.get_by_id(resource_id)
         if not resource:
             return None
 
@@ -39,15 +46,12 @@ class ResourceRepository:
         for field, value in update_data.items():
             setattr(resource, field, value)
 
-        self.db.commit()
-        self.db.refresh(resource)
         return resource
 
-    def delete(self, resource_id: str) -> bool:
-        resource = self.get_by_id(resource_id)
+    async def delete(self, resource_id: str) -> bool:
+        resource = await self.get_by_id(resource_id)
         if not resource:
             return False
 
-        self.db.delete(resource)
-        self.db.commit()
+        await self.db.delete(resource)
         return True
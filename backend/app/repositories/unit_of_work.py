@@ -0,0 +1,46 @@
+"""
+Units of work spanning the repositories.
+
+Repositories only add and flush; the unit of work owns the transaction and
+commits it once, so a service call that touches several tables makes a
+single commit and either all of its writes land or none do. Callbacks
+registered with `after_commit` (cache invalidation, for one) run after the
+commit succeeds and are discarded on rollback.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+import inspect
+from app.repositories.user_repository import AsyncUserRepository
+from app.repositories.debate_repository import AsyncDebateRepository
+from app.repositories.resource_repository import AsyncResourceRepository
+from app.repositories.notification_repository import AsyncNotificationRepository
+
+
+class AsyncUnitOfWork:
+    """`async with uow:` commits on success and rolls back on error"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.users = AsyncUserRepository(db)
+        self.debates = AsyncDebateRepository(db)
+        self.resources = AsyncResourceRepository(db)
+        self.notifications = AsyncNotificationRepository(db)
+
+    async def commit(self) -> None:
+        await self.db.commit()
+        for callback in self.db.info.pop("after_commit", []):
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
+        self.db.info.pop("after_commit", None)
+
+    async def __aenter__(self) -> "AsyncUnitOfWork":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.commit()
+        else:
+            await self.rollback()
@@ -1,35 +1,89 @@
-from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Optional, List
+from app.config.cache import ModelCache
+from app.config.database import READ_REPLICA, after_commit
+from app.config.settings import settings
+from app.repositories.pagination import Cursor, keyset
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import Principal, UserCreate, UserUpdate
 
+# Principals by user id; writes below invalidate the entry once their unit of work commits
+principal_cache = ModelCache(
+    Principal,
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL if settings.USER_CACHE_REDIS else None,
+    prefix="principal:"
+)
 
-class UserRepository:
-    def __init__(self, db: Session):
+STAT_COUNTERS = ("points", "debates_completed", "streak_days")
+
+
+def _increment_stats_statement(user_id: str, deltas: Dict[str, int]):
+    """UPDATE adding each delta to its column in the database, returning the new totals"""
+    unknown = set(deltas) - set(STAT_COUNTERS)
+    if unknown:
+        raise ValueError(f"Unknown stat counters: {', '.join(sorted(unknown))}")
+
+    columns = [getattr(User, name) for name in STAT_COUNTERS]
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values({getattr(User, name): getattr(User, name) + delta for name, delta in deltas.items()})
+        .returning(*columns)
+    )
+
+
+class AsyncUserRepository:
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create(self, user_data: UserCreate, password_hash: str) -> User:
+    async def create(self, user_data: UserCreate, password_hash: str) -> User:
         user = User(
             email=user_data.email,
             password_hash=password_hash,
             full_name=user_data.full_name
         )
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.flush()
+        await self.db.refresh(user)
         return user
 
-    def get_by_id(self, user_id: str) -> Optional[User]:
-        return self.db.query(User).filter(User.id == user_id).first()
+    async def get_by_id(self, user_id: str) -> Optional[User]:
+        result = await self.db.execute(select(User).where(User.id == user_id))
+        return result.scalars().first()
+
+    async def get_principal(self, user_id: str) -> Optional[Principal]:
+        """The cached principal for a user, loading only the columns it needs on a miss"""
+        principal = await principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        result = await self.db.execute(
+            select(User.id, User.email, User.is_active, User.subscription_tier).where(User.id == user_id)
+        )
+        row = result.first()
+        if row is None:
+            return None
+
+        principal = Principal(**row._mapping)
+        await principal_cache.set(user_id, principal)
+        return principal
 
-    def get_by_email(self, email: str) -> Optional[User]:
-        return self.db.query(User).filter(User.email == email).first()
+    async def get_by_email(self, email: str) -> Optional[User]:
+        result = await self.db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[User]:
-        return self.db.query(User).offset(skip).limit(limit).all()
+    async def get_all(self, cursor: Optional[Cursor] = None, limit: int = 100) -> List[User]:
+        result = await self.db.execute(
+            keyset(select(User), User.created_at, User.id, cursor, limit),
+            bind_arguments=READ_REPLICA
+        )
+        return list(result.scalars().all())
 
-    def update(self, user_id: str, user_data: UserUpdate) -> Optional[User]:
-        user = self.get_by_id(user_id)
+    async def update(self, user_id: str, user_data: UserUpdate) -> Optional[User]:
+        user = await self.get_by_id(user_id)
         if not user:
             return None
 
@@ -37,35 +91,32 @@ class UserRepository:
         for field, value in update_data.items():
             setattr(user, field, value)
 
-        self.db.commit()
-        self.db.refresh(user)
+        # Refresh picks up the server-side updated_at
+        await self.db.flush()
+        await self.db.refresh(user)
+        after_commit(self.db, lambda: principal_cache.invalidate(user_id))
         return user
 
-    def delete(self, user_id: str) -> bool:
-        user = self.get_by_id(user_id)
+    async def delete(self, user_id: str) -> bool:
+        user = await self.get_by_id(user_id)
         if not user:
             return False
 
-        self.db.delete(user)
-        self.db.commit()
+        await self.db.delete(user)
+        after_commit(self.db, lambda: principal_cache.invalidate(user_id))
         return True
 
-    def increment_points(self, user_id: str, points: int) -> Optional[User]:
-        user = self.get_by_id(user_id)
-        if not user:
-            return None
-
-        user.points += points
-        self.db.commit()
-        self.db.refresh(user)
+    async def update_password_hash(self, user: User, password_hash: str) -> User:
+        user.password_hash = password_hash
         return user
 
-    def increment_debates_completed(self, user_id: str) -> Optional[User]:
-        user = self.get_by_id(user_id)
-        if not user:
-            return None
+    async def increment_stats(self, user_id: str, **deltas: int) -> Optional[Dict[str, int]]:
+        """Atomically add to several counters in one statement; None if the user doesn't exist"""
+        row = (await self.db.execute(_increment_stats_statement(user_id, deltas))).first()
+        return dict(row._mapping) if row else None
 
-        user.debates_completed += 1
-        self.db.commit()
-        self.db.refresh(user)
-        return user
+    async def increment_points(self, user_id: str, points: int) -> Optional[Dict[str, int]]:
+        return await self.increment_stats(user_id, points=points)
+
+    async def increment_debates_completed(self, user_id: str) -> Optional[Dict[str, int]]:
+        return await self.increment_stats(user_id, debates_completed=1)
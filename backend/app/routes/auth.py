@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.config.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config.database import get_async_db
 from app.schemas.user import UserCreate, UserLogin, TokenResponse, UserResponse
 from app.services.auth_service import AuthService
 from app.utils.dependencies import get_current_user
@@ -11,11 +11,11 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/signup", response_model=TokenResponse, status_code=201)
-def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     api_logger.info("Signup request received", {"email": user_data.email})
     try:
         auth_service = AuthService(db)
-        result = auth_service.register(user_data)
+        result = await auth_service.register(user_data)
         api_logger.info("User registered successfully", {"email": user_data.email})
         return result
     except Exception as e:
@@ -24,11 +24,11 @@ def signup(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/signin", response_model=TokenResponse)
-def signin(login_data: UserLogin, db: Session = Depends(get_db)):
+async def signin(login_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     api_logger.info("Signin request received", {"email": login_data.email})
     try:
         auth_service = AuthService(db)
-        result = auth_service.login(login_data)
+        result = await auth_service.login(login_data)
         api_logger.info("User signed in successfully", {"email": login_data.email})
         return result
     except Exception as e:
@@ -1,27 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.utils.dependencies import get_db, get_current_user
-from app.models.user import User
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Set
+from app.config.cache import TTLCache
+from app.config.database import READ_REPLICA, get_async_db
+from app.repositories.pagination import Cursor
+from app.schemas.user import Principal
+from app.utils.dependencies import get_current_principal, get_stream_principal
 from app.schemas.debate import (
     CountryDebateCreate,
     CountryDebateResponse,
     CountryDebateJoin,
+    CountryDebateJoinResponse,
     CountryDebateMessageCreate,
-    CountryDebateMessageResponse
+    CountryDebateMessageResponse,
+    CountryDebateMessageBatch,
+    CountryDebateMessageResult
 )
+from app.config.settings import settings
+from app.services.message_writer import message_writer
+from app.utils.broadcast import message_broadcaster
 from app.utils.logger import api_logger
-from sqlalchemy import text
+from app.utils.pagination import get_cursor, set_next_cursor
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
+import asyncio
+import hashlib
+import json
 
 router = APIRouter(prefix="/country-debates", tags=["country-debates"])
 
+MAX_MESSAGE_PAGE = 1000
+
+# debate id -> {user id: {username, country_name, country_code}} for message senders.
+# Joining invalidates the local entry; other workers catch up when an unknown sender
+# appears. Senders who have not joined are cached too, but their debate's entry only
+# lives PARTICIPANT_CACHE_MISS_TTL_SECONDS, so a later join elsewhere shows up soon.
+participant_cache = TTLCache(settings.PARTICIPANT_CACHE_MAX_SIZE, settings.PARTICIPANT_CACHE_TTL_SECONDS)
+
+
+async def _get_senders(db: AsyncSession, debate_id: str, sender_ids: Set[str]) -> Dict[str, dict]:
+    senders = participant_cache.get(debate_id)
+    if senders is not None and sender_ids <= senders.keys():
+        return senders
+
+    result = await db.execute(text("""
+        SELECT p.user_id, u.username, p.country_name, p.country_code
+        FROM country_debate_participants p
+        JOIN users u ON p.user_id = u.id
+        WHERE p.debate_id = :debate_id
+    """), {"debate_id": debate_id}, bind_arguments=READ_REPLICA)
+    senders = {
+        row.user_id: {"username": row.username, "country_name": row.country_name, "country_code": row.country_code}
+        for row in result
+    }
+
+    # Senders who never joined get a name but no country, as the old LEFT JOIN gave them
+    missing = sender_ids - senders.keys()
+    if missing:
+        result = await db.execute(
+            text("SELECT id, username FROM users WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(missing)},
+            bind_arguments=READ_REPLICA
+        )
+        for row in result:
+            senders[row.id] = {"username": row.username, "country_name": None, "country_code": None}
+
+    participant_cache.set(debate_id, senders, ttl=settings.PARTICIPANT_CACHE_MISS_TTL_SECONDS if missing else None)
+    return senders
+
 
 @router.post("", response_model=CountryDebateResponse, status_code=status.HTTP_201_CREATED)
 async def create_country_debate(
     debate: CountryDebateCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         query = text("""
@@ -32,10 +86,10 @@ async def create_country_debate(
                 :topic, :description, :debate_type, :max_participants,
                 :created_by, 'waiting'
             ) RETURNING id, topic, description, debate_type, max_participants,
-                        created_by, status, created_at
+                        participant_count, created_by, status, created_at
         """)
 
-        result = db.execute(query, {
+        result = await db.execute(query, {
             "topic": debate.topic,
             "description": debate.description,
             "debate_type": debate.debate_type,
@@ -44,7 +98,7 @@ async def create_country_debate(
         })
 
         row = result.fetchone()
-        db.commit()
+        await db.commit()
 
         api_logger.info(f"Country debate created: {row.id} by user {current_user.id}")
 
@@ -54,12 +108,13 @@ async def create_country_debate(
             "description": row.description,
             "debate_type": row.debate_type,
             "max_participants": row.max_participants,
+            "participant_count": row.participant_count,
             "created_by": row.created_by,
             "status": row.status,
             "created_at": row.created_at
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         api_logger.error(f"Error creating country debate: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -70,20 +125,20 @@ async def create_country_debate(
 @router.get("", response_model=List[CountryDebateResponse])
 async def list_country_debates(
     status_filter: str = "waiting",
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         query = text("""
             SELECT id, topic, description, debate_type, max_participants,
-                   created_by, status, created_at, started_at, ended_at
+                   participant_count, created_by, status, created_at, started_at, ended_at
             FROM country_debates
             WHERE status = :status
             ORDER BY created_at DESC
             LIMIT 50
         """)
 
-        result = db.execute(query, {"status": status_filter})
+        result = await db.execute(query, {"status": status_filter}, bind_arguments=READ_REPLICA)
         debates = result.fetchall()
 
         return [
@@ -93,6 +148,7 @@ async def list_country_debates(
                 "description": row.description,
                 "debate_type": row.debate_type,
                 "max_participants": row.max_participants,
+                "participant_count": row.participant_count,
                 "created_by": row.created_by,
                 "status": row.status,
                 "created_at": row.created_at,
@@ -109,132 +165,241 @@ async def list_country_debates(
         )
 
 
-@router.post("/join", status_code=status.HTTP_200_OK)
+@router.post("/join", response_model=CountryDebateJoinResponse, status_code=status.HTTP_200_OK)
 async def join_country_debate(
     join_data: CountryDebateJoin,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    try:
-        check_query = text("""
-            SELECT COUNT(*) as count
-            FROM country_debate_participants
-            WHERE debate_id = :debate_id AND user_id = :user_id
-        """)
+    # Taking a seat and inserting the participant happen in one statement. The
+    # conditional UPDATE locks the debate row, so concurrent joins queue on it and
+    # each re-checks the count; a duplicate that slips past NOT EXISTS hits the
+    # unique constraint and the whole statement, seat included, rolls back.
+    query = text("""
+        WITH seat AS (
+            UPDATE country_debates
+            SET participant_count = participant_count + 1
+            WHERE id = :debate_id
+              AND participant_count < max_participants
+              AND NOT EXISTS (
+                  SELECT 1 FROM country_debate_participants
+                  WHERE debate_id = :debate_id AND user_id = :user_id
+              )
+            RETURNING id, participant_count
+        ), joined AS (
+            INSERT INTO country_debate_participants (debate_id, user_id, country_code, country_name)
+            SELECT id, :user_id, :country_code, :country_name FROM seat
+            RETURNING debate_id, user_id, country_code, country_name
+        )
+        SELECT d.max_participants, s.participant_count AS seated_count,
+               r.user_id, r.username, r.country_code, r.country_name
+        FROM country_debates d
+        LEFT JOIN seat s ON s.id = d.id
+        LEFT JOIN LATERAL (
+            SELECT p.user_id, u.username, p.country_code, p.country_name
+            FROM country_debate_participants p
+            JOIN users u ON p.user_id = u.id
+            WHERE p.debate_id = d.id
+            UNION ALL
+            SELECT j.user_id, u.username, j.country_code, j.country_name
+            FROM joined j
+            JOIN users u ON j.user_id = u.id
+        ) r ON true
+        WHERE d.id = :debate_id
+    """)
 
-        existing = db.execute(check_query, {
+    try:
+        rows = (await db.execute(query, {
             "debate_id": join_data.debate_id,
-            "user_id": current_user.id
-        }).fetchone()
+            "user_id": current_user.id,
+            "country_code": join_data.country_code,
+            "country_name": join_data.country_name
+        })).fetchall()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Already joined this debate"
+        )
+    except Exception as e:
+        await db.rollback()
+        api_logger.error(f"Error joining debate: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to join debate"
+        )
 
-        if existing.count > 0:
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Debate not found"
+        )
+
+    participants = [
+        {
+            "user_id": row.user_id,
+            "username": row.username,
+            "country_code": row.country_code,
+            "country_name": row.country_name
+        }
+        for row in rows if row.user_id is not None
+    ]
+
+    seated_count = rows[0].seated_count
+    if seated_count is None:
+        if any(p["user_id"] == current_user.id for p in participants):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Already joined this debate"
             )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Debate is full"
+        )
 
-        insert_query = text("""
-            INSERT INTO country_debate_participants (
-                debate_id, user_id, country_code, country_name
-            ) VALUES (
-                :debate_id, :user_id, :country_code, :country_name
-            )
-        """)
+    participant_cache.delete(join_data.debate_id)
 
-        db.execute(insert_query, {
-            "debate_id": join_data.debate_id,
-            "user_id": current_user.id,
-            "country_code": join_data.country_code,
-            "country_name": join_data.country_name
-        })
+    api_logger.info(f"User {current_user.id} joined debate {join_data.debate_id} as {join_data.country_name}")
 
-        db.commit()
+    return {
+        "message": "Successfully joined debate",
+        "participant_count": seated_count,
+        "max_participants": rows[0].max_participants,
+        "participants": participants
+    }
 
-        api_logger.info(f"User {current_user.id} joined debate {join_data.debate_id} as {join_data.country_name}")
 
-        return {"message": "Successfully joined debate"}
-    except HTTPException:
-        raise
+async def _publish(message: CountryDebateMessageResponse) -> None:
+    try:
+        await message_broadcaster.publish(message.debate_id, message.model_dump(mode="json"))
     except Exception as e:
-        db.rollback()
-        api_logger.error(f"Error joining debate: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to join debate"
-        )
+        # The message is stored; viewers pick it up when they next reload
+        api_logger.error(f"Error broadcasting message {message.id}: {str(e)}")
+
+
+def _message_values(message_data: CountryDebateMessageCreate, user_id: str) -> dict:
+    return {
+        "debate_id": message_data.debate_id,
+        "user_id": user_id,
+        "message": message_data.message,
+        "message_type": message_data.message_type,
+        "voice_url": message_data.voice_url,
+        "voice_duration_seconds": message_data.voice_duration_seconds
+    }
 
 
 @router.post("/messages", response_model=CountryDebateMessageResponse, status_code=status.HTTP_201_CREATED)
 async def send_message(
     message_data: CountryDebateMessageCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    try:
-        query = text("""
-            INSERT INTO country_debate_messages (
-                debate_id, user_id, message, message_type,
-                voice_url, voice_duration_seconds
-            ) VALUES (
-                :debate_id, :user_id, :message, :message_type,
-                :voice_url, :voice_duration_seconds
-            ) RETURNING id, debate_id, user_id, message, message_type,
-                        voice_url, voice_duration_seconds, created_at
-        """)
-
-        result = db.execute(query, {
-            "debate_id": message_data.debate_id,
-            "user_id": current_user.id,
-            "message": message_data.message,
-            "message_type": message_data.message_type,
-            "voice_url": message_data.voice_url,
-            "voice_duration_seconds": message_data.voice_duration_seconds
-        })
-
-        row = result.fetchone()
-        db.commit()
-
-        return {
-            "id": row.id,
-            "debate_id": row.debate_id,
-            "user_id": row.user_id,
-            "message": row.message,
-            "message_type": row.message_type,
-            "voice_url": row.voice_url,
-            "voice_duration_seconds": row.voice_duration_seconds,
-            "created_at": row.created_at
-        }
-    except Exception as e:
-        db.rollback()
-        api_logger.error(f"Error sending message: {str(e)}")
+    # Shares a multi-row INSERT with whatever else is sent in the same flush window
+    [row] = await message_writer.write([_message_values(message_data, current_user.id)])
+    if isinstance(row, Exception):
+        api_logger.error(f"Error sending message: {str(row)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to send message"
         )
 
+    message = CountryDebateMessageResponse.from_orm(row)
+    await _publish(message)
+    return message
+
+
+@router.post("/messages/batch", response_model=List[CountryDebateMessageResult])
+async def send_messages(
+    batch: CountryDebateMessageBatch,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Store several messages at once; results are in request order, one per message"""
+    rows = await message_writer.write([_message_values(m, current_user.id) for m in batch.messages])
+
+    results = []
+    for row in rows:
+        if isinstance(row, Exception):
+            api_logger.error(f"Error sending message in batch: {str(row)}")
+            results.append(CountryDebateMessageResult(status="failed", error="Failed to send message"))
+            continue
+
+        message = CountryDebateMessageResponse.from_orm(row)
+        await _publish(message)
+        results.append(CountryDebateMessageResult(status="created", message=message))
+
+    api_logger.info(f"User {current_user.id} sent {len(rows)} messages in a batch")
+    return results
+
 
 @router.get("/{debate_id}/messages", response_model=List[CountryDebateMessageResponse])
 async def get_messages(
     debate_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[Cursor] = Depends(get_cursor),
+    after: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=MAX_MESSAGE_PAGE),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        query = text("""
+        # Messages are append-only and `seq` follows commit order within a debate,
+        # so the newest one identifies the whole history. Checking it is a single
+        # index probe, and an unchanged poll ends here.
+        latest = (await db.execute(text("""
+            SELECT id
+            FROM country_debate_messages
+            WHERE debate_id = :debate_id
+            ORDER BY seq DESC
+            LIMIT 1
+        """), {"debate_id": debate_id}, bind_arguments=READ_REPLICA)).fetchone()
+
+        etag_key = f"{debate_id}|{latest.id if latest else ''}|{request.url.query}"
+        etag = f'W/"{hashlib.sha1(etag_key.encode()).hexdigest()}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        # Oldest first; the cursor seeks past the last message of the previous
+        # page, `after` past a message the client already has. Both seek by
+        # `seq`, since created_at need not follow commit order across workers.
+        after_id = cursor[1] if cursor else after
+        seek = """AND m.seq > (
+            SELECT seq FROM country_debate_messages
+            WHERE id = :after_id AND debate_id = :debate_id
+        )""" if after_id else ""
+
+        # Single-table range scan; sender names and countries come from the participant cache
+        query = text(f"""
             SELECT m.id, m.debate_id, m.user_id, m.message, m.message_type,
-                   m.voice_url, m.voice_duration_seconds, m.created_at,
-                   u.username, p.country_name, p.country_code
+                   m.voice_url, m.voice_duration_seconds, m.created_at
             FROM country_debate_messages m
-            JOIN users u ON m.user_id = u.id
-            LEFT JOIN country_debate_participants p
-                ON m.debate_id = p.debate_id AND m.user_id = p.user_id
             WHERE m.debate_id = :debate_id
-            ORDER BY m.created_at ASC
+            {seek}
+            ORDER BY m.seq ASC
+            LIMIT :limit
         """)
 
-        result = db.execute(query, {"debate_id": debate_id})
+        params = {"debate_id": debate_id, "limit": limit}
+        if after_id:
+            params["after_id"] = after_id
+
+        result = await db.execute(query, params, bind_arguments=READ_REPLICA)
         messages = result.fetchall()
 
+        # A message of this debate either is the latest one or has newer ones
+        # behind it, so an empty page otherwise means the id is not in this debate
+        if after_id and not messages and (latest is None or latest.id != after_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor" if cursor else "Unknown message id in after"
+            )
+
+        set_next_cursor(response, messages, limit)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+
+        senders = await _get_senders(db, debate_id, {row.user_id for row in messages}) if messages else {}
+        unknown = {"username": None, "country_name": None, "country_code": None}
         return [
             {
                 "id": row.id,
@@ -245,15 +410,46 @@ async def get_messages(
                 "voice_url": row.voice_url,
                 "voice_duration_seconds": row.voice_duration_seconds,
                 "created_at": row.created_at,
-                "username": row.username,
-                "country_name": row.country_name,
-                "country_code": row.country_code
+                **senders.get(row.user_id, unknown)
             }
             for row in messages
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         api_logger.error(f"Error fetching messages: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch messages"
         )
+
+
+@router.get("/{debate_id}/stream")
+async def stream_messages(
+    debate_id: str,
+    request: Request,
+    current_user: Principal = Depends(get_stream_principal)
+):
+    """Server-sent events carrying each new message in the debate as it is sent"""
+    async def events():
+        async with message_broadcaster.subscribe(debate_id) as queue:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), settings.MESSAGE_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if message is None:
+                    # Fell behind and was dropped; the client reloads history and reconnects
+                    yield "event: reset\ndata: {}\n\n"
+                    return
+                yield f"data: {json.dumps(message, separators=(',', ':'))}\n\n"
+
+    api_logger.debug(f"User {current_user.id} streaming debate {debate_id}")
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
-from app.config.database import get_db
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.config.database import get_async_db
+from app.repositories.pagination import Cursor
 from app.schemas.debate import (
     DebateSessionCreate,
     DebateSessionResponse,
@@ -10,19 +11,20 @@ from app.schemas.debate import (
     AnalyzeDebateRequest,
     AnalysisResponse
 )
-from app.services.debate_service import DebateService
-from app.utils.dependencies import get_current_user
-from app.models.user import User
+from app.services.debate_service import AsyncDebateService
+from app.schemas.user import Principal
+from app.utils.dependencies import get_current_principal
 from app.utils.logger import api_logger
+from app.utils.pagination import MAX_PAGE_SIZE, get_cursor, set_next_cursor
 
 router = APIRouter(prefix="/debates", tags=["Debates"])
 
 
 @router.post("/sessions", response_model=DebateSessionResponse, status_code=201)
-def create_debate_session(
+async def create_debate_session(
     session_data: DebateSessionCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     api_logger.info("Creating debate session", {
         "user_id": current_user.id,
@@ -30,8 +32,8 @@ def create_debate_session(
         "stance": session_data.stance
     })
     try:
-        debate_service = DebateService(db)
-        result = debate_service.create_session(current_user.id, session_data)
+        debate_service = AsyncDebateService(db)
+        result = await debate_service.create_session(current_user.id, session_data)
         api_logger.info("Debate session created successfully", {"session_id": result.id})
         return result
     except Exception as e:
@@ -40,20 +42,22 @@ def create_debate_session(
 
 
 @router.get("/sessions", response_model=List[DebateSessionResponse])
-def get_debate_sessions(
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_debate_sessions(
+    response: Response,
+    cursor: Optional[Cursor] = Depends(get_cursor),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     api_logger.debug("Fetching debate sessions", {
         "user_id": current_user.id,
-        "skip": skip,
+        "paged": cursor is not None,
         "limit": limit
     })
     try:
-        debate_service = DebateService(db)
-        sessions = debate_service.get_user_sessions(current_user.id, skip, limit)
+        debate_service = AsyncDebateService(db)
+        sessions = await debate_service.get_user_sessions(current_user.id, cursor, limit)
+        set_next_cursor(response, sessions, limit)
         api_logger.info(f"Retrieved {len(sessions)} debate sessions", {"user_id": current_user.id})
         return sessions
     except Exception as e:
@@ -62,15 +66,15 @@ def get_debate_sessions(
 
 
 @router.get("/sessions/{session_id}", response_model=DebateSessionResponse)
-def get_debate_session(
+async def get_debate_session(
     session_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     api_logger.debug("Fetching debate session", {"session_id": session_id, "user_id": current_user.id})
     try:
-        debate_service = DebateService(db)
-        session = debate_service.get_session(session_id, current_user.id)
+        debate_service = AsyncDebateService(db)
+        session = await debate_service.get_session(session_id, current_user.id)
         api_logger.info("Debate session retrieved successfully", {"session_id": session_id})
         return session
     except Exception as e:
@@ -82,18 +86,18 @@ def get_debate_session(
 
 
 @router.post("/transcripts", response_model=TranscriptResponse, status_code=201)
-def create_transcript(
+async def create_transcript(
     transcript_data: TranscriptCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     api_logger.debug("Creating transcript", {
         "session_id": transcript_data.session_id,
         "speaker": transcript_data.speaker
     })
     try:
-        debate_service = DebateService(db)
-        result = debate_service.create_transcript(current_user.id, transcript_data)
+        debate_service = AsyncDebateService(db)
+        result = await debate_service.create_transcript(current_user.id, transcript_data)
         api_logger.info("Transcript created successfully", {"transcript_id": result.id})
         return result
     except Exception as e:
@@ -102,15 +106,15 @@ def create_transcript(
 
 
 @router.get("/sessions/{session_id}/transcripts", response_model=List[TranscriptResponse])
-def get_transcripts(
+async def get_transcripts(
     session_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     api_logger.debug("Fetching transcripts", {"session_id": session_id})
     try:
-        debate_service = DebateService(db)
-        transcripts = debate_service.get_transcripts(session_id, current_user.id)
+        debate_service = AsyncDebateService(db)
+        transcripts = await debate_service.get_transcripts(session_id, current_user.id)
         api_logger.info(f"Retrieved {len(transcripts)} transcripts", {"session_id": session_id})
         return transcripts
     except Exception as e:
@@ -121,8 +125,8 @@ def get_transcripts(
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze_debate(
     request: AnalyzeDebateRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     api_logger.info("Analyzing debate", {
         "session_id": request.session_id,
@@ -130,7 +134,7 @@ async def analyze_debate(
         "transcript_count": len(request.transcripts)
     })
     try:
-        debate_service = DebateService(db)
+        debate_service = AsyncDebateService(db)
         result = await debate_service.analyze_debate(current_user.id, request)
         api_logger.info("Debate analysis completed successfully", {"session_id": request.session_id})
         return result
@@ -1,27 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.config.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.config.database import get_async_db
 from app.schemas.notification import NotificationResponse
-from app.repositories.notification_repository import NotificationRepository
-from app.utils.dependencies import get_current_user
-from app.models.user import User
+from app.repositories.notification_repository import AsyncNotificationRepository
+from app.repositories.pagination import Cursor
+from app.repositories.unit_of_work import AsyncUnitOfWork
+from app.schemas.user import Principal
+from app.utils.dependencies import get_current_principal
 from app.utils.logger import api_logger
+from app.utils.pagination import MAX_PAGE_SIZE, get_cursor, set_next_cursor
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
 
 @router.get("", response_model=List[NotificationResponse])
-def get_notifications(
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_notifications(
+    response: Response,
+    cursor: Optional[Cursor] = Depends(get_cursor),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    api_logger.debug("Fetching notifications", {"user_id": current_user.id, "skip": skip, "limit": limit})
+    api_logger.debug("Fetching notifications", {"user_id": current_user.id, "paged": cursor is not None, "limit": limit})
     try:
-        notification_repo = NotificationRepository(db)
-        notifications = notification_repo.get_user_notifications(current_user.id, skip, limit)
+        notification_repo = AsyncNotificationRepository(db)
+        notifications = await notification_repo.get_user_notifications(current_user.id, cursor, limit)
+        set_next_cursor(response, notifications, limit)
         api_logger.info(f"Retrieved {len(notifications)} notifications", {"user_id": current_user.id})
         return [NotificationResponse.from_orm(notif) for notif in notifications]
     except Exception as e:
@@ -30,18 +35,18 @@ def get_notifications(
 
 
 @router.put("/{notification_id}/read", response_model=dict)
-def mark_notification_read(
+async def mark_notification_read(
     notification_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     api_logger.debug("Marking notification as read", {
         "notification_id": notification_id,
         "user_id": current_user.id
     })
     try:
-        notification_repo = NotificationRepository(db)
-        notification = notification_repo.get_by_id(notification_id)
+        uow = AsyncUnitOfWork(db)
+        notification = await uow.notifications.get_by_id(notification_id)
 
         if not notification:
             api_logger.warning("Notification not found", {"notification_id": notification_id})
@@ -60,7 +65,8 @@ def mark_notification_read(
                 detail="Not authorized to access this notification"
             )
 
-        notification_repo.mark_as_read(notification_id)
+        async with uow:
+            await uow.notifications.mark_as_read(notification_id)
         api_logger.info("Notification marked as read", {"notification_id": notification_id})
         return {"message": "Notification marked as read"}
     except HTTPException:
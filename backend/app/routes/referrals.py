@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.utils.dependencies import get_db, get_current_user
-from app.models.user import User
-from app.schemas.user import ReferralResponse, ReferralApply, CoinBalanceResponse
+from app.config.database import READ_REPLICA, get_async_db
+from app.utils.dependencies import get_current_principal
+from app.schemas.user import Principal, ReferralResponse, ReferralApply, CoinBalanceResponse
 from app.utils.logger import api_logger
 from sqlalchemy import text
 import random
@@ -19,8 +19,8 @@ def generate_referral_code() -> str:
 
 @router.get("/my-code", response_model=ReferralResponse)
 async def get_my_referral_code(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         check_query = text("""
@@ -29,7 +29,7 @@ async def get_my_referral_code(
             WHERE user_id = :user_id
         """)
 
-        result = db.execute(check_query, {"user_id": current_user.id})
+        result = await db.execute(check_query, {"user_id": current_user.id})
         existing = result.fetchone()
 
         if existing:
@@ -48,7 +48,7 @@ async def get_my_referral_code(
                 WHERE referral_code = :code
             """)
 
-            count_result = db.execute(check_unique, {"code": referral_code}).fetchone()
+            count_result = (await db.execute(check_unique, {"code": referral_code})).fetchone()
 
             if count_result.count == 0:
                 break
@@ -60,12 +60,12 @@ async def get_my_referral_code(
             VALUES (:user_id, :referral_code)
         """)
 
-        db.execute(insert_query, {
+        await db.execute(insert_query, {
             "user_id": current_user.id,
             "referral_code": referral_code
         })
 
-        db.commit()
+        await db.commit()
 
         api_logger.info(f"Generated referral code {referral_code} for user {current_user.id}")
 
@@ -76,7 +76,7 @@ async def get_my_referral_code(
         }
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         api_logger.error(f"Error getting referral code: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -87,8 +87,8 @@ async def get_my_referral_code(
 @router.post("/apply", status_code=status.HTTP_200_OK)
 async def apply_referral_code(
     referral_data: ReferralApply,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         check_already_used = text("""
@@ -97,7 +97,7 @@ async def apply_referral_code(
             WHERE referred_user_id = :user_id
         """)
 
-        used_result = db.execute(check_already_used, {"user_id": current_user.id}).fetchone()
+        used_result = (await db.execute(check_already_used, {"user_id": current_user.id})).fetchone()
 
         if used_result.count > 0:
             raise HTTPException(
@@ -111,7 +111,7 @@ async def apply_referral_code(
             WHERE referral_code = :code
         """)
 
-        referrer_result = db.execute(find_referrer, {"code": referral_data.referral_code}).fetchone()
+        referrer_result = (await db.execute(find_referrer, {"code": referral_data.referral_code})).fetchone()
 
         if not referrer_result:
             raise HTTPException(
@@ -135,7 +135,7 @@ async def apply_referral_code(
             )
         """)
 
-        db.execute(record_referral, {
+        await db.execute(record_referral, {
             "referrer_id": referrer_id,
             "referred_user_id": current_user.id
         })
@@ -147,7 +147,7 @@ async def apply_referral_code(
             WHERE user_id = :referrer_id
         """)
 
-        db.execute(update_referrer_stats, {"referrer_id": referrer_id})
+        await db.execute(update_referrer_stats, {"referrer_id": referrer_id})
 
         update_referrer_coins = text("""
             UPDATE users
@@ -155,9 +155,9 @@ async def apply_referral_code(
             WHERE id = :referrer_id
         """)
 
-        db.execute(update_referrer_coins, {"referrer_id": referrer_id})
+        await db.execute(update_referrer_coins, {"referrer_id": referrer_id})
 
-        db.commit()
+        await db.commit()
 
         api_logger.info(f"User {current_user.id} applied referral code from user {referrer_id}")
 
@@ -169,7 +169,7 @@ async def apply_referral_code(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         api_logger.error(f"Error applying referral code: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -179,8 +179,8 @@ async def apply_referral_code(
 
 @router.get("/my-referrals")
 async def get_my_referrals(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         query = text("""
@@ -192,7 +192,7 @@ async def get_my_referrals(
             ORDER BY rh.created_at DESC
         """)
 
-        result = db.execute(query, {"user_id": current_user.id})
+        result = await db.execute(query, {"user_id": current_user.id}, bind_arguments=READ_REPLICA)
         referrals = result.fetchall()
 
         return [
@@ -216,8 +216,8 @@ async def get_my_referrals(
 
 @router.get("/coins", response_model=CoinBalanceResponse)
 async def get_coin_balance(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         query = text("""
@@ -226,7 +226,7 @@ async def get_coin_balance(
             WHERE id = :user_id
         """)
 
-        result = db.execute(query, {"user_id": current_user.id})
+        result = await db.execute(query, {"user_id": current_user.id})
         row = result.fetchone()
 
         return {
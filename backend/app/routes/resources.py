@@ -1,31 +1,36 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
-from app.config.database import get_db
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.config.database import get_async_db
+from app.repositories.pagination import Cursor
 from app.schemas.resource import ResourceResponse
-from app.services.resource_service import ResourceService
+from app.services.resource_service import AsyncResourceService
 from app.utils.logger import api_logger
+from app.utils.pagination import MAX_PAGE_SIZE, get_cursor, set_next_cursor
 
 router = APIRouter(prefix="/resources", tags=["Resources"])
 
 
 @router.get("", response_model=List[ResourceResponse])
-def get_resources(
-    skip: int = 0,
-    limit: int = 100,
+async def get_resources(
+    response: Response,
+    cursor: Optional[Cursor] = Depends(get_cursor),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     category: str = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    api_logger.debug("Fetching resources", {"category": category, "skip": skip, "limit": limit})
+    api_logger.debug("Fetching resources", {"category": category, "paged": cursor is not None, "limit": limit})
     try:
-        resource_service = ResourceService(db)
+        resource_service = AsyncResourceService(db)
 
         if category:
-            resources = resource_service.get_resources_by_category(category, skip, limit)
+            resources = await resource_service.get_resources_by_category(category, cursor, limit)
+            set_next_cursor(response, resources, limit)
             api_logger.info(f"Retrieved {len(resources)} resources for category '{category}'")
             return resources
 
-        resources = resource_service.get_all_resources(skip, limit)
+        resources = await resource_service.get_all_resources(cursor, limit)
+        set_next_cursor(response, resources, limit)
         api_logger.info(f"Retrieved {len(resources)} resources")
         return resources
     except Exception as e:
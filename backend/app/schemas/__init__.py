@@ -1,10 +1,10 @@
-from .user import UserCreate, UserUpdate, UserLogin, UserResponse, TokenResponse
+from .user import UserCreate, UserUpdate, UserLogin, UserResponse, TokenResponse, Principal
 from .debate import DebateSessionCreate, DebateSessionUpdate, DebateSessionResponse, TranscriptCreate, TranscriptResponse, AnalyzeDebateRequest, AnalysisResponse
 from .resource import ResourceCreate, ResourceUpdate, ResourceResponse
 from .notification import NotificationCreate, NotificationResponse
 
 __all__ = [
-    "UserCreate", "UserUpdate", "UserLogin", "UserResponse", "TokenResponse",
+    "UserCreate", "UserUpdate", "UserLogin", "UserResponse", "TokenResponse", "Principal",
     "DebateSessionCreate", "DebateSessionUpdate", "DebateSessionResponse",
     "TranscriptCreate", "TranscriptResponse", "AnalyzeDebateRequest", "AnalysisResponse",
     "ResourceCreate", "ResourceUpdate", "ResourceResponse",
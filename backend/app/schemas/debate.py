@@ -89,6 +89,7 @@ class CountryDebateResponse(BaseModel):
     description: Optional[str] = None
     debate_type: str
     max_participants: int
+    participant_count: int = 0
     created_by: str
     status: str
     created_at: datetime
@@ -105,6 +106,20 @@ class CountryDebateJoin(BaseModel):
     country_name: str = Field(..., min_length=1)
 
 
+class CountryDebateParticipant(BaseModel):
+    user_id: str
+    username: Optional[str] = None
+    country_code: str
+    country_name: str
+
+
+class CountryDebateJoinResponse(BaseModel):
+    message: str
+    participant_count: int
+    max_participants: int
+    participants: List[CountryDebateParticipant]
+
+
 class CountryDebateMessageCreate(BaseModel):
     debate_id: str
     message: str = Field(..., min_length=1)
@@ -128,3 +143,13 @@ class CountryDebateMessageResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class CountryDebateMessageBatch(BaseModel):
+    messages: List[CountryDebateMessageCreate] = Field(..., min_length=1, max_length=100)
+
+
+class CountryDebateMessageResult(BaseModel):
+    status: str
+    message: Optional[CountryDebateMessageResponse] = None
+    error: Optional[str] = None
@@ -40,6 +40,17 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class Principal(BaseModel):
+    """Authenticated user as seen by route dependencies, without the full row"""
+    id: str
+    email: str
+    is_active: bool
+    subscription_tier: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -1,6 +1,6 @@
 from .auth_service import AuthService
-from .debate_service import DebateService
+from .debate_service import AsyncDebateService
 from .ai_service import AIService
-from .resource_service import ResourceService
+from .resource_service import AsyncResourceService
 
-__all__ = ["AuthService", "DebateService", "AIService", "ResourceService"]
+__all__ = ["AuthService", "AsyncDebateService", "AIService", "AsyncResourceService"]
@@ -1,20 +1,21 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from app.repositories.user_repository import UserRepository
+from app.repositories.unit_of_work import AsyncUnitOfWork
 from app.schemas.user import UserCreate, UserLogin, TokenResponse, UserResponse
-from app.utils.security import verify_password, get_password_hash, create_access_token
+from app.utils.security import verify_and_update_password_async, get_password_hash_async, create_access_token
 from app.utils.logger import auth_logger
 
 
 class AuthService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.user_repo = UserRepository(db)
+        self.uow = AsyncUnitOfWork(db)
+        self.user_repo = self.uow.users
 
-    def register(self, user_data: UserCreate) -> TokenResponse:
+    async def register(self, user_data: UserCreate) -> TokenResponse:
         auth_logger.info("Attempting user registration", {"email": user_data.email})
 
-        existing_user = self.user_repo.get_by_email(user_data.email)
+        existing_user = await self.user_repo.get_by_email(user_data.email)
         if existing_user:
             auth_logger.warning("Registration failed - email already exists", {"email": user_data.email})
             raise HTTPException(
@@ -23,8 +24,9 @@ class AuthService:
             )
 
         auth_logger.debug("Hashing password and creating user", {"email": user_data.email})
-        password_hash = get_password_hash(user_data.password)
-        user = self.user_repo.create(user_data, password_hash)
+        password_hash = await get_password_hash_async(user_data.password)
+        async with self.uow:
+            user = await self.user_repo.create(user_data, password_hash)
 
         auth_logger.debug("Creating access token", {"user_id": user.id})
         access_token = create_access_token(data={"sub": user.id})
@@ -35,12 +37,16 @@ class AuthService:
             user=UserResponse.from_orm(user)
         )
 
-    def login(self, login_data: UserLogin) -> TokenResponse:
+    async def login(self, login_data: UserLogin) -> TokenResponse:
         auth_logger.info("Login attempt", {"email": login_data.email})
 
-        user = self.user_repo.get_by_email(login_data.email)
+        user = await self.user_repo.get_by_email(login_data.email)
 
-        if not user or not verify_password(login_data.password, user.password_hash):
+        verified, new_hash = (False, None)
+        if user and user.password_hash:
+            verified, new_hash = await verify_and_update_password_async(login_data.password, user.password_hash)
+
+        if not verified:
             auth_logger.warning("Login failed - invalid credentials", {"email": login_data.email})
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -57,6 +63,12 @@ class AuthService:
                 detail="Account is inactive"
             )
 
+        if new_hash:
+            # Stored hash predates the current scheme or cost; swap it while we have the plaintext
+            auth_logger.info("Upgrading password hash", {"user_id": user.id})
+            async with self.uow:
+                await self.user_repo.update_password_hash(user, new_hash)
+
         auth_logger.debug("Creating access token for user", {"user_id": user.id})
         access_token = create_access_token(data={"sub": user.id})
 
@@ -1,11 +1,12 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-from app.repositories.debate_repository import DebateRepository
-from app.repositories.user_repository import UserRepository
+from app.repositories.pagination import Cursor
+from app.repositories.unit_of_work import AsyncUnitOfWork
 from app.schemas.debate import (
     DebateSessionCreate,
+    DebateSessionUpdate,
     DebateSessionResponse,
     TranscriptCreate,
     TranscriptResponse,
@@ -16,24 +17,16 @@ from app.services.ai_service import AIService
 from app.utils.logger import service_logger
 
 
-class DebateService:
-    def __init__(self, db: Session):
+class AsyncDebateService:
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.debate_repo = DebateRepository(db)
-        self.user_repo = UserRepository(db)
+        self.uow = AsyncUnitOfWork(db)
+        self.debate_repo = self.uow.debates
+        self.user_repo = self.uow.users
         self.ai_service = AIService()
 
-    def create_session(self, user_id: str, session_data: DebateSessionCreate) -> DebateSessionResponse:
-        service_logger.info("Creating debate session in service", {
-            "user_id": user_id,
-            "topic": session_data.topic
-        })
-        session = self.debate_repo.create_session(user_id, session_data)
-        service_logger.debug("Debate session created", {"session_id": session.id})
-        return DebateSessionResponse.from_orm(session)
-
-    def get_session(self, session_id: str, user_id: str) -> DebateSessionResponse:
-        session = self.debate_repo.get_session(session_id)
+    async def _get_owned_session(self, session_id: str, user_id: str):
+        session = await self.debate_repo.get_session(session_id)
 
         if not session:
             raise HTTPException(
@@ -47,46 +40,40 @@ class DebateService:
                 detail="Not authorized to access this session"
             )
 
-        return DebateSessionResponse.from_orm(session)
-
-    def get_user_sessions(self, user_id: str, skip: int = 0, limit: int = 100) -> List[DebateSessionResponse]:
-        sessions = self.debate_repo.get_user_sessions(user_id, skip, limit)
-        return [DebateSessionResponse.from_orm(session) for session in sessions]
+        return session
 
-    def create_transcript(self, user_id: str, transcript_data: TranscriptCreate) -> TranscriptResponse:
-        session = self.debate_repo.get_session(transcript_data.session_id)
+    async def create_session(self, user_id: str, session_data: DebateSessionCreate) -> DebateSessionResponse:
+        service_logger.info("Creating debate session in service", {
+            "user_id": user_id,
+            "topic": session_data.topic
+        })
+        async with self.uow:
+            session = await self.debate_repo.create_session(user_id, session_data)
+            service_logger.debug("Debate session created", {"session_id": session.id})
+        return DebateSessionResponse.from_orm(session)
 
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found"
-            )
+    async def get_session(self, session_id: str, user_id: str) -> DebateSessionResponse:
+        session = await self._get_owned_session(session_id, user_id)
+        return DebateSessionResponse.from_orm(session)
 
-        if session.user_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to access this session"
-            )
+    async def get_user_sessions(
+        self,
+        user_id: str,
+        cursor: Optional[Cursor] = None,
+        limit: int = 100
+    ) -> List[DebateSessionResponse]:
+        sessions = await self.debate_repo.get_user_sessions(user_id, cursor, limit)
+        return [DebateSessionResponse.from_orm(session) for session in sessions]
 
-        transcript = self.debate_repo.create_transcript(transcript_data)
+    async def create_transcript(self, user_id: str, transcript_data: TranscriptCreate) -> TranscriptResponse:
+        await self._get_owned_session(transcript_data.session_id, user_id)
+        async with self.uow:
+            transcript = await self.debate_repo.create_transcript(transcript_data)
         return TranscriptResponse.from_orm(transcript)
 
-    def get_transcripts(self, session_id: str, user_id: str) -> List[TranscriptResponse]:
-        session = self.debate_repo.get_session(session_id)
-
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found"
-            )
-
-        if session.user_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to access this session"
-            )
-
-        transcripts = self.debate_repo.get_session_transcripts(session_id)
+    async def get_transcripts(self, session_id: str, user_id: str) -> List[TranscriptResponse]:
+        await self._get_owned_session(session_id, user_id)
+        transcripts = await self.debate_repo.get_session_transcripts(session_id)
         return [TranscriptResponse.from_orm(transcript) for transcript in transcripts]
 
     async def analyze_debate(self, user_id: str, request: AnalyzeDebateRequest) -> AnalysisResponse:
@@ -96,24 +83,7 @@ class DebateService:
             "transcript_count": len(request.transcripts)
         })
 
-        session = self.debate_repo.get_session(request.session_id)
-
-        if not session:
-            service_logger.warning("Session not found for analysis", {"session_id": request.session_id})
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found"
-            )
-
-        if session.user_id != user_id:
-            service_logger.warning("Unauthorized analysis attempt", {
-                "session_id": request.session_id,
-                "user_id": user_id
-            })
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to access this session"
-            )
+        session = await self._get_owned_session(request.session_id, user_id)
 
         service_logger.debug("Generating AI analysis", {"session_id": request.session_id})
         analysis = await self.ai_service.generate_analysis(
@@ -123,7 +93,6 @@ class DebateService:
         )
 
         service_logger.debug("Updating session with analysis results", {"session_id": request.session_id})
-        from app.schemas.debate import DebateSessionUpdate
         update_data = DebateSessionUpdate(
             status="completed",
             overall_score=analysis.get("overall_score"),
@@ -138,16 +107,17 @@ class DebateService:
             weak_portions=analysis.get("weak_portions", [])
         )
 
-        self.debate_repo.update_session(request.session_id, update_data)
-
         points = int(analysis.get("overall_score", 0) * 10)
         service_logger.info("Updating user points and stats", {
             "user_id": user_id,
             "points_earned": points,
             "overall_score": analysis.get("overall_score")
         })
-        self.user_repo.increment_points(user_id, points)
-        self.user_repo.increment_debates_completed(user_id)
+
+        # Session scores and user stats commit together or not at all
+        async with self.uow:
+            await self.debate_repo.update_session(request.session_id, update_data)
+            await self.user_repo.increment_stats(user_id, points=points, debates_completed=1)
 
         service_logger.info("Debate analysis completed successfully", {"session_id": request.session_id})
         return AnalysisResponse(
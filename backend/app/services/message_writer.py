@@ -0,0 +1,146 @@
+"""
+Write-behind buffer for country-debate messages.
+
+Messages sent within one flush window, whether by concurrent requests or by a
+single batch request, are written with one multi-row INSERT and one commit.
+Flushes run one at a time in arrival order, and rows in a flush get created_at
+values a microsecond apart in the order they were queued.
+
+Readers page and poll by `seq`, which comes from a sequence at insert time.
+Writers on other processes can hold sequence values they have not committed
+yet, so each insert first takes a transaction-scoped advisory lock per debate.
+A debate's messages are therefore numbered and committed one writer at a
+time, and a reader that has seen `seq` n never misses a later commit below it.
+
+If a flush fails, its rows are retried one per transaction, so a bad row only
+fails its own message.
+"""
+from typing import List, Optional, Set, Tuple, Union
+import asyncio
+from sqlalchemy import text
+from sqlalchemy.engine import Row
+from app.config.database import AsyncSessionLocal
+from app.config.settings import settings
+from app.utils.logger import service_logger
+
+COLUMNS = ("debate_id", "user_id", "message", "message_type", "voice_url", "voice_duration_seconds")
+
+
+async def insert_messages(db, messages: List[dict]) -> List[Row]:
+    """Insert `messages` in one statement; rows come back in input order with sender details"""
+    # Held until commit; taken in a fixed order so two batches cannot deadlock
+    for debate_id in sorted({message["debate_id"] for message in messages}):
+        await db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext('country_debate_messages'), hashtext(:debate_id))"),
+            {"debate_id": debate_id}
+        )
+
+    values = []
+    params = {}
+    for i, message in enumerate(messages):
+        placeholders = ", ".join(f":{column}_{i}" for column in COLUMNS)
+        values.append(f"({placeholders}, now() + make_interval(secs => :offset_{i}))")
+        params.update({f"{column}_{i}": message.get(column) for column in COLUMNS})
+        params[f"offset_{i}"] = i / 1_000_000
+
+    query = text(f"""
+        WITH m AS (
+            INSERT INTO country_debate_messages ({", ".join(COLUMNS)}, created_at)
+            VALUES {", ".join(values)}
+            RETURNING id, debate_id, user_id, message, message_type,
+                      voice_url, voice_duration_seconds, created_at, seq
+        )
+        SELECT m.id, m.debate_id, m.user_id, m.message, m.message_type,
+               m.voice_url, m.voice_duration_seconds, m.created_at,
+               u.username, p.country_name, p.country_code
+        FROM m
+        LEFT JOIN users u ON m.user_id = u.id
+        LEFT JOIN country_debate_participants p
+            ON m.debate_id = p.debate_id AND m.user_id = p.user_id
+        ORDER BY m.seq
+    """)
+    return (await db.execute(query, params)).fetchall()
+
+
+class MessageWriter:
+    """Coalesces message writes into one INSERT per `flush_interval` or `max_batch` rows"""
+
+    def __init__(self, max_batch: int, flush_interval: float):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+
+    async def write(self, messages: List[dict]) -> List[Union[Row, Exception]]:
+        """Queue `messages` and wait for them; failures are returned in place, not raised"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for message in messages:
+            future = loop.create_future()
+            self._pending.append((message, future))
+            futures.append(future)
+
+        self._schedule()
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    def _schedule(self) -> None:
+        if len(self._pending) >= self.max_batch or self.flush_interval <= 0:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self._start_flush)
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.create_task(self._flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self) -> None:
+        async with self._lock:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            if self._pending:
+                self._schedule()
+            if not batch:
+                return
+
+            try:
+                async with AsyncSessionLocal() as db:
+                    rows = await insert_messages(db, [message for message, _ in batch])
+                    await db.commit()
+            except Exception as e:
+                service_logger.warning("Message batch failed, retrying individually", {
+                    "size": len(batch),
+                    "error": str(e)
+                })
+                for message, future in batch:
+                    await self._write_one(message, future)
+                return
+
+            for (_, future), row in zip(batch, rows):
+                if not future.done():
+                    future.set_result(row)
+
+    async def _write_one(self, message: dict, future: asyncio.Future) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = await insert_messages(db, [message])
+                await db.commit()
+            if not future.done():
+                future.set_result(rows[0])
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+
+    async def close(self) -> None:
+        """Write out anything still buffered"""
+        if self._pending:
+            self._start_flush()
+        while self._flushes:
+            await asyncio.gather(*self._flushes)
+
+
+message_writer = MessageWriter(settings.MESSAGE_WRITE_BATCH_SIZE, settings.MESSAGE_WRITE_FLUSH_MS / 1000)
@@ -1,23 +1,24 @@
-from sqlalchemy.orm import Session
-from typing import List
-from app.repositories.resource_repository import ResourceRepository
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.repositories.pagination import Cursor
+from app.repositories.resource_repository import AsyncResourceRepository
 from app.schemas.resource import ResourceResponse
 
 
-class ResourceService:
-    def __init__(self, db: Session):
+class AsyncResourceService:
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.resource_repo = ResourceRepository(db)
+        self.resource_repo = AsyncResourceRepository(db)
 
-    def get_all_resources(self, skip: int = 0, limit: int = 100) -> List[ResourceResponse]:
-        resources = self.resource_repo.get_all(skip, limit)
+    async def get_all_resources(self, cursor: Optional[Cursor] = None, limit: int = 100) -> List[ResourceResponse]:
+        resources = await self.resource_repo.get_all(cursor, limit)
         return [ResourceResponse.from_orm(resource) for resource in resources]
 
-    def get_resources_by_category(
+    async def get_resources_by_category(
         self,
         category: str,
-        skip: int = 0,
+        cursor: Optional[Cursor] = None,
         limit: int = 100
     ) -> List[ResourceResponse]:
-        resources = self.resource_repo.get_by_category(category, skip, limit)
+        resources = await self.resource_repo.get_by_category(category, cursor, limit)
         return [ResourceResponse.from_orm(resource) for resource in resources]
@@ -1,4 +1,23 @@
-from .security import verify_password, get_password_hash, create_access_token, decode_token
-from .dependencies import get_current_user
+from .security import (
+    verify_password,
+    get_password_hash,
+    verify_password_async,
+    verify_and_update_password_async,
+    get_password_hash_async,
+    create_access_token,
+    decode_token
+)
+from .dependencies import get_current_principal, get_stream_principal, get_current_user
 
-__all__ = ["verify_password", "get_password_hash", "create_access_token", "decode_token", "get_current_user"]
+__all__ = [
+    "verify_password",
+    "get_password_hash",
+    "verify_password_async",
+    "verify_and_update_password_async",
+    "get_password_hash_async",
+    "create_access_token",
+    "decode_token",
+    "get_current_principal",
+    "get_stream_principal",
+    "get_current_user"
+]
@@ -0,0 +1,152 @@
+"""
+Fan-out of freshly written records to streaming subscribers.
+
+Each API process keeps its subscribers per channel in memory, one bounded
+queue each. Without Redis a publish is delivered straight to those queues.
+With Redis every publish goes through one pub/sub pattern subscription per
+process, so a message written on any worker reaches viewers on all of them.
+
+A subscriber that falls a full queue behind is cut off with a None sentinel
+instead of blocking publishers; the client then reconnects and reloads. If
+the Redis subscription drops, every subscriber gets the sentinel, since
+messages sent meanwhile are lost, and the listener resubscribes with backoff.
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+import asyncio
+import json
+from app.config.settings import settings
+from app.utils.logger import api_logger
+
+
+class Broadcaster:
+    """Per-channel publish/subscribe, in process or across processes via Redis"""
+
+    # Seconds between attempts to resubscribe after losing Redis, doubling up to the max
+    reconnect_delay = 0.5
+    max_reconnect_delay = 30.0
+
+    def __init__(self, queue_size: int, redis_url: Optional[str] = None, prefix: str = "broadcast:"):
+        self.queue_size = queue_size
+        self.prefix = prefix
+        self._redis_url = redis_url
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def start(self) -> None:
+        if self._redis_url is None or self._listener is not None:
+            return
+
+        import redis.asyncio as aioredis
+        self._redis = aioredis.from_url(self._redis_url)
+        pubsub = await self._psubscribe()
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def _psubscribe(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.psubscribe(f"{self.prefix}*")
+        return pubsub
+
+    async def _listen(self, pubsub) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async for item in pubsub.listen():
+                    delay = self.reconnect_delay
+                    if item["type"] != "pmessage":
+                        continue
+                    channel = item["channel"].decode()[len(self.prefix):]
+                    self._deliver(channel, json.loads(item["data"]))
+                error = "subscription closed"
+            except asyncio.CancelledError:
+                await pubsub.aclose()
+                raise
+            except Exception as e:
+                error = str(e)
+
+            # Whatever was published while the subscription was down is lost,
+            # so every viewer on this process has to reload
+            api_logger.error("Broadcast listener lost Redis, reconnecting", {"error": error})
+            self._reset_all()
+            pubsub = await self._resubscribe(pubsub, delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _resubscribe(self, pubsub, delay: float):
+        try:
+            await pubsub.aclose()
+        except Exception:
+            pass
+
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                pubsub = await self._psubscribe()
+            except Exception as e:
+                api_logger.warning("Broadcast listener could not resubscribe", {"error": str(e), "retry_in": delay})
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            api_logger.info("Broadcast listener resubscribed")
+            return pubsub
+
+    async def publish(self, channel: str, message: dict) -> None:
+        if self._redis is not None:
+            await self._redis.publish(f"{self.prefix}{channel}", json.dumps(message, separators=(",", ":")))
+        else:
+            self._deliver(channel, message)
+
+    def _deliver(self, channel: str, message: dict) -> None:
+        for queue in list(self._subscribers.get(channel, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too slow to keep up; drop its backlog and tell it to resync
+                self._cut_off(channel, queue)
+
+    def _cut_off(self, channel: str, queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+        self._subscribers[channel].discard(queue)
+
+    def _reset_all(self) -> None:
+        for channel, queues in list(self._subscribers.items()):
+            for queue in list(queues):
+                self._cut_off(channel, queue)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._subscribers.get(channel, ()))
+
+
+# New country-debate messages, one channel per debate id
+message_broadcaster = Broadcaster(
+    settings.MESSAGE_STREAM_QUEUE_SIZE,
+    redis_url=settings.REDIS_URL if settings.MESSAGE_STREAM_REDIS else None,
+    prefix="country-debate:"
+)
@@ -0,0 +1,63 @@
+"""
+Connection pool metrics for the API's database engines.
+
+Checkout wait is timed by the pools in app.config.pool; pool occupancy is
+sampled on scrape, and pre-ping failures and invalidated connections are
+counted through SQLAlchemy events.
+"""
+from typing import List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from app.config.pool import TimedCheckout
+from app.utils.metrics import registry
+
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+pool_checkout_wait = registry.histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection', ('pool',), POOL_WAIT_BUCKETS
+)
+pool_size = registry.gauge('db_pool_size', 'Configured pool size', ('pool',))
+pool_in_use = registry.gauge('db_pool_connections_in_use', 'Connections checked out of the pool', ('pool',))
+pool_overflow = registry.gauge('db_pool_overflow_connections', 'Connections opened beyond pool_size', ('pool',))
+pre_ping_failures = registry.counter(
+    'db_pool_pre_ping_failures_total', 'Checkouts whose pre-ping found a dead connection', ('pool',)
+)
+pool_invalidations = registry.counter(
+    'db_pool_invalidations_total', 'Connections discarded as invalid', ('pool',)
+)
+
+_engines: List[Engine] = []
+
+
+def _pool_name(engine: Engine) -> str:
+    return engine.pool.logging_name or "default"
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Report metrics for a (sync) engine; pass async_engine.sync_engine for async ones"""
+    name = _pool_name(engine)
+    TimedCheckout.checkout_observer = pool_checkout_wait.observe
+
+    @event.listens_for(engine, "handle_error")
+    def count_pre_ping_failure(context):
+        if getattr(context, "is_pre_ping", False):
+            pre_ping_failures.inc(name)
+
+    @event.listens_for(engine, "invalidate")
+    def count_invalidation(dbapi_connection, connection_record, exception):
+        pool_invalidations.inc(name)
+
+    _engines.append(engine)
+
+
+def sample_pool_gauges() -> None:
+    for engine in _engines:
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+
+        name = _pool_name(engine)
+        pool_size.set(pool.size(), name)
+        pool_in_use.set(pool.checkedout(), name)
+        pool_overflow.set(max(0, pool.overflow()), name)
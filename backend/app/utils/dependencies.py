@@ -1,19 +1,16 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.config.database import get_db
-from app.repositories.user_repository import UserRepository
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config.database import AsyncSessionLocal, get_async_db
+from app.repositories.user_repository import AsyncUserRepository
+from app.schemas.user import Principal
 from app.utils.security import decode_token
 from app.models.user import User
 
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    token = credentials.credentials
+async def _authenticate(token: str, db: AsyncSession) -> Principal:
     payload = decode_token(token)
 
     if payload is None:
@@ -29,19 +26,53 @@ async def get_current_user(
             detail="Invalid authentication credentials"
         )
 
-    user_repo = UserRepository(db)
-    user = user_repo.get_by_id(user_id)
+    user_repo = AsyncUserRepository(db)
+    principal = await user_repo.get_principal(user_id)
 
-    if user is None:
+    if principal is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
 
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user"
         )
 
+    return principal
+
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Authenticate the request; served from the principal cache when warm"""
+    return await _authenticate(credentials.credentials, db)
+
+
+async def get_stream_principal(
+    token: str = Query(..., description="Access token; EventSource cannot send an Authorization header")
+) -> Principal:
+    """Authenticate a server-sent events request from its token query parameter"""
+    # Own short session: a request-scoped one would hold a connection for the whole stream
+    async with AsyncSessionLocal() as db:
+        return await _authenticate(token, db)
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """The full user row, for routes that need more than the principal"""
+    user_repo = AsyncUserRepository(db)
+    user = await user_repo.get_by_id(principal.id)
+
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+
     return user
@@ -0,0 +1,37 @@
+"""
+Bounded thread pool for CPU-heavy calls made from async handlers.
+
+Work runs off the event loop in a fixed number of threads. Calls beyond the
+workers plus a fixed queue are refused straight away with PoolSaturated, so a
+burst turns into fast rejections instead of an ever-growing backlog.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+import asyncio
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """Thread pool that refuses work beyond `workers + max_queue` outstanding calls"""
+
+    def __init__(self, workers: int, max_queue: int, name: str):
+        self.capacity = workers + max_queue
+        self.outstanding = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        # Only touched from the event loop thread, so a plain counter is enough
+        if self.outstanding >= self.capacity:
+            raise PoolSaturated()
+
+        self.outstanding += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.outstanding -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -4,7 +4,9 @@ Provides structured logging with context and different log levels.
 """
 import logging
 import json
+import queue
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Dict, Optional
 import sys
 
@@ -46,6 +48,13 @@ class StructuredLogger:
             console_handler.setFormatter(formatter)
             self.logger.addHandler(console_handler)
 
+    def set_level(self, level: str):
+        """Change the minimum level this logger emits"""
+        self.logger.setLevel(level.upper())
+
+    def is_enabled_for(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
     def _format_message(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Format message with optional context"""
         if context:
@@ -53,25 +62,79 @@ class StructuredLogger:
             return f"{message} | Context: {context_str}"
         return message
 
+    def log(self, level: int, message: str, context: Optional[Dict[str, Any]] = None):
+        """Log message at a numeric level"""
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, self._format_message(message, context))
+
     def debug(self, message: str, context: Optional[Dict[str, Any]] = None):
         """Log debug message"""
-        self.logger.debug(self._format_message(message, context))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(self._format_message(message, context))
 
     def info(self, message: str, context: Optional[Dict[str, Any]] = None):
         """Log info message"""
-        self.logger.info(self._format_message(message, context))
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(self._format_message(message, context))
 
     def warning(self, message: str, context: Optional[Dict[str, Any]] = None):
         """Log warning message"""
-        self.logger.warning(self._format_message(message, context))
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning(self._format_message(message, context))
 
     def error(self, message: str, context: Optional[Dict[str, Any]] = None, exc_info: bool = False):
         """Log error message"""
-        self.logger.error(self._format_message(message, context), exc_info=exc_info)
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.error(self._format_message(message, context), exc_info=exc_info)
 
     def critical(self, message: str, context: Optional[Dict[str, Any]] = None, exc_info: bool = False):
         """Log critical message"""
-        self.logger.critical(self._format_message(message, context), exc_info=exc_info)
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self.logger.critical(self._format_message(message, context), exc_info=exc_info)
+
+
+class SampledLogger:
+    """Logs one in every `every` messages per key, for high-frequency events"""
+
+    def __init__(self, logger: StructuredLogger, every: int = 100, level: int = logging.DEBUG):
+        self.logger = logger
+        self.every = max(1, every)
+        self.level = level
+        self._counts: Dict[str, int] = {}
+
+    def log(self, key: str, message: str, context: Optional[Dict[str, Any]] = None):
+        """Log a sampled message, noting how many of this key have been seen"""
+        if not self.logger.is_enabled_for(self.level):
+            return
+
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        if count % self.every != 1 and self.every != 1:
+            return
+
+        context = dict(context or {}, seen=count, sample_every=self.every)
+        self.logger.log(self.level, message, context)
+
+
+def enable_queue_logging(*loggers: StructuredLogger) -> QueueListener:
+    """
+    Move the given loggers' handlers behind a QueueHandler.
+
+    Callers only enqueue records; a background thread does the formatting
+    and stream writes, so logging never blocks an event loop on stdout.
+    Returns the started listener; call stop() on shutdown to drain it.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handlers = []
+    for structured in loggers:
+        for handler in structured.logger.handlers:
+            if handler not in handlers:
+                handlers.append(handler)
+        structured.logger.handlers = [QueueHandler(log_queue)]
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
 
 
 # Pre-configured loggers for different parts of the application
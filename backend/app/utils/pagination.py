@@ -0,0 +1,30 @@
+from fastapi import HTTPException, Query, Response, status
+from typing import Optional, Sequence
+from app.repositories.pagination import Cursor, decode_cursor, encode_cursor
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Largest page a list endpoint serves, so a single request cannot pull a whole table
+MAX_PAGE_SIZE = 1000
+
+
+def get_cursor(
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header")
+) -> Optional[Cursor]:
+    if cursor is None:
+        return None
+
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def set_next_cursor(response: Response, items: Sequence, limit: int) -> None:
+    """Point the client at the next page when this one came back full"""
+    if items and len(items) >= limit:
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
@@ -1,10 +1,80 @@
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
+from typing import Any, Callable, Optional, Tuple
+import hashlib
+import time
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from app.config.cache import TTLCache
 from app.config.settings import settings
+from app.utils.executor import BoundedExecutor, PoolSaturated
+from app.utils.metrics import registry
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _build_password_context() -> CryptContext:
+    # The configured scheme signs new hashes; the other still verifies old ones.
+    # Pinning min/max rounds to the target makes any other bcrypt cost count
+    # as outdated, so both raising and lowering it rehash on next login.
+    schemes = ["argon2", "bcrypt"] if settings.PASSWORD_HASH_SCHEME == "argon2" else ["bcrypt", "argon2"]
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+        argon2__time_cost=settings.ARGON2_TIME_COST,
+        argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.ARGON2_PARALLELISM
+    )
+
+
+pwd_context = _build_password_context()
+
+# bcrypt costs a few hundred ms of CPU per call, so it never runs on the event loop
+password_executor = BoundedExecutor(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_QUEUE,
+    name="password-hash"
+)
+
+password_hash_duration = registry.histogram(
+    'password_hash_duration_seconds',
+    'Time to hash or verify a password, including queueing',
+    ('operation',),
+    (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+password_hash_rejected = registry.counter(
+    'password_hash_rejected_total', 'Password operations refused because the hashing pool was full', ('operation',)
+)
+password_hash_outstanding = registry.gauge(
+    'password_hash_outstanding', 'Password operations running or queued'
+)
+
+# Verified claims keyed by token digest; a cached token is still rejected once it expires
+_token_cache = TTLCache(settings.TOKEN_CACHE_MAX_SIZE, settings.TOKEN_CACHE_TTL_SECONDS)
+
+if settings.JWT_BACKEND == "pyjwt":
+    import jwt as pyjwt
+
+    def _encode(claims: dict) -> str:
+        return pyjwt.encode(claims, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+    def _decode(token: str) -> Optional[dict]:
+        try:
+            return pyjwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        except pyjwt.PyJWTError:
+            return None
+else:
+    from jose import JWTError, jwt
+
+    def _encode(claims: dict) -> str:
+        return jwt.encode(claims, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+    def _decode(token: str) -> Optional[dict]:
+        try:
+            return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        except JWTError:
+            return None
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -15,6 +85,39 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_password_task(operation: str, fn: Callable[..., Any], *args) -> Any:
+    started = time.perf_counter()
+    try:
+        password_hash_outstanding.set(password_executor.outstanding + 1)
+        return await password_executor.run(fn, *args)
+    except PoolSaturated:
+        password_hash_rejected.inc(operation)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many sign-in attempts, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    finally:
+        password_hash_outstanding.set(password_executor.outstanding)
+        password_hash_duration.observe(time.perf_counter() - started, operation)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_task("verify", pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if the stored one uses an outdated policy"""
+    return await _run_password_task("verify", pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_task("hash", pwd_context.hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -23,13 +126,26 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    encoded_jwt = _encode(to_encode)
     return encoded_jwt
 
 
 def decode_token(token: str) -> Optional[dict]:
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload
-    except JWTError:
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+
+    payload = _token_cache.get(key)
+    if payload is not None:
+        if payload.get("exp", now + 1) > now:
+            return dict(payload)
+        _token_cache.delete(key)
         return None
+
+    payload = _decode(token)
+    if payload is None:
+        return None
+
+    ttl = min(settings.TOKEN_CACHE_TTL_SECONDS, payload.get("exp", float("inf")) - now)
+    if ttl > 0:
+        _token_cache.set(key, payload, ttl=ttl)
+    return dict(payload)
@@ -0,0 +1,96 @@
+"""
+State handoff between signaling server processes on deploy.
+
+A draining server gives every waiting user and room member a resume token
+and saves what it needs to put them back: profile, original enqueue time and
+room id. The next process restores them when they reconnect with the token,
+as long as they come back within the handoff window.
+
+FileHandoffStore keeps the snapshot in one compact JSON file for a single
+worker. RedisHandoffStore keeps one expiring key per token, so any worker on
+any node can claim it.
+"""
+from typing import Dict, List, Optional
+import json
+import os
+import time
+from app.utils.logger import websocket_logger
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(',', ':'))
+
+
+class FileHandoffStore:
+    """Snapshot written to `path` on drain and read back on startup"""
+
+    def __init__(self, path: str, window: float):
+        self.path = path
+        self.window = window
+        self._entries: Dict[str, Dict] = {}
+        self._deadline = 0.0
+
+    async def save(self, entries: List[Dict]) -> None:
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(_dumps({'taken_at': time.time(), 'entries': entries}))
+        os.replace(tmp_path, self.path)
+
+    async def load(self) -> int:
+        """Read and remove a snapshot left by the previous process"""
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+            deadline = snapshot['taken_at'] + self.window
+            entries = {entry['token']: entry for entry in snapshot['entries']}
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # A torn or corrupt snapshot only costs its users their place; the worker still starts
+            websocket_logger.error("Discarding unreadable handoff snapshot", {"path": self.path, "error": str(e)})
+            return 0
+        finally:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+        if time.time() >= deadline:
+            return 0
+
+        self._deadline = deadline
+        self._entries = entries
+        return len(self._entries)
+
+    async def claim(self, token: str) -> Optional[Dict]:
+        if time.time() >= self._deadline:
+            self._entries.clear()
+            return None
+        return self._entries.pop(token, None)
+
+
+class RedisHandoffStore:
+    """One key per resume token, expiring with the handoff window"""
+
+    def __init__(self, redis, window: float, prefix: str = 'signaling:'):
+        self.redis = redis
+        self.window = window
+        self.prefix = prefix
+
+    async def save(self, entries: List[Dict]) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for entry in entries:
+                pipe.set(f"{self.prefix}handoff:{entry['token']}", _dumps(entry), px=int(self.window * 1000))
+            await pipe.execute()
+
+    async def load(self) -> int:
+        # Entries stay in Redis until claimed or expired
+        return 0
+
+    async def claim(self, token: str) -> Optional[Dict]:
+        key = f'{self.prefix}handoff:{token}'
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.get(key)
+            pipe.delete(key)
+            value, _ = await pipe.execute()
+        return json.loads(value) if value else None
@@ -0,0 +1,82 @@
+"""
+ICE candidate coalescing for the signaling server.
+
+A peer trickles dozens of ICE candidates during call setup. IceCoalescer
+buffers them per sender for a short window (or until the end-of-candidates
+marker) and hands them to a flush callback as one batch, so the partner gets
+a single `ice_candidates` packet instead of one packet per candidate.
+"""
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+
+
+class _Buffer:
+    __slots__ = ('target', 'candidates', 'timer')
+
+    def __init__(self, target: str):
+        self.target = target
+        self.candidates: List = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class IceCoalescer:
+    """
+    Per-sender candidate buffers flushed after `window` seconds.
+
+    Callers only add candidates for targets that understand `ice_candidates`.
+    A sender's buffer is registered before anything is awaited, so candidates
+    that arrive concurrently always land in the same buffer.
+    """
+
+    def __init__(self, window: float, flush: Callable[[str, str, List, bool], Awaitable[None]]):
+        self.window = window
+        self._flush = flush
+        self._buffers: Dict[str, _Buffer] = {}
+
+    async def add(self, sender: str, target: str, candidate) -> None:
+        """Buffer a candidate for target"""
+        stale = None
+        buffer = self._buffers.get(sender)
+        if buffer is not None and buffer.target != target:
+            stale, buffer = buffer, None
+
+        if buffer is None:
+            buffer = self._buffers[sender] = _Buffer(target)
+
+        # A null or empty candidate is the end-of-candidates marker
+        complete = not candidate or (isinstance(candidate, dict) and not candidate.get('candidate'))
+        if complete:
+            del self._buffers[sender]
+        else:
+            buffer.candidates.append(candidate)
+            if buffer.timer is None:
+                loop = asyncio.get_running_loop()
+                buffer.timer = loop.call_later(self.window, self._expire, sender, buffer)
+
+        if stale is not None:
+            await self._send(sender, stale)
+        if complete:
+            await self._send(sender, buffer, complete=True)
+
+    async def flush(self, sender: str, complete: bool = False) -> None:
+        buffer = self._buffers.pop(sender, None)
+        if buffer is not None:
+            await self._send(sender, buffer, complete)
+
+    def discard(self, sender: str) -> None:
+        """Drop anything buffered for a sender that went away"""
+        buffer = self._buffers.pop(sender, None)
+        if buffer is not None and buffer.timer is not None:
+            buffer.timer.cancel()
+
+    def _expire(self, sender: str, buffer: _Buffer) -> None:
+        # The timer belongs to one buffer; a sender may have started another since
+        if self._buffers.get(sender) is buffer:
+            del self._buffers[sender]
+            asyncio.ensure_future(self._send(sender, buffer))
+
+    async def _send(self, sender: str, buffer: _Buffer, complete: bool = False) -> None:
+        if buffer.timer is not None:
+            buffer.timer.cancel()
+        if buffer.candidates or complete:
+            await self._flush(sender, buffer.target, buffer.candidates, complete)
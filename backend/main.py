@@ -6,7 +6,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from database import get_db, engine, Base
 from models import User, DebateSession, DebateTranscript, Payment, Notification, Resource
-from auth import get_password_hash, verify_password, create_access_token, get_current_user
+from auth import get_password_hash_async, verify_and_update_password_async, create_access_token, get_current_user
 from ai_analysis import generate_ai_analysis
 
 Base.metadata.create_all(bind=engine)
@@ -62,7 +62,7 @@ async def sign_up(request: SignUpRequest, db: Session = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = get_password_hash(request.password)
+    hashed_password = await get_password_hash_async(request.password)
     new_user = User(
         email=request.email,
         password_hash=hashed_password,
@@ -97,9 +97,16 @@ async def sign_up(request: SignUpRequest, db: Session = Depends(get_db)):
 @app.post("/auth/signin")
 async def sign_in(request: SignInRequest, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == request.email).first()
-    if not user or not verify_password(request.password, user.password_hash):
+    verified, new_hash = (False, None)
+    if user and user.password_hash:
+        verified, new_hash = await verify_and_update_password_async(request.password, user.password_hash)
+    if not verified:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+
     access_token = create_access_token(data={"sub": user.id})
 
     return {
@@ -335,8 +342,11 @@ async def analyze_debate(
     session.status = "completed"
     session.completed_at = datetime.utcnow()
 
-    current_user.debates_completed += 1
-    current_user.points += int(analysis.get("overall_score", 0) * 10)
+    # Add in the database so concurrent analyses can't overwrite each other's totals
+    db.query(User).filter(User.id == current_user.id).update({
+        User.debates_completed: User.debates_completed + 1,
+        User.points: User.points + int(analysis.get("overall_score", 0) * 10)
+    }, synchronize_session=False)
 
     db.commit()
 
@@ -0,0 +1,188 @@
+"""
+Matchmaking queues for the signaling server.
+
+Waiting peers are kept in one FIFO queue per topic plus a sid -> topic index,
+so enqueue, dequeue and cancel are O(1) no matter how many users are waiting
+on other topics.
+
+BatchMatcher pairs a whole topic pool at once on a periodic tick instead of
+pairing eagerly, preferring partners of similar skill and relaxing that
+preference the longer someone has waited.
+"""
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+import heapq
+import time
+from signaling_models import Peer
+
+
+class MatchQueue:
+    """Per-topic FIFO queues of waiting peers, indexed by sid"""
+
+    def __init__(self):
+        self._queues: Dict[str, "OrderedDict[str, Peer]"] = {}
+        self._topics: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._topics)
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self._topics
+
+    def topics(self) -> List[str]:
+        """Topics with at least one waiting user"""
+        return list(self._queues)
+
+    def topic_of(self, sid: str) -> Optional[str]:
+        """Topic a sid is waiting on, if any"""
+        return self._topics.get(sid)
+
+    def depth(self, topic: str) -> int:
+        """Number of users waiting on a topic"""
+        return len(self._queues.get(topic, ()))
+
+    def enqueue(self, peer: Peer, enqueued_at: Optional[float] = None) -> None:
+        """
+        Append a peer to the back of the queue for their topic.
+
+        A peer restored with its original `enqueued_at` is placed ahead of
+        everyone who joined after it instead of at the back.
+        """
+        self.remove(peer.sid)
+
+        queue = self._queues.get(peer.topic)
+        if queue is None:
+            queue = self._queues[peer.topic] = OrderedDict()
+
+        peer.enqueued_at = time.time() if enqueued_at is None else enqueued_at
+        queue[peer.sid] = peer
+        self._topics[peer.sid] = peer.topic
+
+        if enqueued_at is not None:
+            newer = []
+            for sid, other in islice(reversed(queue.items()), 1, None):
+                if other.enqueued_at <= enqueued_at:
+                    break
+                newer.append(sid)
+            for sid in reversed(newer):
+                queue.move_to_end(sid)
+
+    def pop(self, topic: str) -> Optional[Peer]:
+        """Take the longest-waiting peer off a topic queue"""
+        queue = self._queues.get(topic)
+        if not queue:
+            return None
+
+        sid, peer = queue.popitem(last=False)
+        del self._topics[sid]
+        if not queue:
+            del self._queues[topic]
+        return peer
+
+    def peek(self, topic: str, limit: int) -> List[Peer]:
+        """The `limit` longest-waiting peers on a topic, oldest first"""
+        return list(islice(self._queues.get(topic, {}).values(), limit))
+
+    def remove(self, sid: str) -> Optional[Peer]:
+        """Drop a peer from whichever queue they are in"""
+        topic = self._topics.pop(sid, None)
+        if topic is None:
+            return None
+
+        queue = self._queues[topic]
+        peer = queue.pop(sid)
+        if not queue:
+            del self._queues[topic]
+        return peer
+
+
+class MatchmakingStats:
+    """Rolling time-to-match samples and tick timings"""
+
+    def __init__(self, window: int = 1024):
+        self.wait_times = deque(maxlen=window)
+        self.last_tick_duration = 0.0
+        self.max_tick_duration = 0.0
+        self.matches = 0
+
+    def record_match(self, *wait_seconds: float) -> None:
+        self.matches += 1
+        self.wait_times.extend(wait_seconds)
+
+    def record_tick(self, duration: float) -> None:
+        self.last_tick_duration = duration
+        self.max_tick_duration = max(self.max_tick_duration, duration)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.wait_times:
+            return 0.0
+        ordered = sorted(self.wait_times)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self, queue_depths: Dict[str, int]) -> Dict:
+        return {
+            'queue_depth': sum(queue_depths.values()),
+            'queue_depth_by_topic': queue_depths,
+            'matches': self.matches,
+            'time_to_match_p50': round(self.percentile(0.50), 3),
+            'time_to_match_p99': round(self.percentile(0.99), 3),
+            'last_tick_duration': round(self.last_tick_duration, 6),
+            'max_tick_duration': round(self.max_tick_duration, 6)
+        }
+
+
+def skill_rating(peer: Peer) -> float:
+    """Single skill axis: level, with points breaking ties inside a level"""
+    return peer.level + peer.points / 1000
+
+
+class BatchMatcher:
+    """
+    Greedy skill/wait-aware pairing of a topic pool.
+
+    The pool is sorted by skill and only neighbours in that order are
+    considered, which keeps each pass at O(n log n). Two users may be paired
+    when their skill gap is within the larger of their tolerances, where a
+    user's tolerance grows linearly with time spent waiting. Among allowed
+    pairs, the cheapest (smallest gap, longest combined wait) go first.
+    """
+
+    def __init__(
+        self,
+        base_tolerance: float = 1.0,
+        tolerance_per_second: float = 0.2,
+        wait_weight: float = 0.05,
+        max_pool: int = 5000
+    ):
+        self.base_tolerance = base_tolerance
+        self.tolerance_per_second = tolerance_per_second
+        self.wait_weight = wait_weight
+        self.max_pool = max_pool
+
+    def tolerance(self, peer: Peer, now: float) -> float:
+        return self.base_tolerance + self.tolerance_per_second * (now - peer.enqueued_at)
+
+    def pair(self, pool: List[Peer], now: float) -> List[Tuple[Peer, Peer]]:
+        """Pair peers from a topic pool"""
+        ranked = sorted(pool, key=skill_rating)
+
+        candidates = []
+        for i in range(len(ranked) - 1):
+            left, right = ranked[i], ranked[i + 1]
+            gap = skill_rating(right) - skill_rating(left)
+            if gap > max(self.tolerance(left, now), self.tolerance(right, now)):
+                continue
+
+            waited = (now - left.enqueued_at) + (now - right.enqueued_at)
+            heapq.heappush(candidates, (gap - self.wait_weight * waited, i))
+
+        paired = set()
+        pairs = []
+        while candidates:
+            _, i = heapq.heappop(candidates)
+            if i in paired or i + 1 in paired:
+                continue
+            paired.update((i, i + 1))
+            pairs.append((ranked[i], ranked[i + 1]))
+        return pairs
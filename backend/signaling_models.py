@@ -0,0 +1,91 @@
+"""
+Compact per-connection records for the signaling server.
+
+Each connected sid has one Peer holding its profile, queue position and room,
+and each match has one Room. Both use __slots__ so no per-instance __dict__
+is allocated, and topic strings are interned so every peer waiting on a topic
+shares a single copy of its name.
+"""
+from typing import Any, List, Optional
+import sys
+
+
+class InvalidPayload(ValueError):
+    """A client event whose fields have the wrong type"""
+
+
+class Peer:
+    """A connected client and its matchmaking details"""
+
+    __slots__ = ('sid', 'email', 'topic', 'level', 'points', 'ice_batch', 'enqueued_at', 'room')
+
+    def __init__(
+        self,
+        sid: str,
+        email: str = 'Anonymous',
+        topic: str = 'general',
+        level: int = 1,
+        points: int = 0,
+        ice_batch: bool = False
+    ):
+        self.sid = sid
+        self.email = email
+        self.topic = sys.intern(topic)
+        self.level = level
+        self.points = points
+        self.ice_batch = ice_batch
+        self.enqueued_at = 0.0
+        self.room: Optional['Room'] = None
+
+    def __repr__(self):
+        return f"<Peer {self.sid} - {self.topic}>"
+
+
+class Room:
+    """A matched pair; `ready` once the second member has accepted"""
+
+    __slots__ = ('id', 'members', 'initiator', 'ready')
+
+    def __init__(self, room_id: str, members: List[str], initiator: str):
+        self.id = room_id
+        self.members = members
+        self.initiator = initiator
+        self.ready = False
+
+    def __repr__(self):
+        return f"<Room {self.id} - {'ready' if self.ready else 'pending'}>"
+
+
+def _whole_number(data: dict, field: str, default: int) -> int:
+    value = data.get(field)
+    if not value:
+        return default
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    raise InvalidPayload(f"{field} must be a whole number")
+
+
+def find_match_peer(sid: str, data: Any) -> Peer:
+    """The Peer a find_match payload describes; raises InvalidPayload for malformed fields"""
+    if not isinstance(data, dict):
+        raise InvalidPayload("payload must be an object")
+
+    topic = data.get('topic', 'general')
+    if not isinstance(topic, str):
+        raise InvalidPayload("topic must be a string")
+
+    return Peer(
+        sid,
+        data.get('email', 'Anonymous'),
+        topic,
+        _whole_number(data, 'level', 1),
+        _whole_number(data, 'points', 0),
+        bool(data.get('iceBatch'))
+    )
@@ -0,0 +1,656 @@
+"""
+Matchmaking and room state for the signaling server.
+
+LocalSignalingState keeps everything in process-local dicts, which is enough
+for a single worker. RedisSignalingState keeps the same state in Redis so that
+several workers (or nodes) share one matchmaking pool; multi-key updates run
+as Lua scripts so concurrent workers never see a half-applied change.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import time
+import uuid
+from matchmaking import MatchQueue
+from signaling_models import Peer, Room
+
+
+class LocalSignalingState:
+    """In-process state for a single signaling worker"""
+
+    def __init__(self):
+        self.match_queue = MatchQueue()
+        self.peers: Dict[str, Peer] = {}
+        self.rooms: Dict[str, Room] = {}
+        self.pending_rooms: Set[str] = set()
+        self.offers: Set[Tuple[str, str]] = set()
+
+    def _peer(self, sid: str) -> Peer:
+        peer = self.peers.get(sid)
+        if peer is None:
+            peer = self.peers[sid] = Peer(sid)
+        return peer
+
+    async def set_user(self, peer: Peer) -> Peer:
+        """Store a peer's details, returning the record handlers should use"""
+        current = self.peers.get(peer.sid)
+        if current is None:
+            self.peers[peer.sid] = peer
+            return peer
+
+        # Updated in place so an open room keeps pointing at the same record
+        current.email = peer.email
+        current.topic = peer.topic
+        current.level = peer.level
+        current.points = peer.points
+        current.ice_batch = peer.ice_batch
+        return current
+
+    async def get_user(self, sid: str) -> Optional[Peer]:
+        return self.peers.get(sid)
+
+    async def drop_user(self, sid: str) -> None:
+        self.peers.pop(sid, None)
+
+    async def touch(self, sids: Iterable[str]) -> None:
+        pass
+
+    async def enqueue(self, peer: Peer, enqueued_at: Optional[float] = None) -> None:
+        self.match_queue.enqueue(peer, enqueued_at)
+
+    async def pop_waiting(self, topic: str) -> Optional[Peer]:
+        return self.match_queue.pop(topic)
+
+    async def match_or_enqueue(self, peer: Peer) -> Optional[Peer]:
+        """Take the longest-waiting peer on peer's topic, or queue peer if there is none"""
+        match = self.match_queue.pop(peer.topic)
+        if match is None:
+            self.match_queue.enqueue(peer)
+        return match
+
+    async def remove_waiting(self, sid: str) -> bool:
+        return self.match_queue.remove(sid) is not None
+
+    async def queue_depths(self) -> Dict[str, int]:
+        return {topic: self.match_queue.depth(topic) for topic in self.match_queue.topics()}
+
+    async def waiting_pool(self, topic: str, limit: int) -> List[Peer]:
+        return self.match_queue.peek(topic, limit)
+
+    async def claim_pair(self, sid: str, partner_sid: str) -> bool:
+        """Take both users off the queue, but only if both still wait on one topic"""
+        topic = self.match_queue.topic_of(sid)
+        if topic is None or self.match_queue.topic_of(partner_sid) != topic:
+            return False
+        self.match_queue.remove(sid)
+        self.match_queue.remove(partner_sid)
+        return True
+
+    async def acquire_tick(self, lease_ms: int) -> Optional[str]:
+        return 'local'
+
+    async def release_tick(self, token: str, hold_ms: int) -> None:
+        pass
+
+    async def counts(self) -> Dict[str, int]:
+        return {
+            'waiting_users': len(self.match_queue),
+            'rooms': len(self.rooms),
+            'pending_acceptances': len(self.pending_rooms)
+        }
+
+    async def accept(self, sid: str, partner_sid: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Record that sid accepted a match with partner_sid.
+
+        Returns the room id and, once both sides have accepted, the sid of the
+        first acceptor (the WebRTC initiator); otherwise None. Returns None
+        instead of a tuple if the offer is no longer open, because it expired,
+        was rejected or was already taken up by both sides.
+        """
+        key = offer_key(sid, partner_sid)
+        if key not in self.offers:
+            return None
+
+        own = self._room_of(sid)
+        if own is not None and not own.ready and partner_sid in own.members:
+            # A repeated accept before the partner answers
+            return own.id, None
+
+        partner = self.peers.get(partner_sid)
+        room = partner.room if partner is not None else None
+        if room is not None and not room.ready and sid in room.members:
+            room.ready = True
+            self.pending_rooms.discard(room.id)
+            self.offers.discard(key)
+            self._peer(sid).room = room
+            return room.id, room.initiator
+
+        room = Room(str(uuid.uuid4()), [sid, partner_sid], sid)
+        self.rooms[room.id] = room
+        self.pending_rooms.add(room.id)
+        self._peer(sid).room = room
+        return room.id, None
+
+    async def open_offer(self, sid: str, partner_sid: str, ttl: float) -> None:
+        self.offers.add(offer_key(sid, partner_sid))
+
+    async def close_offer(self, sid: str, partner_sid: str) -> bool:
+        """Mark an offer as answered; False if it was already closed"""
+        key = offer_key(sid, partner_sid)
+        if key not in self.offers:
+            return False
+        self.offers.discard(key)
+        return True
+
+    async def expire_offer(self, sid: str, partner_sid: str) -> Optional[List[str]]:
+        """
+        Tear down a match offer that was not answered in time.
+
+        Returns the sids that had already accepted (and are left without a
+        room), or None if the offer was already accepted or rejected.
+        """
+        if not await self.close_offer(sid, partner_sid):
+            return None
+
+        room = self._room_of(sid) or self._room_of(partner_sid)
+        if room is None or room.ready:
+            return []
+
+        self._close_room(room)
+        return [room.initiator]
+
+    async def peer_of(self, sid: str) -> Optional[str]:
+        """The other member of sid's room, if any"""
+        room = self._room_of(sid)
+        if room is None:
+            return None
+
+        for member in room.members:
+            if member != sid:
+                return member
+        return None
+
+    async def leave_room(self, sid: str) -> Optional[Tuple[str, List[str]]]:
+        """Remove sid from its room, returning the room id and remaining members"""
+        room = self._room_of(sid)
+        if room is None:
+            return None
+
+        self.peers[sid].room = None
+        if sid in room.members:
+            room.members.remove(sid)
+        remaining = list(room.members)
+
+        # A half-accepted room is abandoned once its only acceptor leaves
+        if not room.members or (not room.ready and room.initiator == sid):
+            self._close_room(room)
+
+        return room.id, remaining
+
+    async def detach(self, sid: str) -> Optional[Dict]:
+        """
+        Take sid out of the queue and its room for a handoff.
+
+        Returns its original enqueue time if it was waiting and its room id
+        if it was in a fully accepted room. Half-accepted rooms are dropped.
+        """
+        peer = self.peers.get(sid)
+        if peer is None:
+            return None
+
+        waiting = self.match_queue.remove(sid) is not None
+        room = peer.room
+        if room is not None:
+            peer.room = None
+            if sid in room.members:
+                room.members.remove(sid)
+            if not room.ready or not room.members:
+                self._close_room(room)
+
+        return {
+            'enqueued_at': peer.enqueued_at if waiting else None,
+            'room': room.id if room is not None and room.ready else None
+        }
+
+    async def restore_room(self, room_id: str, sid: str) -> None:
+        """Put a resumed sid back into a room, recreating it if needed"""
+        room = self.rooms.get(room_id)
+        if room is None:
+            room = self.rooms[room_id] = Room(room_id, [], sid)
+            room.ready = True
+
+        if sid not in room.members:
+            room.members.append(sid)
+        self._peer(sid).room = room
+
+    def _room_of(self, sid: str) -> Optional[Room]:
+        peer = self.peers.get(sid)
+        return peer.room if peer is not None else None
+
+    def _close_room(self, room: Room) -> None:
+        self.rooms.pop(room.id, None)
+        self.pending_rooms.discard(room.id)
+        for member in room.members:
+            peer = self.peers.get(member)
+            if peer is not None and peer.room is room:
+                peer.room = None
+
+
+# Queues are sorted sets scored by enqueue time, so ZPOPMIN is FIFO and the
+# score doubles as the wait-time origin for the batch matcher
+_ENQUEUE = """
+local prefix, sid, topic, now = ARGV[1], ARGV[2], ARGV[3], ARGV[4]
+local old = redis.call('HGET', prefix .. 'waiting', sid)
+if old then
+    redis.call('ZREM', prefix .. 'queue:' .. old, sid)
+    if redis.call('ZCARD', prefix .. 'queue:' .. old) == 0 then
+        redis.call('SREM', prefix .. 'topics', old)
+    end
+end
+redis.call('ZADD', prefix .. 'queue:' .. topic, now, sid)
+redis.call('HSET', prefix .. 'waiting', sid, topic)
+redis.call('SADD', prefix .. 'topics', topic)
+"""
+
+_POP_WAITING = """
+local prefix, topic = ARGV[1], ARGV[2]
+local popped = redis.call('ZPOPMIN', prefix .. 'queue:' .. topic)
+if #popped == 0 then
+    return false
+end
+local sid = popped[1]
+redis.call('HDEL', prefix .. 'waiting', sid)
+if redis.call('ZCARD', prefix .. 'queue:' .. topic) == 0 then
+    redis.call('SREM', prefix .. 'topics', topic)
+end
+return {sid, popped[2]}
+"""
+
+# Popping and enqueueing in one script keeps two users who arrive at once on
+# different workers from both finding the queue empty and both waiting
+_MATCH_OR_ENQUEUE = """
+local prefix, sid, topic, now = ARGV[1], ARGV[2], ARGV[3], ARGV[4]
+local queue_key = prefix .. 'queue:' .. topic
+while true do
+    local popped = redis.call('ZPOPMIN', queue_key)
+    if #popped == 0 then
+        break
+    end
+    redis.call('HDEL', prefix .. 'waiting', popped[1])
+    -- Users whose record expired belonged to a worker that went away
+    if popped[1] ~= sid and redis.call('EXISTS', prefix .. 'user:' .. popped[1]) == 1 then
+        if redis.call('ZCARD', queue_key) == 0 then
+            redis.call('SREM', prefix .. 'topics', topic)
+        end
+        return popped
+    end
+end
+redis.call('ZADD', queue_key, now, sid)
+redis.call('HSET', prefix .. 'waiting', sid, topic)
+redis.call('SADD', prefix .. 'topics', topic)
+return false
+"""
+
+_REMOVE_WAITING = """
+local prefix = ARGV[1]
+local topic = redis.call('HGET', prefix .. 'waiting', ARGV[2])
+if not topic then
+    return 0
+end
+for i = 2, #ARGV do
+    if redis.call('HGET', prefix .. 'waiting', ARGV[i]) ~= topic then
+        return 0
+    end
+end
+for i = 2, #ARGV do
+    redis.call('HDEL', prefix .. 'waiting', ARGV[i])
+    redis.call('ZREM', prefix .. 'queue:' .. topic, ARGV[i])
+end
+if redis.call('ZCARD', prefix .. 'queue:' .. topic) == 0 then
+    redis.call('SREM', prefix .. 'topics', topic)
+end
+return 1
+"""
+
+# Only the holder may release the tick lock; it keeps it for the rest of the
+# interval so the next tick does not start early on another worker
+_RELEASE_TICK = """
+local key, token, hold = ARGV[1], ARGV[2], tonumber(ARGV[3])
+if redis.call('GET', key) ~= token then
+    return 0
+end
+if hold > 0 then
+    redis.call('PEXPIRE', key, hold)
+else
+    redis.call('DEL', key)
+end
+return 1
+"""
+
+# Accepting needs the offer to still be open; the second acceptance closes it
+_ACCEPT = """
+local prefix, sid, partner, new_room, offer = ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5]
+if redis.call('EXISTS', prefix .. 'offer:' .. offer) == 0 then
+    return false
+end
+local own = redis.call('HGET', prefix .. 'user_rooms', sid)
+if own and redis.call('GET', prefix .. 'pending:' .. own) == sid
+        and redis.call('SISMEMBER', prefix .. 'room:' .. own, partner) == 1 then
+    return {own}
+end
+local room = redis.call('HGET', prefix .. 'user_rooms', partner)
+if room and redis.call('SISMEMBER', prefix .. 'room:' .. room, sid) == 1 then
+    local initiator = redis.call('GET', prefix .. 'pending:' .. room)
+    if initiator then
+        redis.call('DEL', prefix .. 'pending:' .. room, prefix .. 'offer:' .. offer)
+        redis.call('SREM', prefix .. 'pending', room)
+        redis.call('HSET', prefix .. 'user_rooms', sid, room)
+        return {room, initiator}
+    end
+end
+redis.call('SADD', prefix .. 'room:' .. new_room, sid, partner)
+redis.call('SET', prefix .. 'pending:' .. new_room, sid)
+redis.call('SADD', prefix .. 'rooms', new_room)
+redis.call('SADD', prefix .. 'pending', new_room)
+redis.call('HSET', prefix .. 'user_rooms', sid, new_room)
+return {new_room}
+"""
+
+_PEER_OF = """
+local prefix, sid = ARGV[1], ARGV[2]
+local room = redis.call('HGET', prefix .. 'user_rooms', sid)
+if not room then
+    return false
+end
+for _, member in ipairs(redis.call('SMEMBERS', prefix .. 'room:' .. room)) do
+    if member ~= sid then
+        return member
+    end
+end
+return false
+"""
+
+_EXPIRE_OFFER = """
+local prefix, sid, partner = ARGV[1], ARGV[2], ARGV[3]
+if redis.call('DEL', prefix .. 'offer:' .. sid .. ':' .. partner) == 0 then
+    return false
+end
+local room = redis.call('HGET', prefix .. 'user_rooms', sid) or redis.call('HGET', prefix .. 'user_rooms', partner)
+if not room then
+    return {}
+end
+local acceptor = redis.call('GET', prefix .. 'pending:' .. room)
+if not acceptor then
+    return {}
+end
+local room_key = prefix .. 'room:' .. room
+redis.call('DEL', prefix .. 'pending:' .. room, room_key)
+redis.call('SREM', prefix .. 'pending', room)
+redis.call('SREM', prefix .. 'rooms', room)
+redis.call('HDEL', prefix .. 'user_rooms', acceptor)
+return {acceptor}
+"""
+
+_LEAVE_ROOM = """
+local prefix, sid = ARGV[1], ARGV[2]
+local room = redis.call('HGET', prefix .. 'user_rooms', sid)
+if not room then
+    return false
+end
+redis.call('HDEL', prefix .. 'user_rooms', sid)
+local room_key = prefix .. 'room:' .. room
+redis.call('SREM', room_key, sid)
+local members = redis.call('SMEMBERS', room_key)
+if redis.call('GET', prefix .. 'pending:' .. room) == sid then
+    redis.call('DEL', prefix .. 'pending:' .. room, room_key)
+    redis.call('SREM', prefix .. 'pending', room)
+    redis.call('SREM', prefix .. 'rooms', room)
+elseif #members == 0 then
+    redis.call('SREM', prefix .. 'rooms', room)
+end
+return {room, members}
+"""
+
+_DETACH = """
+local prefix, sid = ARGV[1], ARGV[2]
+local enqueued_at = ''
+local topic = redis.call('HGET', prefix .. 'waiting', sid)
+if topic then
+    local queue_key = prefix .. 'queue:' .. topic
+    enqueued_at = redis.call('ZSCORE', queue_key, sid)
+    redis.call('HDEL', prefix .. 'waiting', sid)
+    redis.call('ZREM', queue_key, sid)
+    if redis.call('ZCARD', queue_key) == 0 then
+        redis.call('SREM', prefix .. 'topics', topic)
+    end
+end
+local kept = ''
+local room = redis.call('HGET', prefix .. 'user_rooms', sid)
+if room then
+    redis.call('HDEL', prefix .. 'user_rooms', sid)
+    local room_key = prefix .. 'room:' .. room
+    redis.call('SREM', room_key, sid)
+    if redis.call('EXISTS', prefix .. 'pending:' .. room) == 1 then
+        redis.call('DEL', prefix .. 'pending:' .. room, room_key)
+        redis.call('SREM', prefix .. 'pending', room)
+        redis.call('SREM', prefix .. 'rooms', room)
+    else
+        kept = room
+    end
+end
+return {enqueued_at, kept}
+"""
+
+_RESTORE_ROOM = """
+local prefix, room, sid = ARGV[1], ARGV[2], ARGV[3]
+redis.call('SADD', prefix .. 'room:' .. room, sid)
+redis.call('SADD', prefix .. 'rooms', room)
+redis.call('HSET', prefix .. 'user_rooms', sid, room)
+"""
+
+
+class RedisSignalingState:
+    """
+    Redis-backed state shared by every signaling worker.
+
+    Takes any redis.asyncio-compatible client, so tests can pass a
+    fakeredis.aioredis.FakeRedis instead of a live server.
+
+    User hashes expire after `user_ttl` seconds unless the worker holding the
+    connection refreshes them with `touch`, so a crashed worker's users drop
+    out of the shared state instead of lingering forever.
+    """
+
+    def __init__(self, redis, prefix: str = 'signaling:', user_ttl: float = 300):
+        self.redis = redis
+        self.prefix = prefix
+        self.user_ttl = user_ttl
+        self._enqueue = redis.register_script(_ENQUEUE)
+        self._pop_waiting = redis.register_script(_POP_WAITING)
+        self._match_or_enqueue = redis.register_script(_MATCH_OR_ENQUEUE)
+        self._remove_waiting = redis.register_script(_REMOVE_WAITING)
+        self._release_tick = redis.register_script(_RELEASE_TICK)
+        self._accept = redis.register_script(_ACCEPT)
+        self._peer_of = redis.register_script(_PEER_OF)
+        self._expire_offer = redis.register_script(_EXPIRE_OFFER)
+        self._leave_room = redis.register_script(_LEAVE_ROOM)
+        self._detach = redis.register_script(_DETACH)
+        self._restore_room = redis.register_script(_RESTORE_ROOM)
+
+    async def set_user(self, peer: Peer) -> Peer:
+        key = f'{self.prefix}user:{peer.sid}'
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                'email': peer.email,
+                'topic': peer.topic,
+                'level': peer.level,
+                'points': peer.points,
+                'ice_batch': int(peer.ice_batch)
+            })
+            pipe.pexpire(key, int(self.user_ttl * 1000))
+            await pipe.execute()
+        return peer
+
+    async def touch(self, sids: Iterable[str]) -> None:
+        """Keep the user hashes of sids still connected to this worker alive"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for sid in sids:
+                pipe.pexpire(f'{self.prefix}user:{sid}', int(self.user_ttl * 1000))
+            await pipe.execute()
+
+    async def get_user(self, sid: str) -> Optional[Peer]:
+        user = await self.redis.hgetall(f'{self.prefix}user:{sid}')
+        return _decode_peer(sid, user) if user else None
+
+    async def drop_user(self, sid: str) -> None:
+        await self.redis.delete(f'{self.prefix}user:{sid}')
+
+    async def enqueue(self, peer: Peer, enqueued_at: Optional[float] = None) -> None:
+        # The rest of the peer is read back from the user hash written by set_user
+        score = time.time() if enqueued_at is None else enqueued_at
+        await self._enqueue(args=[self.prefix, peer.sid, peer.topic, score])
+
+    async def pop_waiting(self, topic: str) -> Optional[Peer]:
+        while True:
+            popped = await self._pop_waiting(args=[self.prefix, topic])
+            if not popped:
+                return None
+
+            # A sid without a user hash belonged to a worker that went away
+            peer = await self.get_user(_decode(popped[0]))
+            if peer is not None:
+                peer.enqueued_at = float(popped[1])
+                return peer
+
+    async def match_or_enqueue(self, peer: Peer) -> Optional[Peer]:
+        popped = await self._match_or_enqueue(args=[self.prefix, peer.sid, peer.topic, time.time()])
+        if not popped:
+            return None
+
+        sid = _decode(popped[0])
+        match = await self.get_user(sid) or Peer(sid, topic=peer.topic)
+        match.enqueued_at = float(popped[1])
+        return match
+
+    async def remove_waiting(self, sid: str) -> bool:
+        return bool(await self._remove_waiting(args=[self.prefix, sid]))
+
+    async def queue_depths(self) -> Dict[str, int]:
+        topics = [_decode(topic) for topic in await self.redis.smembers(f'{self.prefix}topics')]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for topic in topics:
+                pipe.zcard(f'{self.prefix}queue:{topic}')
+            depths = await pipe.execute()
+        return dict(zip(topics, depths))
+
+    async def waiting_pool(self, topic: str, limit: int) -> List[Peer]:
+        waiting = await self.redis.zrange(f'{self.prefix}queue:{topic}', 0, limit - 1, withscores=True)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for sid, _ in waiting:
+                pipe.hgetall(f'{self.prefix}user:{_decode(sid)}')
+            users = await pipe.execute()
+
+        pool = []
+        for (sid, enqueued_at), user in zip(waiting, users):
+            sid = _decode(sid)
+            if not user:
+                # Left behind by a worker that went away
+                await self._remove_waiting(args=[self.prefix, sid])
+                continue
+            peer = _decode_peer(sid, user)
+            peer.enqueued_at = enqueued_at
+            pool.append(peer)
+        return pool
+
+    async def claim_pair(self, sid: str, partner_sid: str) -> bool:
+        return bool(await self._remove_waiting(args=[self.prefix, sid, partner_sid]))
+
+    async def acquire_tick(self, lease_ms: int) -> Optional[str]:
+        """
+        Take the lock that lets one worker run a matchmaking tick.
+
+        Returns a token for `release_tick`, or None if another worker holds
+        it. The lease only matters if the holder dies mid-tick.
+        """
+        token = uuid.uuid4().hex
+        if await self.redis.set(f'{self.prefix}tick-lock', token, nx=True, px=lease_ms):
+            return token
+        return None
+
+    async def release_tick(self, token: str, hold_ms: int) -> None:
+        await self._release_tick(args=[f'{self.prefix}tick-lock', token, max(0, hold_ms)])
+
+    async def accept(self, sid: str, partner_sid: str) -> Optional[Tuple[str, Optional[str]]]:
+        offer = '{}:{}'.format(*offer_key(sid, partner_sid))
+        result = await self._accept(args=[self.prefix, sid, partner_sid, str(uuid.uuid4()), offer])
+        if not result:
+            return None
+        room_id = _decode(result[0])
+        initiator_sid = _decode(result[1]) if len(result) > 1 else None
+        return room_id, initiator_sid
+
+    async def counts(self) -> Dict[str, int]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hlen(f'{self.prefix}waiting')
+            pipe.scard(f'{self.prefix}rooms')
+            pipe.scard(f'{self.prefix}pending')
+            waiting, rooms, pending = await pipe.execute()
+        return {'waiting_users': waiting, 'rooms': rooms, 'pending_acceptances': pending}
+
+    async def open_offer(self, sid: str, partner_sid: str, ttl: float) -> None:
+        # Outlives the local expiry timer so a crashed worker cannot leak it
+        key = '{}offer:{}:{}'.format(self.prefix, *offer_key(sid, partner_sid))
+        await self.redis.set(key, 1, px=int(ttl * 2000))
+
+    async def close_offer(self, sid: str, partner_sid: str) -> bool:
+        key = '{}offer:{}:{}'.format(self.prefix, *offer_key(sid, partner_sid))
+        return bool(await self.redis.delete(key))
+
+    async def expire_offer(self, sid: str, partner_sid: str) -> Optional[List[str]]:
+        result = await self._expire_offer(args=[self.prefix, *offer_key(sid, partner_sid)])
+        if result is None:
+            return None
+        return [_decode(acceptor) for acceptor in result]
+
+    async def peer_of(self, sid: str) -> Optional[str]:
+        peer_sid = await self._peer_of(args=[self.prefix, sid])
+        return _decode(peer_sid) if peer_sid else None
+
+    async def leave_room(self, sid: str) -> Optional[Tuple[str, List[str]]]:
+        result = await self._leave_room(args=[self.prefix, sid])
+        if not result:
+            return None
+        return _decode(result[0]), [_decode(member) for member in result[1]]
+
+    async def detach(self, sid: str) -> Optional[Dict]:
+        if not await self.redis.exists(f'{self.prefix}user:{sid}'):
+            return None
+
+        enqueued_at, room_id = (_decode(value) for value in await self._detach(args=[self.prefix, sid]))
+        return {
+            'enqueued_at': float(enqueued_at) if enqueued_at else None,
+            'room': room_id or None
+        }
+
+    async def restore_room(self, room_id: str, sid: str) -> None:
+        await self._restore_room(args=[self.prefix, room_id, sid])
+
+
+def offer_key(sid: str, partner_sid: str) -> Tuple[str, str]:
+    """Order-independent identifier for a match offer between two users"""
+    return (sid, partner_sid) if sid < partner_sid else (partner_sid, sid)
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _decode_peer(sid: str, value: Dict) -> Peer:
+    user = {_decode(key): _decode(item) for key, item in value.items()}
+    return Peer(
+        sid,
+        user.get('email', 'Anonymous'),
+        user.get('topic', 'general'),
+        int(user.get('level', 1)),
+        int(user.get('points', 0)),
+        user.get('ice_batch') == '1'
+    )
@@ -0,0 +1,190 @@
+"""
+Helpers for tests that drive the FastAPI app against PostgreSQL.
+
+The ORM tables come from the models. The country-debate tables have no
+models (the routes use SQL), so they are created here with the columns,
+constraint and index the routes and migrations rely on.
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, List, TypeVar
+import asyncio
+import uuid
+import httpx
+from sqlalchemy import create_engine, text
+from app.config.database import Base, async_engine, replica_engines
+from app.utils.security import create_access_token
+import app.models  # noqa: F401  (registers every model on Base)
+
+T = TypeVar("T")
+
+COUNTRY_DEBATE_DDL = [
+    "ALTER TABLE users ADD COLUMN username VARCHAR",
+    """
+    CREATE TABLE country_debates (
+        id VARCHAR PRIMARY KEY DEFAULT gen_random_uuid()::text,
+        topic VARCHAR NOT NULL,
+        description TEXT,
+        debate_type VARCHAR NOT NULL,
+        max_participants INTEGER NOT NULL DEFAULT 2,
+        participant_count INTEGER NOT NULL DEFAULT 0,
+        created_by VARCHAR REFERENCES users(id),
+        status VARCHAR NOT NULL DEFAULT 'waiting',
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        started_at TIMESTAMPTZ,
+        ended_at TIMESTAMPTZ
+    )
+    """,
+    """
+    CREATE TABLE country_debate_participants (
+        id VARCHAR PRIMARY KEY DEFAULT gen_random_uuid()::text,
+        debate_id VARCHAR NOT NULL REFERENCES country_debates(id) ON DELETE CASCADE,
+        user_id VARCHAR NOT NULL REFERENCES users(id),
+        country_code VARCHAR NOT NULL,
+        country_name VARCHAR NOT NULL,
+        joined_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        CONSTRAINT uq_country_debate_participants_debate_user UNIQUE (debate_id, user_id)
+    )
+    """,
+    """
+    CREATE TABLE country_debate_messages (
+        id VARCHAR PRIMARY KEY DEFAULT gen_random_uuid()::text,
+        debate_id VARCHAR NOT NULL REFERENCES country_debates(id) ON DELETE CASCADE,
+        user_id VARCHAR NOT NULL REFERENCES users(id),
+        message TEXT NOT NULL,
+        message_type VARCHAR NOT NULL DEFAULT 'text',
+        voice_url VARCHAR,
+        voice_duration_seconds INTEGER,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        seq BIGSERIAL NOT NULL
+    )
+    """,
+    """
+    CREATE UNIQUE INDEX ix_country_debate_messages_debate_seq
+    ON country_debate_messages (debate_id, seq)
+    """
+]
+
+
+def create_schema(database_url: str) -> None:
+    """Drop everything in the test database and create the app's tables"""
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("DROP SCHEMA public CASCADE"))
+            connection.execute(text("CREATE SCHEMA public"))
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            for statement in COUNTRY_DEBATE_DDL:
+                connection.execute(text(statement))
+    finally:
+        engine.dispose()
+
+
+def truncate_tables(database_url: str) -> None:
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            tables = connection.execute(text(
+                "SELECT tablename FROM pg_tables WHERE schemaname = 'public'"
+            )).scalars().all()
+            connection.execute(text(f"TRUNCATE {', '.join(tables)} CASCADE"))
+    finally:
+        engine.dispose()
+
+
+async def dispose_engines() -> None:
+    """Drop pooled connections, which belong to the event loop that opened them"""
+    await async_engine.dispose()
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
+
+
+def run(coro: Awaitable[T]) -> T:
+    """asyncio.run for scenarios that use the app's async engines"""
+    async def scenario():
+        try:
+            return await coro
+        finally:
+            await dispose_engines()
+    return asyncio.run(scenario())
+
+
+@asynccontextmanager
+async def api_client() -> AsyncIterator[httpx.AsyncClient]:
+    """In-process client for the app"""
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@asynccontextmanager
+async def serve_app() -> AsyncIterator[str]:
+    """The app on a real socket in this event loop, for responses ASGITransport would buffer"""
+    import uvicorn
+    from app.main import app
+    from tests.signaling_server import free_port
+
+    port = free_port()
+    # Startup and shutdown hooks stay off: shutdown would stop the shared password pool
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await task
+
+
+async def create_users(db, count: int, prefix: str = "user") -> List[str]:
+    """Insert `count` users straight into the table, returning their ids"""
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+    await db.execute(
+        text("""
+            INSERT INTO users (id, email, username, password_hash, is_active, is_verified,
+                               subscription_tier, subscription_status, points, level, badges,
+                               streak_days, debates_completed, created_at)
+            VALUES (:id, :email, :username, 'x', true, false, 'free', 'inactive', 0, 1, '[]', 0, 0, now())
+        """),
+        [{"id": user_id, "email": f"{prefix}{i}-{user_id[:8]}@example.com", "username": f"{prefix}{i}"}
+         for i, user_id in enumerate(ids)]
+    )
+    await db.commit()
+    return ids
+
+
+async def create_debate(db, created_by: str, max_participants: int = 2) -> str:
+    debate_id = (await db.execute(
+        text("""
+            INSERT INTO country_debates (topic, debate_type, max_participants, created_by)
+            VALUES ('Climate policy', 'bilateral', :max_participants, :created_by)
+            RETURNING id
+        """),
+        {"max_participants": max_participants, "created_by": created_by}
+    )).scalar()
+    await db.commit()
+    return debate_id
+
+
+async def add_participants(db, debate_id: str, user_ids: List[str]) -> None:
+    """Seat `user_ids` directly, each as a different country"""
+    await db.execute(
+        text("""
+            INSERT INTO country_debate_participants (debate_id, user_id, country_code, country_name)
+            VALUES (:debate_id, :user_id, :country_code, :country_name)
+        """),
+        [{"debate_id": debate_id, "user_id": user_id, "country_code": f"C{i}", "country_name": f"Country {i}"}
+         for i, user_id in enumerate(user_ids)]
+    )
+    await db.execute(
+        text("UPDATE country_debates SET participant_count = participant_count + :n WHERE id = :id"),
+        {"n": len(user_ids), "id": debate_id}
+    )
+    await db.commit()
+
+
+def auth_headers(user_id: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
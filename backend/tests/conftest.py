@@ -0,0 +1,126 @@
+"""
+Shared test setup.
+
+Settings are read from the environment when `app.config.settings` is first
+imported, so the defaults below are applied before any test module imports
+application code. Tests that need a real database or Redis server use the
+`database_url` and `redis_url` fixtures, which skip unless TEST_DATABASE_URL
+or TEST_REDIS_URL is set. Benchmarks run at a reduced size by default;
+pass --run-slow for the full-size runs.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# The app's engines must never point at a real database during tests
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", "postgresql://localhost/debatehub_test")
+os.environ["DATABASE_REPLICA_URLS"] = "[]"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("WEBSOCKET_LOG_QUEUE", "false")
+os.environ.setdefault("WEBSOCKET_LOG_LEVEL", "WARNING")
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="run benchmarks and soak tests at full size"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: full-size benchmark or soak test, only run with --run-slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-slow"):
+        return
+
+    skip_slow = pytest.mark.skip(reason="needs --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture(scope="session")
+def database_url():
+    """A throwaway PostgreSQL database; its tables are dropped and recreated"""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import OperationalError
+
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except OperationalError as e:
+        pytest.skip(f"PostgreSQL is not reachable: {e}")
+    finally:
+        engine.dispose()
+
+    return url
+
+
+@pytest.fixture(scope="session")
+def pg_schema(database_url):
+    """The app's tables, created once per test session"""
+    from tests.api import create_schema
+    create_schema(database_url)
+    return database_url
+
+
+@pytest.fixture
+def clean_db(pg_schema):
+    """An empty database for one test"""
+    from tests.api import truncate_tables
+    truncate_tables(pg_schema)
+    return pg_schema
+
+
+@pytest.fixture
+def message_writer(monkeypatch):
+    """A fresh write-behind buffer, since the app's one is bound to the first event loop it ran on"""
+    from app.config.settings import settings
+    from app.routes import country_debates
+    from app.services.message_writer import MessageWriter
+
+    writer = MessageWriter(settings.MESSAGE_WRITE_BATCH_SIZE, settings.MESSAGE_WRITE_FLUSH_MS / 1000)
+    monkeypatch.setattr(country_debates, "message_writer", writer)
+    return writer
+
+
+@pytest.fixture(scope="session")
+def redis_url():
+    """A Redis server the test may flush"""
+    url = os.environ.get("TEST_REDIS_URL")
+    if not url:
+        pytest.skip("TEST_REDIS_URL is not set")
+
+    import redis
+    client = redis.Redis.from_url(url)
+    try:
+        client.ping()
+    except redis.ConnectionError as e:
+        pytest.skip(f"Redis is not reachable: {e}")
+    finally:
+        client.close()
+
+    return url
+
+
+@pytest.fixture
+def fake_redis():
+    """In-process Redis with Lua scripting, for the Redis-backed state classes"""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
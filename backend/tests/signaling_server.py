@@ -0,0 +1,51 @@
+"""Run websocket_server.py as a subprocess for integration tests"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Optional
+import pytest
+from tests.conftest import BACKEND_DIR
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(env: Dict[str, str], port: Optional[int] = None) -> (subprocess.Popen, int):
+    """Start a server with `env` on top of the test environment and wait until it listens"""
+    port = port or free_port()
+    server = subprocess.Popen(
+        [sys.executable, "websocket_server.py"],
+        cwd=BACKEND_DIR,
+        env=dict(os.environ, WEBSOCKET_PORT=str(port), **env),
+        stdout=subprocess.DEVNULL,
+        start_new_session=True
+    )
+
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server, port
+        except OSError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.1)
+    stop_server(server)
+    pytest.fail("signaling server did not start")
+
+
+def stop_server(server: subprocess.Popen) -> int:
+    """SIGTERM the server (and its workers), returning its exit code"""
+    if server.poll() is None:
+        os.killpg(server.pid, signal.SIGTERM)
+    try:
+        return server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        return server.wait()
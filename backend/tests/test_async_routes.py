@@ -0,0 +1,195 @@
+"""
+Requests/sec of an authenticated list route at 200 concurrent clients, served
+through the async session versus the old blocking sync session. Needs
+TEST_DATABASE_URL.
+
+A local database answers in microseconds, which hides what blocking costs,
+so both variants reach it through a proxy that adds a network round trip.
+"""
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import Depends, FastAPI, Header
+import httpx
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.config.settings import settings
+from app.config import database
+from app.config.database import AsyncSessionLocal, SessionLocal, get_async_database_url
+from app.models.notification import Notification
+from app.models.user import User
+from app.repositories.pagination import keyset
+from app.utils.security import decode_token
+from tests.api import api_client, auth_headers, create_users
+
+
+class LatencyProxy:
+    """TCP proxy to the test database that delays every packet by `delay` seconds"""
+
+    def __init__(self, database_url: str, delay: float):
+        self.url = make_url(database_url)
+        self.delay = delay
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        self._stop: asyncio.Event = None
+        self._handlers = set()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> str:
+        self._thread.start()
+        self._started.wait()
+        return self.url.set(host="127.0.0.1", port=self.port, query={}).render_as_string(hide_password=False)
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._loop.close()
+
+    async def _serve(self):
+        self._stop = asyncio.Event()
+        server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = server.sockets[0].getsockname()[1]
+        self._started.set()
+        await self._stop.wait()
+
+        server.close()
+        for handler in self._handlers:
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await server.wait_closed()
+
+    async def _connect_upstream(self):
+        socket_dir = self.url.query.get("host")
+        if socket_dir:
+            return await asyncio.open_unix_connection(f"{socket_dir}/.s.PGSQL.{self.url.port or 5432}")
+        return await asyncio.open_connection(self.url.host or "127.0.0.1", self.url.port or 5432)
+
+    async def _handle(self, client_reader, client_writer):
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            await self._proxy(client_reader, client_writer)
+        finally:
+            self._handlers.discard(handler)
+
+    async def _proxy(self, client_reader, client_writer):
+        upstream_reader, upstream_writer = await self._connect_upstream()
+
+        async def pipe(reader, writer):
+            try:
+                while data := await reader.read(65536):
+                    await asyncio.sleep(self.delay)
+                    writer.write(data)
+                    await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        await asyncio.gather(pipe(client_reader, upstream_writer), pipe(upstream_reader, client_writer))
+
+
+def _sync_app() -> FastAPI:
+    """The route as it was: blocking session calls inside an `async def`"""
+    app = FastAPI()
+
+    async def current_user_id(authorization: str = Header(...)) -> str:
+        payload = decode_token(authorization.split(" ", 1)[1])
+        db = SessionLocal()
+        try:
+            return db.get(User, payload["sub"]).id
+        finally:
+            db.close()
+
+    @app.get(f"{settings.API_PREFIX}/notifications")
+    async def get_notifications(user_id: str = Depends(current_user_id)):
+        db = SessionLocal()
+        try:
+            query = select(Notification).where(Notification.user_id == user_id)
+            notifications = db.scalars(keyset(query, Notification.created_at, Notification.id, None, 20)).all()
+            return [{"id": notification.id, "title": notification.title} for notification in notifications]
+        finally:
+            db.close()
+
+    return app
+
+
+async def _seed(users: int, per_user: int) -> list:
+    async with AsyncSessionLocal() as db:
+        user_ids = await create_users(db, users)
+        await db.execute(
+            text("""
+                INSERT INTO notifications (id, user_id, type, title, message, read, created_at)
+                SELECT gen_random_uuid()::text, u.id, 'info', 'Title ' || n, 'Message', false,
+                       now() - n * interval '1 second'
+                FROM users u, generate_series(1, :per_user) n
+            """),
+            {"per_user": per_user}
+        )
+        await db.commit()
+    return user_ids
+
+
+async def _requests_per_second(client: httpx.AsyncClient, user_ids: list, clients: int, requests: int) -> float:
+    headers = [auth_headers(user_id) for user_id in user_ids]
+    remaining = iter(range(requests))
+
+    async def worker():
+        for i in remaining:
+            response = await client.get(f"{settings.API_PREFIX}/notifications?limit=20", headers=headers[i % len(headers)])
+            assert response.status_code == 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return requests / (time.perf_counter() - started)
+
+
+def _benchmark(database_url: str, requests: int) -> (float, float):
+    async def scenario():
+        user_ids = await _seed(users=50, per_user=40)
+
+        transport = httpx.ASGITransport(app=_sync_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            before = await _requests_per_second(client, user_ids, clients=200, requests=requests)
+
+        async with api_client() as client:
+            after = await _requests_per_second(client, user_ids, clients=200, requests=requests)
+        return before, after
+
+    # 0.5 ms each way: a database in the same availability zone
+    with LatencyProxy(database_url, delay=0.0005) as proxied_url:
+        sync_engine = create_engine(proxied_url, pool_size=10, max_overflow=20)
+        async_engine = create_async_engine(get_async_database_url(proxied_url), pool_size=10, max_overflow=20)
+        SessionLocal.configure(bind=sync_engine)
+        AsyncSessionLocal.configure(bind=async_engine)
+        try:
+            before, after = asyncio.run(scenario())
+        finally:
+            SessionLocal.configure(bind=database.engine)
+            AsyncSessionLocal.configure(bind=database.async_engine)
+            sync_engine.dispose()
+            asyncio.run(async_engine.dispose())
+
+    print(f"200 clients, {requests} requests: sync session {before:.0f} req/s, async session {after:.0f} req/s")
+    return before, after
+
+
+def test_async_session_serves_concurrent_clients(clean_db):
+    """Benchmark: requests/sec at 200 concurrent clients, before and after"""
+    before, after = _benchmark(clean_db, requests=1000)
+    assert after > before
+
+
+@pytest.mark.slow
+def test_async_session_serves_concurrent_clients_at_full_size(clean_db):
+    before, after = _benchmark(clean_db, requests=20_000)
+    assert after > before
@@ -0,0 +1,78 @@
+"""
+The authentication dependency: cached principals and their invalidation.
+Needs TEST_DATABASE_URL.
+"""
+import time
+import pytest
+from fastapi import HTTPException
+from app.config.database import AsyncSessionLocal
+from app.repositories.unit_of_work import AsyncUnitOfWork
+from app.repositories.user_repository import AsyncUserRepository, principal_cache
+from app.schemas.user import UserUpdate
+from app.utils.dependencies import _authenticate
+from app.utils.security import create_access_token, decode_token
+from tests.api import create_users, run
+
+
+def test_principal_is_cached_until_a_write_commits(clean_db):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            [user_id] = await create_users(db, 1)
+            token = create_access_token({"sub": user_id})
+
+            assert (await _authenticate(token, db)).is_active
+            assert await principal_cache.get(user_id) is not None
+
+            # Rolled back writes leave the entry in place
+            uow = AsyncUnitOfWork(db)
+            with pytest.raises(RuntimeError):
+                async with uow:
+                    await uow.users.update(user_id, UserUpdate(full_name="Renamed"))
+                    raise RuntimeError("abort")
+            assert await principal_cache.get(user_id) is not None
+
+            async with uow:
+                user = await uow.users.get_by_id(user_id)
+                user.is_active = False
+                await uow.users.update(user_id, UserUpdate(full_name="Deactivated"))
+            assert await principal_cache.get(user_id) is None
+
+            with pytest.raises(HTTPException) as error:
+                await _authenticate(token, db)
+            assert error.value.status_code == 403
+
+            async with uow:
+                await uow.users.delete(user_id)
+            assert await principal_cache.get(user_id) is None
+
+    run(scenario())
+
+
+async def _uncached_authenticate(token: str, db) -> str:
+    """The dependency as it was: decode, then load the full row every time"""
+    payload = decode_token(token)
+    user = await AsyncUserRepository(db).get_by_id(payload["sub"])
+    if not user.is_active:
+        raise HTTPException(status_code=403)
+    return user.id
+
+
+def test_auth_overhead_per_request(clean_db):
+    """Benchmark: authentication cost per request with and without the principal cache"""
+    rounds = 2000
+
+    async def timed(authenticate, token, db) -> float:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await authenticate(token, db)
+        return (time.perf_counter() - started) / rounds
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            [user_id] = await create_users(db, 1)
+            token = create_access_token({"sub": user_id})
+            return await timed(_uncached_authenticate, token, db), await timed(_authenticate, token, db)
+
+    uncached, cached = run(scenario())
+    print(f"auth overhead: full row {uncached * 1e6:.0f} us, cached principal {cached * 1e6:.0f} us per request")
+    assert cached < uncached / 5
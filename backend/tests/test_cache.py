@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from app.config import cache
+from app.config.cache import ModelCache, TTLCache
+from app.schemas.user import Principal
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    ttl_cache = TTLCache(maxsize=10, ttl=60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2, ttl=5)
+
+    clock.now += 5
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("b") is None
+    # Expired entries are dropped when read
+    assert len(ttl_cache) == 1
+
+    clock.now += 55
+    assert ttl_cache.get("a") is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    ttl_cache = TTLCache(maxsize=2, ttl=60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3)
+
+    assert ttl_cache.get("b") is None
+    assert (ttl_cache.get("a"), ttl_cache.get("c")) == (1, 3)
+
+
+def test_delete_and_clear(clock):
+    ttl_cache = TTLCache(maxsize=10, ttl=60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+
+    ttl_cache.delete("a")
+    ttl_cache.delete("missing")
+    assert ttl_cache.get("a") is None
+
+    ttl_cache.clear()
+    assert len(ttl_cache) == 0
+
+
+def _principal(user_id: str) -> Principal:
+    return Principal(id=user_id, email=f"{user_id}@example.com", is_active=True, subscription_tier="free")
+
+
+def test_model_cache_in_process():
+    async def scenario():
+        principals = ModelCache(Principal, maxsize=10, ttl=60)
+        await principals.set("a", _principal("a"))
+        assert await principals.get("a") == _principal("a")
+
+        await principals.invalidate("a")
+        assert await principals.get("a") is None
+
+        await principals.set("b", _principal("b"))
+        principals.invalidate_sync("b")
+        assert await principals.get("b") is None
+
+    asyncio.run(scenario())
+
+
+def test_model_cache_in_redis_is_shared(redis_url):
+    # Two caches stand for two API processes
+    first = ModelCache(Principal, maxsize=10, ttl=60, redis_url=redis_url, prefix="test-principal:")
+    second = ModelCache(Principal, maxsize=10, ttl=60, redis_url=redis_url, prefix="test-principal:")
+
+    async def scenario():
+        await first.set("a", _principal("a"))
+        assert await second.get("a") == _principal("a")
+        assert 0 < await second._async_client().pttl("test-principal:a") <= 60_000
+
+        second.invalidate_sync("a")
+        assert await first.get("a") is None
+
+        await first._async_client().aclose()
+        await second._async_client().aclose()
+
+    asyncio.run(scenario())
+    second._sync_client().close()
@@ -0,0 +1,64 @@
+"""
+Seat-limited joins for country debates. Needs TEST_DATABASE_URL.
+"""
+import asyncio
+from collections import Counter
+from sqlalchemy import text
+from app.config.database import AsyncSessionLocal
+from app.config.settings import settings
+from tests.api import api_client, auth_headers, create_debate, create_users, run
+
+JOIN_URL = f"{settings.API_PREFIX}/country-debates/join"
+
+
+def _join_body(debate_id: str, i: int) -> dict:
+    return {"debate_id": debate_id, "country_code": f"{i % 1000:03d}", "country_name": f"Country {i}"}
+
+
+async def _seats(debate_id: str) -> (int, int):
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(text("""
+            SELECT d.participant_count, count(p.user_id) AS seated
+            FROM country_debates d
+            LEFT JOIN country_debate_participants p ON p.debate_id = d.id
+            WHERE d.id = :debate_id
+            GROUP BY d.participant_count
+        """), {"debate_id": debate_id})).one()
+    return row.participant_count, row.seated
+
+
+def test_concurrent_joins_never_overfill_a_debate(clean_db):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            user_ids = await create_users(db, 500)
+            debate_id = await create_debate(db, user_ids[0], max_participants=10)
+
+        async with api_client() as client:
+            responses = await asyncio.gather(*(
+                client.post(JOIN_URL, json=_join_body(debate_id, i), headers=auth_headers(user_id))
+                for i, user_id in enumerate(user_ids)
+            ))
+        return responses, await _seats(debate_id)
+
+    responses, (participant_count, seated) = run(scenario())
+    assert Counter(response.status_code for response in responses) == {200: 10, 409: 490}
+    assert participant_count == seated == 10
+    assert max(response.json()["participant_count"] for response in responses if response.status_code == 200) == 10
+
+
+def test_joining_twice_is_rejected_without_taking_a_seat(clean_db):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            [user_id] = await create_users(db, 1)
+            debate_id = await create_debate(db, user_id, max_participants=10)
+
+        async with api_client() as client:
+            first = await client.post(JOIN_URL, json=_join_body(debate_id, 0), headers=auth_headers(user_id))
+            again = await client.post(JOIN_URL, json=_join_body(debate_id, 1), headers=auth_headers(user_id))
+        return first, again, await _seats(debate_id)
+
+    first, again, seats = run(scenario())
+    assert first.status_code == 200
+    assert [p["country_code"] for p in first.json()["participants"]] == ["000"]
+    assert again.status_code == 400
+    assert seats == (1, 1)
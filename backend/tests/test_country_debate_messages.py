@@ -0,0 +1,386 @@
+"""
+Incremental message history for country debates. Needs TEST_DATABASE_URL.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Iterator
+import pytest
+from sqlalchemy import String, bindparam, event, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.config.database import AsyncSessionLocal, async_engine
+from app.config.settings import settings
+from app.routes.country_debates import MAX_MESSAGE_PAGE, _get_senders, participant_cache
+from app.services.message_writer import insert_messages
+from tests.api import add_participants, api_client, auth_headers, create_debate, create_users, run
+
+
+async def _seed_debate(messages: int) -> (str, str):
+    """A debate between two participants with `messages` messages, a millisecond apart"""
+    async with AsyncSessionLocal() as db:
+        user_ids = await create_users(db, 2)
+        debate_id = await create_debate(db, user_ids[0])
+        await add_participants(db, debate_id, user_ids)
+        await db.execute(
+            text("""
+                INSERT INTO country_debate_messages (debate_id, user_id, message, created_at)
+                SELECT :debate_id, (ARRAY[:first, :second])[n % 2 + 1], 'Message ' || n,
+                       timestamptz '2026-01-01' + n * interval '1 millisecond'
+                FROM generate_series(1, :messages) n
+            """),
+            {"debate_id": debate_id, "first": user_ids[0], "second": user_ids[1], "messages": messages}
+        )
+        await db.execute(text("ANALYZE country_debate_messages"))
+        await db.commit()
+    return debate_id, user_ids[0]
+
+
+def _url(debate_id: str) -> str:
+    return f"{settings.API_PREFIX}/country-debates/{debate_id}/messages"
+
+
+def test_after_returns_only_newer_messages(clean_db):
+    async def scenario():
+        debate_id, user_id = await _seed_debate(10)
+        headers = auth_headers(user_id)
+        async with api_client() as client:
+            history = (await client.get(_url(debate_id), headers=headers)).json()
+            newer = (await client.get(_url(debate_id), params={"after": history[6]["id"]}, headers=headers)).json()
+            latest = await client.get(_url(debate_id), params={"after": history[-1]["id"]}, headers=headers)
+            return history, newer, latest
+
+    history, newer, latest = run(scenario())
+    assert [m["message"] for m in history] == [f"Message {n}" for n in range(1, 11)]
+    assert history[0]["country_name"] == "Country 1" and history[1]["country_name"] == "Country 0"
+    assert [m["id"] for m in newer] == [m["id"] for m in history[7:]]
+    # Already up to date is an empty page, not an error
+    assert latest.status_code == 200 and latest.json() == []
+
+
+def test_after_must_be_a_message_of_the_same_debate(clean_db):
+    async def scenario():
+        debate_id, user_id = await _seed_debate(5)
+        other_debate_id, _ = await _seed_debate(5)
+        empty_debate_id = await _create_empty_debate(user_id)
+        headers = auth_headers(user_id)
+        async with api_client() as client:
+            [other_message] = (await client.get(
+                _url(other_debate_id), params={"limit": 1}, headers=headers
+            )).json()
+            return [
+                await client.get(_url(debate_id), params={"after": other_message["id"]}, headers=headers),
+                await client.get(_url(debate_id), params={"after": "no-such-message"}, headers=headers),
+                await client.get(_url(empty_debate_id), params={"after": other_message["id"]}, headers=headers)
+            ]
+
+    for response in run(scenario()):
+        assert response.status_code == 400
+
+
+def _text_message(debate_id: str, user_id: str, text: str) -> dict:
+    return {"debate_id": debate_id, "user_id": user_id, "message": text, "message_type": "text"}
+
+
+def test_writers_committing_out_of_order_are_not_skipped(clean_db):
+    async def poll(client, debate_id, headers, after, etag=None):
+        response = await client.get(
+            _url(debate_id), params={"after": after}, headers={**headers, **({"If-None-Match": etag} if etag else {})}
+        )
+        return response.status_code, [m["message"] for m in response.json()] if response.status_code == 200 else []
+
+    async def scenario():
+        debate_id, user_id = await _seed_debate(1)
+        headers = auth_headers(user_id)
+        async with api_client() as client:
+            [seen] = (await client.get(_url(debate_id), headers=headers)).json()
+
+            # Two workers: `late` starts its transaction first, so its now() is the
+            # earlier created_at, but `early` inserts and commits first
+            async with AsyncSessionLocal() as late, AsyncSessionLocal() as early:
+                await late.execute(text("SELECT 1"))
+                await insert_messages(early, [_text_message(debate_id, user_id, "early")])
+                late_insert = asyncio.create_task(
+                    insert_messages(late, [_text_message(debate_id, user_id, "late")])
+                )
+                await asyncio.sleep(0.1)
+                # `late` waits for `early` to commit before it can number its row
+                assert not late_insert.done()
+                await early.commit()
+                await late_insert
+
+                # A viewer polls while `late` is inserted but not yet committed
+                first = await client.get(_url(debate_id), params={"after": seen["id"]}, headers=headers)
+                [early_message] = first.json()
+                await late.commit()
+
+            second = await poll(client, debate_id, headers, early_message["id"], first.headers["ETag"])
+            async with AsyncSessionLocal() as db:
+                created = dict((await db.execute(text(
+                    "SELECT message, created_at FROM country_debate_messages WHERE debate_id = :debate_id"
+                ), {"debate_id": debate_id})).fetchall())
+        return early_message["message"], second, created
+
+    early, (second_status, second), created = run(scenario())
+    assert created["late"] < created["early"]
+    assert early == "early"
+    assert (second_status, second) == (200, ["late"])
+
+
+async def _create_empty_debate(user_id: str) -> str:
+    async with AsyncSessionLocal() as db:
+        return await create_debate(db, user_id)
+
+
+@pytest.mark.parametrize("limit", [0, -1, MAX_MESSAGE_PAGE + 1])
+def test_limit_is_bounded(clean_db, limit):
+    async def scenario():
+        debate_id, user_id = await _seed_debate(1)
+        async with api_client() as client:
+            return await client.get(_url(debate_id), params={"limit": limit}, headers=auth_headers(user_id))
+
+    assert run(scenario()).status_code == 422
+
+
+def test_pages_and_etag(clean_db, message_writer):
+    async def scenario():
+        debate_id, user_id = await _seed_debate(5)
+        headers = auth_headers(user_id)
+        async with api_client() as client:
+            first = await client.get(_url(debate_id), params={"limit": 3}, headers=headers)
+            cursor = first.headers["X-Next-Cursor"]
+            second = await client.get(_url(debate_id), params={"limit": 3, "cursor": cursor}, headers=headers)
+
+            etag = second.headers["ETag"]
+            repeat = await client.get(
+                _url(debate_id), params={"limit": 3, "cursor": cursor}, headers={**headers, "If-None-Match": etag}
+            )
+            await client.post(
+                f"{settings.API_PREFIX}/country-debates/messages",
+                json={"debate_id": debate_id, "message": "New point"},
+                headers=headers
+            )
+            changed = await client.get(
+                _url(debate_id), params={"limit": 3, "cursor": cursor}, headers={**headers, "If-None-Match": etag}
+            )
+            return first, second, repeat, changed
+
+    first, second, repeat, changed = run(scenario())
+    assert len(first.json()) == 3
+    assert [m["message"] for m in second.json()] == ["Message 4", "Message 5"]
+    assert "X-Next-Cursor" not in second.headers
+    assert repeat.status_code == 304
+    assert changed.status_code == 200
+    assert [m["message"] for m in changed.json()] == ["Message 4", "Message 5", "New point"]
+
+
+FULL_HISTORY = text("""
+    SELECT m.id, m.debate_id, m.user_id, m.message, m.message_type,
+           m.voice_url, m.voice_duration_seconds, m.created_at,
+           u.username, p.country_name, p.country_code
+    FROM country_debate_messages m
+    JOIN users u ON m.user_id = u.id
+    LEFT JOIN country_debate_participants p
+        ON m.debate_id = p.debate_id AND m.user_id = p.user_id
+    WHERE m.debate_id = :debate_id
+    ORDER BY m.created_at ASC
+""")
+
+
+def _poll_latency(messages: int, rounds: int = 20) -> dict:
+    async def timed(request) -> float:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await request()
+        return (time.perf_counter() - started) / rounds
+
+    async def scenario():
+        debate_id, user_id = await _seed_debate(messages)
+        headers = auth_headers(user_id)
+        async with AsyncSessionLocal() as db:
+            async def full_history():
+                rows = (await db.execute(FULL_HISTORY, {"debate_id": debate_id})).fetchall()
+                assert len(rows) == messages
+            latencies = {"full history (old query)": await timed(full_history)}
+
+        async with api_client() as client:
+            async with AsyncSessionLocal() as db:
+                tenth_from_last = (await db.execute(text("""
+                    SELECT id FROM country_debate_messages WHERE debate_id = :debate_id
+                    ORDER BY created_at DESC, id DESC OFFSET 10 LIMIT 1
+                """), {"debate_id": debate_id})).scalar()
+
+            async def incremental():
+                response = await client.get(_url(debate_id), params={"after": tenth_from_last}, headers=headers)
+                assert len(response.json()) == 10
+            latencies["10 new messages (after=)"] = await timed(incremental)
+
+            etag = (await client.get(_url(debate_id), params={"after": tenth_from_last}, headers=headers)).headers["ETag"]
+
+            async def unchanged():
+                response = await client.get(
+                    _url(debate_id), params={"after": tenth_from_last}, headers={**headers, "If-None-Match": etag}
+                )
+                assert response.status_code == 304
+            latencies["unchanged (304)"] = await timed(unchanged)
+        return latencies
+
+    latencies = run(scenario())
+    for name, latency in latencies.items():
+        print(f"{messages} messages, {name}: {latency * 1000:.2f} ms")
+    return latencies
+
+
+def _assert_incremental_is_cheaper(latencies: dict):
+    assert latencies["10 new messages (after=)"] < latencies["full history (old query)"] / 10
+    assert latencies["unchanged (304)"] < latencies["full history (old query)"] / 10
+
+
+def test_poll_latency_against_full_history(clean_db):
+    """Benchmark: a poll of a long debate, full history against incremental"""
+    _assert_incremental_is_cheaper(_poll_latency(10_000))
+
+
+@pytest.mark.slow
+def test_poll_latency_with_100k_messages(clean_db):
+    _assert_incremental_is_cheaper(_poll_latency(100_000))
+
+
+async def _debate_with_outside_sender() -> (str, str):
+    """A debate with one message, from a user who has not joined it"""
+    async with AsyncSessionLocal() as db:
+        [creator, outsider] = await create_users(db, 2)
+        debate_id = await create_debate(db, creator)
+        await db.execute(
+            text("INSERT INTO country_debate_messages (debate_id, user_id, message) VALUES (:debate_id, :user_id, 'Hi')"),
+            {"debate_id": debate_id, "user_id": outsider}
+        )
+        await db.commit()
+    return debate_id, outsider
+
+
+@contextmanager
+def _counting_sender_lookups() -> Iterator[list]:
+    """Statements that load a debate's participants, while the block runs"""
+    lookups = []
+
+    def count(conn, cursor, statement, *args):
+        if "FROM country_debate_participants p" in statement:
+            lookups.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        yield lookups
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+
+def test_sender_who_never_joined_is_served_from_the_cache(clean_db):
+    async def scenario():
+        debate_id, outsider = await _debate_with_outside_sender()
+        async with api_client() as client:
+            with _counting_sender_lookups() as lookups:
+                pages = [(await client.get(_url(debate_id), headers=auth_headers(outsider))).json() for _ in range(20)]
+        return pages, lookups
+
+    pages, lookups = run(scenario())
+    assert all(page[0]["username"] == "user1" and page[0]["country_name"] is None for page in pages)
+    assert len(lookups) == 1
+
+
+def test_sender_who_joins_after_posting_gets_their_country(clean_db, monkeypatch):
+    monkeypatch.setattr(settings, "PARTICIPANT_CACHE_MISS_TTL_SECONDS", 0.2)
+
+    async def scenario():
+        debate_id, late = await _debate_with_outside_sender()
+        url = _url(debate_id)
+        async with api_client() as client:
+            [before] = (await client.get(url, headers=auth_headers(late))).json()
+            # Joined through another worker, so this one's cache was not invalidated
+            async with AsyncSessionLocal() as db:
+                await add_participants(db, debate_id, [late])
+            [cached] = (await client.get(url, headers=auth_headers(late))).json()
+            await asyncio.sleep(0.3)
+            [after] = (await client.get(url, headers=auth_headers(late))).json()
+        return before, cached, after
+
+    before, cached, after = run(scenario())
+    assert (before["username"], before["country_name"]) == ("user1", None)
+    # Until the short-lived entry for a non-participant expires
+    assert cached["country_name"] is None
+    assert (after["country_name"], after["country_code"]) == ("Country 0", "C0")
+
+
+MESSAGES_WITH_SENDERS = text("""
+    SELECT m.id, m.debate_id, m.user_id, m.message, m.message_type,
+           m.voice_url, m.voice_duration_seconds, m.created_at,
+           u.username, p.country_name, p.country_code
+    FROM country_debate_messages m
+    JOIN users u ON m.user_id = u.id
+    LEFT JOIN country_debate_participants p
+        ON m.debate_id = p.debate_id AND m.user_id = p.user_id
+    WHERE m.debate_id = :debate_id
+    ORDER BY m.created_at ASC, m.id ASC
+    LIMIT 200
+""")
+
+MESSAGES_ONLY = text("""
+    SELECT m.id, m.debate_id, m.user_id, m.message, m.message_type,
+           m.voice_url, m.voice_duration_seconds, m.created_at
+    FROM country_debate_messages m
+    WHERE m.debate_id = :debate_id
+    ORDER BY m.created_at ASC, m.id ASC
+    LIMIT 200
+""")
+
+
+def _page_latency(participants: int, rounds: int = 200) -> (float, float):
+    """Seconds for a 200-message page with senders joined in SQL, and from the participant cache"""
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            user_ids = await create_users(db, participants)
+            debate_id = await create_debate(db, user_ids[0], max_participants=participants)
+            await add_participants(db, debate_id, user_ids)
+            await db.execute(
+                text("""
+                    INSERT INTO country_debate_messages (debate_id, user_id, message, created_at)
+                    SELECT :debate_id, (:user_ids)[n % cardinality(:user_ids) + 1], 'Message ' || n,
+                           timestamptz '2026-01-01' + n * interval '1 millisecond'
+                    FROM generate_series(1, 1000) n
+                """).bindparams(bindparam("user_ids", type_=ARRAY(String))),
+                {"debate_id": debate_id, "user_ids": user_ids}
+            )
+            await db.execute(text("ANALYZE"))
+            await db.commit()
+
+            started = time.perf_counter()
+            for _ in range(rounds):
+                (await db.execute(MESSAGES_WITH_SENDERS, {"debate_id": debate_id})).fetchall()
+            joined = (time.perf_counter() - started) / rounds
+
+            participant_cache.clear()
+            started = time.perf_counter()
+            for _ in range(rounds):
+                messages = (await db.execute(MESSAGES_ONLY, {"debate_id": debate_id})).fetchall()
+                await _get_senders(db, debate_id, {row.user_id for row in messages})
+            cached = (time.perf_counter() - started) / rounds
+        return joined, cached
+
+    joined, cached = run(scenario())
+    print(f"{participants:>5} participants: joined {joined * 1000:.2f} ms, cached {cached * 1000:.2f} ms per page")
+    return joined, cached
+
+
+def test_page_latency_by_participant_count(clean_db):
+    """Benchmark: sender lookup in SQL against the participant cache"""
+    for participants in (2, 10):
+        _page_latency(participants)
+    # The joins only cost noticeably more than the cache lookup once there are many senders
+    joined, cached = _page_latency(100)
+    assert cached < joined
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("participants", [1_000, 5_000])
+def test_page_latency_with_many_participants(clean_db, participants):
+    joined, cached = _page_latency(participants)
+    assert cached < joined
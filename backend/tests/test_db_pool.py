@@ -0,0 +1,115 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import NullPool
+from app.config import database, pool
+from app.config.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, engine_options
+from app.config.settings import settings
+from app.utils import db_metrics
+from tests.api import api_client, auth_headers, run
+
+
+def test_engine_options_follow_settings(monkeypatch):
+    monkeypatch.setattr(pool.settings, "DB_POOL_SIZE", 3)
+    monkeypatch.setattr(pool.settings, "DB_MAX_OVERFLOW", 7)
+    monkeypatch.setattr(pool.settings, "DB_POOL_TIMEOUT", 2)
+    monkeypatch.setattr(pool.settings, "DB_POOL_RECYCLE", 60)
+    monkeypatch.setattr(pool.settings, "DB_POOL_PRE_PING", False)
+
+    options = engine_options("primary")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert (options["pool_size"], options["max_overflow"], options["pool_timeout"]) == (3, 7, 2)
+    assert (options["pool_recycle"], options["pool_pre_ping"]) == (60, False)
+    assert options["pool_logging_name"] == "primary"
+    assert engine_options("primary_async", is_async=True)["poolclass"] is InstrumentedAsyncQueuePool
+
+
+def test_pgbouncer_mode_disables_pooling_and_statement_caches(monkeypatch):
+    monkeypatch.setattr(pool.settings, "DB_PGBOUNCER", True)
+
+    options = engine_options("primary")
+    assert options["poolclass"] is NullPool
+    assert "pool_size" not in options and "connect_args" not in options
+
+    async_options = engine_options("primary_async", is_async=True)
+    assert async_options["connect_args"]["statement_cache_size"] == 0
+    # Statement names must not collide across PgBouncer's server connections
+    name_func = async_options["connect_args"]["prepared_statement_name_func"]
+    assert name_func() != name_func()
+
+    url = database.get_async_database_url("postgresql://db/app?sslmode=require")
+    assert url.startswith("postgresql+asyncpg://")
+    assert "ssl=require" in url and "prepared_statement_cache_size=0" in url
+
+
+def test_checkout_wait_and_occupancy_are_reported(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.1,
+        pool_logging_name="test_checkout"
+    )
+    db_metrics.instrument_engine(engine)
+    try:
+        first, second = engine.connect(), engine.connect()
+        db_metrics.sample_pool_gauges()
+        assert db_metrics.pool_in_use._values[("test_checkout",)] == 2
+        assert db_metrics.pool_overflow._values[("test_checkout",)] == 1
+        assert db_metrics.pool_size._values[("test_checkout",)] == 1
+
+        # An exhausted pool shows up as checkout wait
+        with pytest.raises(PoolTimeout):
+            engine.connect()
+        counts, total, count = db_metrics.pool_checkout_wait._values[("test_checkout",)]
+        assert count == 3
+        assert total >= 0.1
+
+        first.close()
+        second.close()
+        db_metrics.sample_pool_gauges()
+        assert db_metrics.pool_in_use._values[("test_checkout",)] == 0
+    finally:
+        db_metrics._engines.remove(engine)
+        engine.dispose()
+
+
+def test_pre_ping_failures_are_counted(database_url):
+    engine = create_engine(
+        database_url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        pool_pre_ping=True,
+        pool_logging_name="test_pre_ping"
+    )
+    db_metrics.instrument_engine(engine)
+    try:
+        with engine.connect() as connection:
+            pid = connection.execute(text("SELECT pg_backend_pid()")).scalar()
+
+        # The server drops the idle pooled connection, e.g. after a failover
+        with create_engine(database_url, poolclass=NullPool).connect() as admin:
+            admin.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": pid})
+
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT 1")).scalar() == 1
+
+        assert db_metrics.pre_ping_failures._values[("test_pre_ping",)] == 1
+        assert db_metrics.pool_invalidations._values[("test_pre_ping",)] >= 1
+    finally:
+        db_metrics._engines.remove(engine)
+        engine.dispose()
+
+
+def test_metrics_endpoint_reports_the_app_pools(clean_db):
+    async def scenario():
+        async with api_client() as client:
+            # Touch the database so the primary pool has checked out a connection
+            await client.get(f"{settings.API_PREFIX}/notifications", headers=auth_headers("nobody"))
+            return (await client.get("/metrics")).text
+
+    body = run(scenario())
+    assert 'db_pool_size{pool="primary_async"} ' in body
+    assert 'db_pool_connections_in_use{pool="primary_async"} 0' in body
+    assert 'db_pool_checkout_wait_seconds_count{pool="primary_async"} ' in body
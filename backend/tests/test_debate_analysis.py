@@ -0,0 +1,142 @@
+"""
+AsyncDebateService.analyze_debate through the unit of work. Needs TEST_DATABASE_URL.
+"""
+import time
+import pytest
+from sqlalchemy import event, text
+from app.config.database import AsyncSessionLocal, async_engine
+from app.repositories.debate_repository import AsyncDebateRepository
+from app.repositories.unit_of_work import AsyncUnitOfWork
+from app.repositories.user_repository import AsyncUserRepository
+from app.schemas.debate import AnalyzeDebateRequest, DebateSessionCreate, DebateSessionUpdate
+from app.services.debate_service import AsyncDebateService
+from tests.api import create_users, run
+
+TRANSCRIPTS = [{"speaker": "user", "text": "Remote work raises productivity."}]
+
+
+@pytest.fixture
+def commits():
+    """Counts transactions committed on the primary"""
+    count = []
+
+    def on_commit(connection):
+        count.append(connection)
+
+    event.listen(async_engine.sync_engine, "commit", on_commit)
+    yield count
+    event.remove(async_engine.sync_engine, "commit", on_commit)
+
+
+async def _seed(sessions: int) -> tuple:
+    async with AsyncSessionLocal() as db:
+        [user_id] = await create_users(db, 1)
+        uow = AsyncUnitOfWork(db)
+        async with uow:
+            debates = [
+                await uow.debates.create_session(user_id, DebateSessionCreate(topic="Remote work", stance="for"))
+                for _ in range(sessions)
+            ]
+        return user_id, [debate.id for debate in debates]
+
+
+async def _state(user_id: str, session_id: str) -> tuple:
+    async with AsyncSessionLocal() as db:
+        status = (await db.execute(
+            text("SELECT status FROM debate_sessions WHERE id = :id"), {"id": session_id}
+        )).scalar()
+        completed = (await db.execute(
+            text("SELECT debates_completed FROM users WHERE id = :id"), {"id": user_id}
+        )).scalar()
+        return status, completed
+
+
+def test_analysis_commits_once(clean_db, commits):
+    async def scenario():
+        user_id, [session_id] = await _seed(1)
+        commits.clear()
+        async with AsyncSessionLocal() as db:
+            response = await AsyncDebateService(db).analyze_debate(
+                user_id, AnalyzeDebateRequest(session_id=session_id, transcripts=TRANSCRIPTS)
+            )
+        assert len(commits) == 1
+        return response, await _state(user_id, session_id)
+
+    response, state = run(scenario())
+    assert response.analysis["overall_score"] > 0
+    assert state == ("completed", 1)
+
+
+def test_failed_analysis_leaves_nothing_behind(clean_db, monkeypatch):
+    async def failing_increment(self, user_id, **deltas):
+        raise RuntimeError("stats unavailable")
+
+    monkeypatch.setattr(AsyncUserRepository, "increment_stats", failing_increment)
+
+    async def scenario():
+        user_id, [session_id] = await _seed(1)
+        async with AsyncSessionLocal() as db:
+            with pytest.raises(RuntimeError):
+                await AsyncDebateService(db).analyze_debate(
+                    user_id, AnalyzeDebateRequest(session_id=session_id, transcripts=TRANSCRIPTS)
+                )
+        return await _state(user_id, session_id)
+
+    # The session update is discarded along with the failed unit of work
+    status, completed = run(scenario())
+    assert status != "completed"
+    assert completed == 0
+
+
+async def _analyze_with_commit_per_step(db, user_id: str, session_id: str) -> None:
+    """The path as it was: every repository call committed and refreshed on its own"""
+    debates, users = AsyncDebateRepository(db), AsyncUserRepository(db)
+    session = await debates.get_session(session_id)
+    analysis = await AsyncDebateService(db).ai_service.generate_analysis(TRANSCRIPTS, session.topic, session.stance)
+
+    update = DebateSessionUpdate(status="completed", overall_score=analysis["overall_score"])
+    await debates.update_session(session_id, update)
+    await db.commit()
+    await db.refresh(session)
+    for deltas in ({"points": int(analysis["overall_score"] * 10)}, {"debates_completed": 1}):
+        user = await users.get_by_id(user_id)
+        for name, delta in deltas.items():
+            setattr(user, name, getattr(user, name) + delta)
+        await db.commit()
+        await db.refresh(user)
+
+
+def _analyze_latency(analyses: int) -> (float, float):
+    async def timed(analyze, user_id, session_ids) -> float:
+        started = time.perf_counter()
+        for session_id in session_ids:
+            async with AsyncSessionLocal() as db:
+                await analyze(db, user_id, session_id)
+        return (time.perf_counter() - started) / len(session_ids)
+
+    async def unit_of_work(db, user_id, session_id):
+        await AsyncDebateService(db).analyze_debate(
+            user_id, AnalyzeDebateRequest(session_id=session_id, transcripts=TRANSCRIPTS)
+        )
+
+    async def scenario():
+        user_id, session_ids = await _seed(analyses * 2)
+        before = await timed(_analyze_with_commit_per_step, user_id, session_ids[:analyses])
+        after = await timed(unit_of_work, user_id, session_ids[analyses:])
+        return before, after
+
+    before, after = run(scenario())
+    print(f"analyze path: commit per step {before * 1000:.2f} ms, unit of work {after * 1000:.2f} ms")
+    return before, after
+
+
+def test_analyze_path_latency(clean_db):
+    """Benchmark: analyze_debate with one commit against the old commit per step"""
+    before, after = _analyze_latency(200)
+    assert after < before
+
+
+@pytest.mark.slow
+def test_analyze_path_latency_at_full_size(clean_db):
+    before, after = _analyze_latency(5000)
+    assert after < before
@@ -0,0 +1,122 @@
+import asyncio
+import json
+from socketio import packet
+from ice_batching import IceCoalescer
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def _candidate(i):
+    return {
+        "candidate": f"candidate:{i} 1 udp 2122260223 192.168.1.{i % 250} {50000 + i} typ host generation 0",
+        "sdpMid": "0",
+        "sdpMLineIndex": 0
+    }
+
+
+class Flushed:
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, sender, target, candidates, complete):
+        await asyncio.sleep(0)
+        self.batches.append((sender, target, list(candidates), complete))
+
+
+def test_concurrent_candidates_land_in_one_batch():
+    flushed = Flushed()
+    coalescer = IceCoalescer(window=10, flush=flushed)
+
+    async def scenario():
+        # The first adds for a sender arrive together, before any buffer exists
+        await asyncio.gather(*(coalescer.add("a", "room", _candidate(i)) for i in range(20)))
+        await coalescer.add("a", "room", None)
+
+    run(scenario())
+
+    [(sender, target, candidates, complete)] = flushed.batches
+    assert (sender, target, complete) == ("a", "room", True)
+    assert candidates == [_candidate(i) for i in range(20)]
+
+
+def test_window_flushes_without_end_marker():
+    flushed = Flushed()
+    coalescer = IceCoalescer(window=0.01, flush=flushed)
+
+    async def scenario():
+        await coalescer.add("a", "room", _candidate(1))
+        await coalescer.add("a", "room", _candidate(2))
+        await asyncio.sleep(0.05)
+        await coalescer.add("a", "room", _candidate(3))
+        await coalescer.flush("a")
+
+    run(scenario())
+
+    assert [(len(batch[2]), batch[3]) for batch in flushed.batches] == [(2, False), (1, False)]
+
+
+def test_new_target_flushes_the_old_buffer_first():
+    flushed = Flushed()
+    coalescer = IceCoalescer(window=10, flush=flushed)
+
+    async def scenario():
+        await coalescer.add("a", "old-room", _candidate(1))
+        await coalescer.add("a", "new-room", _candidate(2))
+        await coalescer.add("a", "new-room", {"candidate": ""})
+
+    run(scenario())
+
+    assert [(batch[1], len(batch[2]), batch[3]) for batch in flushed.batches] == [
+        ("old-room", 1, False),
+        ("new-room", 1, True)
+    ]
+
+
+def test_discard_drops_buffer_and_timer():
+    flushed = Flushed()
+    coalescer = IceCoalescer(window=0.01, flush=flushed)
+
+    async def scenario():
+        await coalescer.add("a", "room", _candidate(1))
+        coalescer.discard("a")
+        await asyncio.sleep(0.05)
+
+    run(scenario())
+    assert flushed.batches == []
+
+
+def _wire_bytes(event, payload):
+    # A Socket.IO event inside an Engine.IO message frame ("4" prefix)
+    return len("4" + packet.Packet(packet.EVENT, data=[event, payload]).encode())
+
+
+def test_batching_cuts_packets_and_bytes():
+    """Benchmark: packets and bytes for one peer's candidates, per-candidate vs batched"""
+    flushed = Flushed()
+    coalescer = IceCoalescer(window=10, flush=flushed)
+    candidates = [_candidate(i) for i in range(30)]
+
+    async def scenario():
+        for candidate in candidates:
+            await coalescer.add("a", "room", candidate)
+        await coalescer.add("a", "room", None)
+
+    run(scenario())
+
+    single_bytes = sum(_wire_bytes("ice_candidate", {"candidate": c, "sender": "a"}) for c in candidates)
+    batched_bytes = sum(
+        _wire_bytes("ice_candidates", {"candidates": batch, "complete": complete, "sender": sender})
+        for sender, _, batch, complete in flushed.batches
+    )
+    # The unbatched path also sends the end-of-candidates marker on its own
+    single_bytes += _wire_bytes("ice_candidate", {"candidate": None, "sender": "a"})
+    print(
+        f"{len(candidates)} candidates: {len(candidates) + 1} packets / {single_bytes} bytes unbatched, "
+        f"{len(flushed.batches)} packet / {batched_bytes} bytes batched"
+    )
+
+    assert len(flushed.batches) == 1
+    assert batched_bytes < single_bytes
+    assert json.loads(json.dumps(flushed.batches[0][2])) == candidates
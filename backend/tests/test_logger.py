@@ -0,0 +1,118 @@
+import asyncio
+import io
+import logging
+import time
+from app.utils.logger import SampledLogger, StructuredLogger, enable_queue_logging
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+        self.messages = []
+
+    def emit(self, record):
+        # `delay` stands in for a stdout pipe that a slow log shipper drains
+        if self.delay:
+            time.sleep(self.delay)
+        self.messages.append(record.getMessage())
+
+
+def _logger(name, handler, level="DEBUG"):
+    structured = StructuredLogger(name)
+    structured.logger.handlers = [handler]
+    structured.set_level(level)
+    return structured
+
+
+def test_sampled_logger_logs_one_in_every_n_per_key():
+    handler = RecordingHandler()
+    sampled = SampledLogger(_logger("test.sampled", handler), every=3)
+
+    for _ in range(7):
+        sampled.log("offer", "Relaying offer")
+    sampled.log("answer", "Relaying answer")
+
+    assert handler.messages == [
+        'Relaying offer | Context: {"seen": 1, "sample_every": 3}',
+        'Relaying offer | Context: {"seen": 4, "sample_every": 3}',
+        'Relaying offer | Context: {"seen": 7, "sample_every": 3}',
+        'Relaying answer | Context: {"seen": 1, "sample_every": 3}'
+    ]
+
+
+def test_sampled_logger_is_free_below_the_logger_level():
+    handler = RecordingHandler()
+    sampled = SampledLogger(_logger("test.sampled_off", handler, level="INFO"), every=1)
+
+    sampled.log("offer", "Relaying offer")
+    assert handler.messages == []
+    assert sampled._counts == {}
+
+
+def test_queue_logging_drains_every_record_in_order_on_stop():
+    handler = RecordingHandler(delay=0.001)
+    structured = _logger("test.queued", handler)
+    listener = enable_queue_logging(structured)
+
+    started = time.perf_counter()
+    for i in range(200):
+        structured.info(f"message {i}")
+    enqueue_time = time.perf_counter() - started
+
+    listener.stop()
+    assert handler.messages == [f"message {i}" for i in range(200)]
+    # Callers never waited on the slow handler
+    assert enqueue_time < 200 * handler.delay / 2
+
+
+async def _max_loop_lag(log_event, events=2000, batch=50):
+    """Worst delay of a 1ms wake-up while handlers that log run on the loop"""
+    lags = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    async def handlers():
+        for i in range(events):
+            log_event(i)
+            if i % batch == 0:
+                await asyncio.sleep(0)
+        done.set()
+
+    await asyncio.gather(probe(), handlers())
+    return max(lags)
+
+
+def test_event_loop_lag_with_sampled_queued_logging():
+    """Load test: loop lag while relays log, per-event to a slow stream vs sampled and queued"""
+    direct = _logger("test.lag.direct", RecordingHandler(delay=0.0002))
+    lag_direct = asyncio.run(_max_loop_lag(
+        lambda i: direct.info("Relaying signaling event", {"event": "ice_candidate", "n": i})
+    ))
+
+    queued = _logger("test.lag.queued", RecordingHandler(delay=0.0002))
+    listener = enable_queue_logging(queued)
+    sampled = SampledLogger(queued, every=100)
+    try:
+        lag_queued = asyncio.run(_max_loop_lag(
+            lambda i: sampled.log("ice_candidate", "Relaying signaling event", {"n": i})
+        ))
+    finally:
+        listener.stop()
+
+    print(f"max loop lag: direct {lag_direct * 1000:.1f} ms, sampled+queued {lag_queued * 1000:.1f} ms")
+    assert lag_queued < lag_direct / 2
+
+
+def test_structured_context_is_json():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    structured = _logger("test.context", handler)
+
+    structured.warning("Slow tick", {"topic": "ai", "ms": 12.5})
+    assert stream.getvalue() == 'Slow tick | Context: {"topic": "ai", "ms": 12.5}\n'
@@ -0,0 +1,180 @@
+import time
+import pytest
+from matchmaking import BatchMatcher, MatchmakingStats, MatchQueue
+from signaling_models import Peer
+
+
+def test_queues_are_fifo_per_topic():
+    queue = MatchQueue()
+    for sid, topic in [("a", "ai"), ("b", "law"), ("c", "ai"), ("d", "law")]:
+        queue.enqueue(Peer(sid, topic=topic))
+
+    assert len(queue) == 4
+    assert sorted(queue.topics()) == ["ai", "law"]
+    assert queue.pop("ai").sid == "a"
+    assert queue.pop("law").sid == "b"
+    assert queue.pop("ai").sid == "c"
+    assert queue.pop("ai") is None
+    assert queue.topics() == ["law"]
+
+
+def test_remove_by_sid_drops_empty_topics():
+    queue = MatchQueue()
+    queue.enqueue(Peer("a", topic="ai"))
+    queue.enqueue(Peer("b", topic="ai"))
+
+    assert queue.remove("a").sid == "a"
+    assert queue.remove("a") is None
+    assert "a" not in queue
+    assert queue.depth("ai") == 1
+
+    queue.remove("b")
+    assert queue.topics() == []
+    assert len(queue) == 0
+
+
+def test_requeue_moves_peer_to_back_of_new_topic():
+    queue = MatchQueue()
+    queue.enqueue(Peer("a", topic="ai"))
+    queue.enqueue(Peer("b", topic="ai"))
+
+    # A rejected match re-queues the user behind everyone already waiting
+    queue.enqueue(Peer("a", topic="ai"))
+    assert [peer.sid for peer in queue.peek("ai", 10)] == ["b", "a"]
+
+    # Searching again on another topic leaves the old queue
+    queue.enqueue(Peer("b", topic="law"))
+    assert queue.depth("ai") == 1
+    assert queue.depth("law") == 1
+    assert len(queue) == 2
+
+
+def test_peek_does_not_dequeue():
+    queue = MatchQueue()
+    for sid in "abc":
+        queue.enqueue(Peer(sid, topic="ai"))
+
+    assert [peer.sid for peer in queue.peek("ai", 2)] == ["a", "b"]
+    assert queue.depth("ai") == 3
+    assert queue.peek("missing", 2) == []
+
+
+def _waiting(sid, level, points=0, since=0.0):
+    peer = Peer(sid, topic="ai", level=level, points=points)
+    peer.enqueued_at = since
+    return peer
+
+
+def _sids(pairs):
+    return sorted(tuple(sorted((left.sid, right.sid))) for left, right in pairs)
+
+
+def test_pair_only_matches_within_tolerance():
+    matcher = BatchMatcher(base_tolerance=1.0, tolerance_per_second=0.0)
+    pool = [_waiting("a", 1), _waiting("b", 2), _waiting("c", 9)]
+
+    assert _sids(matcher.pair(pool, now=0.0)) == [("a", "b")]
+
+
+def test_tolerance_widens_with_waiting_time():
+    matcher = BatchMatcher(base_tolerance=1.0, tolerance_per_second=0.5)
+    pool = [_waiting("novice", 1), _waiting("expert", 5)]
+
+    assert matcher.pair(pool, now=0.0) == []
+    assert matcher.pair(pool, now=5.0) == []
+    # After 6s each side accepts a gap of 1 + 0.5 * 6 = 4 levels
+    assert _sids(matcher.pair(pool, now=6.0)) == [("expert", "novice")]
+
+
+def test_one_long_wait_is_enough_to_widen_a_pair():
+    matcher = BatchMatcher(base_tolerance=1.0, tolerance_per_second=0.5)
+    pool = [_waiting("patient", 1, since=0.0), _waiting("newcomer", 5, since=10.0)]
+
+    assert _sids(matcher.pair(pool, now=10.0)) == [("newcomer", "patient")]
+
+
+def test_greedy_pairing_takes_the_closest_neighbours_first():
+    matcher = BatchMatcher(base_tolerance=1.0, tolerance_per_second=0.0, wait_weight=0.0)
+    # b is closer to c than to a, so b-c is taken and a is left over
+    pool = [_waiting("a", 1), _waiting("b", 1, points=800), _waiting("c", 1, points=900)]
+
+    assert _sids(matcher.pair(pool, now=0.0)) == [("b", "c")]
+
+
+def test_longer_waits_win_ties():
+    matcher = BatchMatcher(base_tolerance=1.0, tolerance_per_second=0.0, wait_weight=0.05)
+    pool = [
+        _waiting("fresh", 1, points=0, since=100.0),
+        _waiting("middle", 1, points=500, since=50.0),
+        _waiting("old", 2, points=0, since=0.0)
+    ]
+
+    # Both neighbour gaps are 0.5; middle-old has waited longer
+    assert _sids(matcher.pair(pool, now=100.0)) == [("middle", "old")]
+
+
+def test_every_user_is_paired_at_most_once():
+    matcher = BatchMatcher(base_tolerance=10.0)
+    pool = [_waiting(f"u{i}", i % 7, points=i) for i in range(101)]
+
+    pairs = matcher.pair(pool, now=0.0)
+    sids = [peer.sid for pair in pairs for peer in pair]
+    assert 0 < len(pairs) <= 50
+    assert len(sids) == len(set(sids))
+
+
+def test_stats_percentiles_and_snapshot():
+    stats = MatchmakingStats(window=4)
+    assert stats.percentile(0.5) == 0.0
+
+    stats.record_match(1.0, 2.0)
+    stats.record_match(3.0, 4.0)
+    stats.record_match(5.0, 6.0)
+    stats.record_tick(0.02)
+    stats.record_tick(0.01)
+
+    # Only the last `window` wait times are kept
+    assert sorted(stats.wait_times) == [3.0, 4.0, 5.0, 6.0]
+    assert stats.percentile(0.5) == 5.0
+    assert stats.percentile(0.99) == 6.0
+
+    snapshot = stats.snapshot({"ai": 2, "law": 1})
+    assert snapshot["queue_depth"] == 3
+    assert snapshot["matches"] == 3
+    assert snapshot["last_tick_duration"] == 0.01
+    assert snapshot["max_tick_duration"] == 0.02
+
+
+def _match_latency(waiting: int, rounds: int = 2000) -> float:
+    """Mean seconds for one find_match against `waiting` users on other topics"""
+    queue = MatchQueue()
+    for i in range(waiting):
+        queue.enqueue(Peer(f"idle-{i}", topic=f"topic-{i % 1000}"))
+
+    started = time.perf_counter()
+    for i in range(rounds):
+        # One user waits on the hot topic and the next arrival takes them
+        queue.enqueue(Peer(f"hot-{i}", topic="hot"))
+        assert queue.pop("hot") is not None
+        queue.remove(f"idle-{i}")
+        queue.enqueue(Peer(f"idle-{i}", topic=f"topic-{i % 1000}"))
+    return (time.perf_counter() - started) / rounds
+
+
+def test_match_latency_is_flat_in_waiting_users():
+    """Benchmark: match cost from 100 to 100k waiting users"""
+    sizes = [100, 1_000, 10_000, 100_000]
+    latencies = {}
+    for size in sizes:
+        # Best of three keeps a single GC pause from skewing a size
+        latencies[size] = min(_match_latency(size) for _ in range(3))
+
+    for size in sizes:
+        print(f"{size:>7} waiting: {latencies[size] * 1e6:.2f} us per match")
+
+    assert latencies[100_000] < latencies[100] * 3
+
+
+@pytest.mark.slow
+def test_match_latency_at_one_million_waiting_users():
+    assert _match_latency(1_000_000) < _match_latency(100) * 3
@@ -0,0 +1,229 @@
+"""
+Pushing country-debate messages to viewers. The load test needs
+TEST_DATABASE_URL and compares database queries per second for viewers
+polling every 3 s against viewers holding a server-sent events stream.
+"""
+import asyncio
+import json
+import random
+import time
+import httpx
+import pytest
+from sqlalchemy import event
+from app.config.database import AsyncSessionLocal, async_engine
+from app.config.settings import settings
+from app.utils.broadcast import Broadcaster
+from app.utils.security import create_access_token
+from tests.api import add_participants, auth_headers, create_debate, create_users, run, serve_app
+
+POLL_INTERVAL = 3.0
+
+
+def test_publish_reaches_only_that_channels_subscribers():
+    async def scenario():
+        broadcaster = Broadcaster(queue_size=10)
+        async with broadcaster.subscribe("a") as first, broadcaster.subscribe("a") as second:
+            async with broadcaster.subscribe("b") as other:
+                await broadcaster.publish("a", {"n": 1})
+                assert first.get_nowait() == second.get_nowait() == {"n": 1}
+                assert other.empty()
+            assert broadcaster.subscriber_count("a") == 2
+        assert broadcaster.subscriber_count("a") == 0
+
+    asyncio.run(scenario())
+
+
+def test_subscriber_that_falls_behind_is_told_to_resync():
+    async def scenario():
+        broadcaster = Broadcaster(queue_size=2)
+        async with broadcaster.subscribe("a") as slow:
+            for n in range(3):
+                await broadcaster.publish("a", {"n": n})
+            # Its backlog is dropped for a single sentinel, and it gets nothing more
+            assert slow.get_nowait() is None
+            await broadcaster.publish("a", {"n": 3})
+            assert slow.empty()
+            assert broadcaster.subscriber_count("a") == 0
+
+    asyncio.run(scenario())
+
+
+def test_redis_backplane_delivers_across_processes(redis_url):
+    async def scenario():
+        # Two broadcasters stand for two API workers
+        sender = Broadcaster(queue_size=10, redis_url=redis_url, prefix="test-broadcast:")
+        receiver = Broadcaster(queue_size=10, redis_url=redis_url, prefix="test-broadcast:")
+        await sender.start()
+        await receiver.start()
+        try:
+            async with receiver.subscribe("debate-1") as queue:
+                await sender.publish("debate-1", {"message": "hello"})
+                assert await asyncio.wait_for(queue.get(), 5) == {"message": "hello"}
+        finally:
+            await sender.stop()
+            await receiver.stop()
+
+    asyncio.run(scenario())
+
+
+def test_lost_redis_subscription_resyncs_viewers_and_reconnects(redis_url):
+    async def scenario():
+        sender = Broadcaster(queue_size=10, redis_url=redis_url, prefix="test-broadcast:")
+        receiver = Broadcaster(queue_size=10, redis_url=redis_url, prefix="test-broadcast:")
+        receiver.reconnect_delay = 0.05
+        await sender.start()
+        await receiver.start()
+        try:
+            async with receiver.subscribe("debate-1") as viewer:
+                # The server drops every pub/sub connection, as on a Redis restart
+                await sender._redis.client_kill_filter(_type="pubsub")
+                assert await asyncio.wait_for(viewer.get(), 5) is None
+
+            # The reloaded viewer is fed again once the listener has resubscribed
+            async with receiver.subscribe("debate-1") as viewer:
+                for attempt in range(50):
+                    await sender.publish("debate-1", {"attempt": attempt})
+                    try:
+                        return await asyncio.wait_for(viewer.get(), 0.1)
+                    except asyncio.TimeoutError:
+                        continue
+        finally:
+            await sender.stop()
+            await receiver.stop()
+
+    assert "attempt" in asyncio.run(scenario())
+
+
+class QueryCounter:
+    """Statements sent to the primary while `counting` is set"""
+
+    def __init__(self):
+        self.count = 0
+        self.counting = False
+
+    def __call__(self, *args):
+        if self.counting:
+            self.count += 1
+
+    def rate(self, seconds: float) -> float:
+        return self.count / seconds
+
+
+@pytest.fixture
+def queries():
+    counter = QueryCounter()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+
+
+async def _seed(viewers: int) -> (str, str, list):
+    async with AsyncSessionLocal() as db:
+        [sender] = await create_users(db, 1, prefix="sender")
+        viewer_ids = await create_users(db, viewers, prefix="viewer")
+        debate_id = await create_debate(db, sender)
+        await add_participants(db, debate_id, [sender])
+    return debate_id, sender, viewer_ids
+
+
+async def _send_messages(client, sender: str, debate_id: str, seconds: float) -> int:
+    """One message a second from the sender"""
+    sent = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        response = await client.post(
+            f"{settings.API_PREFIX}/country-debates/messages",
+            json={"debate_id": debate_id, "message": f"Point {sent}"},
+            headers=auth_headers(sender)
+        )
+        assert response.status_code == 201
+        sent += 1
+        await asyncio.sleep(1)
+    return sent
+
+
+async def _polling_qps(viewers: int, seconds: float, queries: QueryCounter) -> float:
+    debate_id, sender, viewer_ids = await _seed(viewers)
+    url = f"{settings.API_PREFIX}/country-debates/{debate_id}/messages"
+    stop = asyncio.Event()
+
+    async def viewer(client, user_id):
+        headers, params = auth_headers(user_id), {}
+        await asyncio.sleep(random.uniform(0, POLL_INTERVAL))
+        while not stop.is_set():
+            response = await client.get(url, params=params, headers=headers)
+            if response.status_code == 200:
+                headers["If-None-Match"] = response.headers["ETag"]
+                if response.json():
+                    params = {"after": response.json()[-1]["id"]}
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async with serve_app() as base_url:
+        async with httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=None)) as client:
+            viewing = [asyncio.create_task(viewer(client, user_id)) for user_id in viewer_ids]
+            # Let every viewer authenticate once before counting
+            await asyncio.sleep(POLL_INTERVAL)
+            queries.counting = True
+            await _send_messages(client, sender, debate_id, seconds)
+            queries.counting = False
+            stop.set()
+            await asyncio.gather(*viewing)
+    return queries.rate(seconds)
+
+
+async def _streaming_qps(viewers: int, seconds: float, queries: QueryCounter) -> (float, list, int):
+    debate_id, sender, viewer_ids = await _seed(viewers)
+    url = f"{settings.API_PREFIX}/country-debates/{debate_id}/stream"
+    connected = 0
+    all_connected = asyncio.Event()
+    received = {user_id: [] for user_id in viewer_ids}
+
+    async def viewer(client, user_id):
+        nonlocal connected
+        params = {"token": create_access_token({"sub": user_id})}
+        async with client.stream("GET", url, params=params) as response:
+            assert response.status_code == 200
+            async for line in response.aiter_lines():
+                if line.startswith("retry:"):
+                    connected += 1
+                    if connected == viewers:
+                        all_connected.set()
+                elif line.startswith("data:"):
+                    received[user_id].append(json.loads(line[5:])["message"])
+
+    async with serve_app() as base_url:
+        limits = httpx.Limits(max_connections=None)
+        async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+            viewing = [asyncio.create_task(viewer(client, user_id)) for user_id in viewer_ids]
+            await asyncio.wait_for(all_connected.wait(), 120)
+            queries.counting = True
+            sent = await _send_messages(client, sender, debate_id, seconds)
+            queries.counting = False
+            # Let the last message reach everyone before hanging up
+            await asyncio.sleep(0.5)
+            for task in viewing:
+                task.cancel()
+            await asyncio.gather(*viewing, return_exceptions=True)
+    return queries.rate(seconds), list(received.values()), sent
+
+
+def _compare(viewers: int, seconds: float, queries: QueryCounter) -> None:
+    polling = run(_polling_qps(viewers, seconds, queries))
+    queries.count = 0
+    streaming, received, sent = run(_streaming_qps(viewers, seconds, queries))
+    print(f"{viewers} viewers, 1 message/s: polling every {POLL_INTERVAL:.0f}s {polling:.1f} queries/s, "
+          f"streaming {streaming:.1f} queries/s")
+
+    expected = [f"Point {n}" for n in range(sent)]
+    assert all(messages == expected for messages in received)
+    assert streaming < polling / 10
+
+
+def test_streaming_database_load_for_concurrent_viewers(clean_db, message_writer, queries):
+    """Benchmark: database queries/s with 200 viewers polling against streaming"""
+    _compare(viewers=200, seconds=6, queries=queries)
+
+
+@pytest.mark.slow
+def test_streaming_database_load_for_1000_viewers(clean_db, message_writer, queries):
+    _compare(viewers=1000, seconds=15, queries=queries)
@@ -0,0 +1,189 @@
+"""
+The write-behind buffer for country-debate messages. Batching, ordering and
+the per-row fallback run against a fake session; the throughput benchmark
+needs TEST_DATABASE_URL.
+"""
+import asyncio
+import re
+import time
+from types import SimpleNamespace
+import pytest
+from app.config.database import AsyncSessionLocal
+from app.services import message_writer as message_writer_module
+from app.services.message_writer import MessageWriter, insert_messages
+from tests.api import add_participants, create_debate, create_users, run
+
+
+class FakeDatabase:
+    """Records the multi-row INSERTs; a statement with a message "bad" fails like a constraint would"""
+
+    def __init__(self):
+        self.inserts = []
+        self.locks = []
+        self.commits = 0
+
+    def session(self):
+        return FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+        self.pending = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, query, params):
+        await asyncio.sleep(0)
+        if "pg_advisory_xact_lock" in str(query):
+            self.database.locks.append(params["debate_id"])
+            return SimpleNamespace(fetchall=lambda: [])
+
+        count = len([key for key in params if re.fullmatch(r"message_\d+", key)])
+        messages = [
+            {column: params[f"{column}_{i}"] for column in message_writer_module.COLUMNS}
+            for i in range(count)
+        ]
+        if any(message["message"] == "bad" for message in messages):
+            raise ValueError("violates check constraint")
+
+        flush = len(self.database.inserts) + len(self.pending)
+        self.pending.append(messages)
+        rows = [
+            SimpleNamespace(**message, created_at=flush + params[f"offset_{i}"])
+            for i, message in enumerate(messages)
+        ]
+        return SimpleNamespace(fetchall=lambda: rows)
+
+    async def commit(self):
+        self.database.inserts.extend(self.pending)
+        self.database.commits += 1
+        self.pending = []
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(message_writer_module, "AsyncSessionLocal", database.session)
+    return database
+
+
+def _message(debate_id: str, text: str) -> dict:
+    return {"debate_id": debate_id, "user_id": "u", "message": text, "message_type": "text"}
+
+
+def test_concurrent_writes_share_one_insert(fake_db):
+    async def scenario():
+        writer = MessageWriter(max_batch=100, flush_interval=0.05)
+        results = await asyncio.gather(*(writer.write([_message("d", f"m{i}")]) for i in range(10)))
+        await writer.close()
+        return results
+
+    results = run(scenario())
+    assert len(fake_db.inserts) == 1 and fake_db.commits == 1
+    assert [row.message for [row] in results] == [f"m{i}" for i in range(10)]
+
+
+def test_full_batches_flush_without_waiting(fake_db):
+    async def scenario():
+        # The timer would never fire in time, so only the size limit can flush
+        writer = MessageWriter(max_batch=10, flush_interval=60)
+        rows = await asyncio.wait_for(writer.write([_message("d", f"m{i}") for i in range(20)]), timeout=5)
+        await writer.close()
+        return rows
+
+    rows = run(scenario())
+    assert [len(insert) for insert in fake_db.inserts] == [10, 10]
+    assert [row.message for row in rows] == [f"m{i}" for i in range(20)]
+
+
+def test_each_debate_keeps_send_order_across_flushes(fake_db):
+    async def scenario():
+        writer = MessageWriter(max_batch=3, flush_interval=0)
+        sends = [writer.write([_message("ab"[i % 2], f"m{i}")]) for i in range(11)]
+        results = await asyncio.gather(*sends)
+        await writer.close()
+        return [row for [row] in results]
+
+    rows = run(scenario())
+    assert len(fake_db.inserts) == 4
+    # Each flush locked its debates in a fixed order before numbering their rows
+    assert fake_db.locks == ["a", "b", "a", "b", "a", "b", "a", "b"]
+    for debate_id in "ab":
+        sent = [row for row in rows if row.debate_id == debate_id]
+        stored = [m["message"] for insert in fake_db.inserts for m in insert if m["debate_id"] == debate_id]
+        assert stored == [row.message for row in sent]
+        # created_at follows the same order
+        assert [row.created_at for row in sent] == sorted(row.created_at for row in sent)
+        assert len({row.created_at for row in sent}) == len(sent)
+
+
+def test_failed_batch_is_retried_row_by_row(fake_db):
+    async def scenario():
+        writer = MessageWriter(max_batch=100, flush_interval=0.01)
+        results = await writer.write([_message("d", "first"), _message("d", "bad"), _message("d", "last")])
+        await writer.close()
+        return results
+
+    first, bad, last = run(scenario())
+    assert (first.message, last.message) == ("first", "last")
+    assert isinstance(bad, ValueError)
+    # Only the two good rows were committed, one transaction each
+    assert [[m["message"] for m in insert] for insert in fake_db.inserts] == [["first"], ["last"]]
+    assert fake_db.commits == 2
+
+
+def _inserts_per_second(messages: int, senders: int = 20) -> (float, float):
+    """Messages/s written one INSERT and commit each, and through the buffer"""
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            user_ids = await create_users(db, 2)
+            debate_id = await create_debate(db, user_ids[0])
+            await add_participants(db, debate_id, user_ids)
+
+        pending = [_message(debate_id, f"m{i}") | {"user_id": user_ids[i % 2]} for i in range(messages)]
+
+        # Each sender writes its own messages in turn, as the route did before buffering
+        async def send_singly(own):
+            for message in own:
+                async with AsyncSessionLocal() as db:
+                    await insert_messages(db, [message])
+                    await db.commit()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send_singly(pending[i::senders]) for i in range(senders)))
+        single = messages / (time.perf_counter() - started)
+
+        writer = MessageWriter(max_batch=100, flush_interval=0.005)
+
+        async def send_buffered(own):
+            for message in own:
+                [row] = await writer.write([message])
+                assert not isinstance(row, Exception)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send_buffered(pending[i::senders]) for i in range(senders)))
+        batched = messages / (time.perf_counter() - started)
+        await writer.close()
+        return single, batched
+
+    single, batched = run(scenario())
+    print(f"{messages} messages from {senders} senders: "
+          f"single {single:.0f}/s, batched {batched:.0f}/s")
+    return single, batched
+
+
+def test_batched_inserts_outpace_single_inserts(clean_db):
+    """Benchmark: messages/s with one INSERT and commit each against the write-behind buffer"""
+    single, batched = _inserts_per_second(2_000)
+    assert batched > single
+
+
+@pytest.mark.slow
+def test_batched_inserts_with_many_senders(clean_db):
+    single, batched = _inserts_per_second(20_000, senders=200)
+    assert batched > single
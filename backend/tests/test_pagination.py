@@ -0,0 +1,142 @@
+"""
+Keyset pagination: cursor encoding, and paging through a large table. The
+database tests need TEST_DATABASE_URL.
+"""
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import text
+from app.config.database import AsyncSessionLocal
+from app.config.settings import settings
+from app.repositories.pagination import decode_cursor, encode_cursor
+from app.utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from tests.api import api_client, auth_headers, create_users, run
+
+
+def test_cursor_round_trips():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone(timedelta(hours=2)))
+    token = encode_cursor(created_at, "id|with|bars")
+
+    assert decode_cursor(token) == (created_at, "id|with|bars")
+    # Safe to put in a query string as is
+    assert "=" not in token and "+" not in token and "/" not in token
+
+
+@pytest.mark.parametrize("token", ["", "not base64!", "bm8tc2VwYXJhdG9y", "bm90LWEtZGF0ZXxpZA", "__8"])
+def test_malformed_cursors_are_refused(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+async def _seed(rows: int) -> str:
+    """One user with `rows` notifications, ten created in each instant"""
+    async with AsyncSessionLocal() as db:
+        [user_id] = await create_users(db, 1)
+        await db.execute(
+            text("""
+                INSERT INTO notifications (id, user_id, type, title, message, read, created_at)
+                SELECT gen_random_uuid()::text, :user_id, 'info', 'Title', 'Message', false,
+                       timestamptz '2026-01-01' + (n / 10) * interval '1 second'
+                FROM generate_series(1, :rows) n
+            """),
+            {"user_id": user_id, "rows": rows}
+        )
+        await db.execute(text("ANALYZE notifications"))
+        await db.commit()
+    return user_id
+
+
+async def _walk(client, user_id: str, limit: int) -> (list, list):
+    """Every id in page order, and the seconds each page took"""
+    url = f"{settings.API_PREFIX}/notifications"
+    headers = auth_headers(user_id)
+    ids, timings, cursor = [], [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        started = time.perf_counter()
+        response = await client.get(url, params=params, headers=headers)
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200
+        ids.extend(notification["id"] for notification in response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids, timings
+
+
+def test_pages_cover_every_row_once_despite_timestamp_ties(clean_db):
+    async def scenario():
+        user_id = await _seed(95)
+        async with api_client() as client:
+            ids, _ = await _walk(client, user_id, limit=7)
+            bad = await client.get(
+                f"{settings.API_PREFIX}/notifications", params={"cursor": "garbage"}, headers=auth_headers(user_id)
+            )
+        async with AsyncSessionLocal() as db:
+            expected = (await db.execute(
+                text("SELECT id FROM notifications ORDER BY created_at DESC, id DESC")
+            )).scalars().all()
+        return ids, expected, bad.status_code
+
+    ids, expected, bad_status = run(scenario())
+    assert ids == expected
+    assert bad_status == 400
+
+
+@pytest.mark.parametrize("path", ["notifications", "resources", "debates/sessions"])
+def test_page_size_is_bounded(clean_db, path):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            [user_id] = await create_users(db, 1)
+        async with api_client() as client:
+            return [
+                (await client.get(
+                    f"{settings.API_PREFIX}/{path}", params={"limit": limit}, headers=auth_headers(user_id)
+                )).status_code
+                for limit in (0, MAX_PAGE_SIZE + 1, MAX_PAGE_SIZE)
+            ]
+
+    assert run(scenario()) == [422, 422, 200]
+
+
+def _page_through(rows: int, limit: int = 100) -> None:
+    async def scenario():
+        user_id = await _seed(rows)
+        async with api_client() as client:
+            ids, timings = await _walk(client, user_id, limit)
+
+        # The same depth reached with OFFSET, for comparison
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await db.execute(
+                text("""
+                    SELECT * FROM notifications WHERE user_id = :user_id
+                    ORDER BY created_at DESC, id DESC OFFSET :offset LIMIT :limit
+                """),
+                {"user_id": user_id, "offset": rows - limit, "limit": limit}
+            )
+            offset_last_page = time.perf_counter() - started
+        return ids, timings, offset_last_page
+
+    ids, timings, offset_last_page = run(scenario())
+    pages = len(timings)
+    first, last = timings[:pages // 10], timings[-(pages // 10):]
+    first_mean, last_mean = sum(first) / len(first), sum(last) / len(last)
+    print(
+        f"{rows} rows in {pages} pages, {sum(timings):.1f}s: first tenth {first_mean * 1000:.2f} ms/page, "
+        f"last tenth {last_mean * 1000:.2f} ms/page; OFFSET at the last page {offset_last_page * 1000:.1f} ms"
+    )
+
+    assert len(ids) == len(set(ids)) == rows
+    # Deep pages cost the same as the first ones
+    assert last_mean < first_mean * 2
+    assert offset_last_page > last_mean
+
+
+def test_paging_cost_is_flat_in_depth(clean_db):
+    """Benchmark: page latency from the first to the last of 100k rows"""
+    _page_through(100_000)
+
+
+@pytest.mark.slow
+def test_paging_through_one_million_rows(clean_db):
+    _page_through(1_000_000)
@@ -0,0 +1,118 @@
+"""
+Password hashing under a burst of sign-ins. Needs TEST_DATABASE_URL.
+"""
+import asyncio
+import time
+import pytest
+from passlib.hash import bcrypt
+from sqlalchemy import text
+from app.config.database import AsyncSessionLocal
+from app.config.settings import settings
+from app.utils import security
+from app.utils.executor import BoundedExecutor, PoolSaturated
+from tests.api import api_client, auth_headers, create_users, run
+
+PASSWORD = "correct horse battery staple"
+
+
+def test_bounded_executor_refuses_work_beyond_its_queue():
+    executor = BoundedExecutor(workers=1, max_queue=1, name="test")
+
+    async def scenario():
+        async def slow():
+            return await executor.run(time.sleep, 0.2)
+
+        running = [asyncio.create_task(slow()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert executor.outstanding == 2
+        with pytest.raises(PoolSaturated):
+            await executor.run(time.sleep, 0)
+        await asyncio.gather(*running)
+        assert executor.outstanding == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+
+async def _seed_logins(users: int) -> list:
+    # Stored with a higher cost than the test policy, as after lowering BCRYPT_ROUNDS
+    password_hash = bcrypt.using(rounds=10).hash(PASSWORD)
+    async with AsyncSessionLocal() as db:
+        user_ids = await create_users(db, users, prefix="storm")
+        await db.execute(text("UPDATE users SET password_hash = :hash"), {"hash": password_hash})
+        await db.commit()
+        return list((await db.execute(text("SELECT email FROM users"))).scalars())
+
+
+@pytest.fixture
+def password_executor(monkeypatch):
+    """A small hashing pool, so 200 sign-ins overflow it"""
+    executor = BoundedExecutor(workers=4, max_queue=16, name="test-password-hash")
+    monkeypatch.setattr(security, "password_executor", executor)
+    yield executor
+    executor.shutdown()
+
+
+def _percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def test_login_storm_leaves_other_endpoints_fast(clean_db, password_executor):
+    """Benchmark: /health and an authenticated read during 200 concurrent sign-ins"""
+    rejected_before = sum(security.password_hash_rejected._values.values())
+
+    async def scenario():
+        emails = await _seed_logins(200)
+        async with AsyncSessionLocal() as db:
+            [reader] = await create_users(db, 1, prefix="reader")
+
+        async with api_client() as client:
+            storm_done = asyncio.Event()
+            health, reads = [], []
+
+            async def timed(latencies, request):
+                started = time.perf_counter()
+                assert (await request).status_code == 200
+                latencies.append(time.perf_counter() - started)
+
+            async def probe():
+                while not storm_done.is_set():
+                    await timed(health, client.get("/health"))
+                    await timed(reads, client.get(f"{settings.API_PREFIX}/notifications", headers=auth_headers(reader)))
+                    await asyncio.sleep(0.005)
+
+            async def storm():
+                try:
+                    return await asyncio.gather(*(
+                        client.post(f"{settings.API_PREFIX}/auth/signin", json={"email": email, "password": PASSWORD})
+                        for email in emails
+                    ))
+                finally:
+                    storm_done.set()
+
+            started = time.perf_counter()
+            responses, _ = await asyncio.gather(storm(), probe())
+            return responses, health, reads, time.perf_counter() - started
+
+    responses, health, reads, elapsed = run(scenario())
+    statuses = [response.status_code for response in responses]
+    print(
+        f"{len(responses)} sign-ins in {elapsed:.2f}s: {statuses.count(200)} ok, {statuses.count(429)} refused; "
+        f"/health p50 {_percentile(health, 0.5) * 1000:.1f} ms, p99 {_percentile(health, 0.99) * 1000:.1f} ms; "
+        f"notifications p50 {_percentile(reads, 0.5) * 1000:.1f} ms over {len(reads)} probes"
+    )
+
+    # Past the workers plus queue, sign-ins are refused rather than left to pile up
+    assert set(statuses) <= {200, 429}
+    assert statuses.count(200) >= password_executor.capacity
+    assert statuses.count(429) > 0
+    refused = [response for response in responses if response.status_code == 429]
+    assert all(response.headers["Retry-After"] == "1" for response in refused)
+    assert sum(security.password_hash_rejected._values.values()) - rejected_before == len(refused)
+
+    # Hashing never holds the event loop; reads only queue for database connections
+    assert _percentile(health, 0.99) < 0.05
+    assert _percentile(reads, 0.5) < 0.1
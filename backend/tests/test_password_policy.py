@@ -0,0 +1,144 @@
+"""
+Password hashing policy: rehash on login, and login latency per policy.
+The latency matrix needs TEST_DATABASE_URL.
+"""
+import time
+import pytest
+from sqlalchemy import text
+from app.config.database import AsyncSessionLocal
+from app.config.settings import settings
+from app.utils import security
+from tests.api import api_client, create_users, run
+
+PASSWORD = "correct horse battery staple"
+
+
+def _policy(monkeypatch, scheme: str, **parameters):
+    """The CryptContext a deployment with these settings would build"""
+    monkeypatch.setattr(security.settings, "PASSWORD_HASH_SCHEME", scheme)
+    for name, value in parameters.items():
+        monkeypatch.setattr(security.settings, name, value)
+    return security._build_password_context()
+
+
+def test_current_hashes_are_kept(monkeypatch):
+    context = _policy(monkeypatch, "bcrypt", BCRYPT_ROUNDS=5)
+
+    assert context.verify_and_update(PASSWORD, context.hash(PASSWORD)) == (True, None)
+
+
+def test_changing_bcrypt_cost_either_way_rehashes(monkeypatch):
+    old = _policy(monkeypatch, "bcrypt", BCRYPT_ROUNDS=6).hash(PASSWORD)
+    context = _policy(monkeypatch, "bcrypt", BCRYPT_ROUNDS=5)
+
+    verified, new_hash = context.verify_and_update(PASSWORD, old)
+    assert verified
+    assert new_hash.startswith("$2b$05$")
+
+    context = _policy(monkeypatch, "bcrypt", BCRYPT_ROUNDS=7)
+    assert context.verify_and_update(PASSWORD, new_hash)[1].startswith("$2b$07$")
+
+
+def test_switching_scheme_rehashes_on_login(monkeypatch):
+    bcrypt_hash = _policy(monkeypatch, "bcrypt", BCRYPT_ROUNDS=5).hash(PASSWORD)
+    context = _policy(monkeypatch, "argon2", ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=1024, ARGON2_PARALLELISM=1)
+
+    verified, new_hash = context.verify_and_update(PASSWORD, bcrypt_hash)
+    assert verified
+    assert new_hash.startswith("$argon2id$")
+    assert "m=1024,t=1,p=1" in new_hash
+
+    # Switching back still accepts the argon2 hashes made in the meantime
+    context = _policy(monkeypatch, "bcrypt", BCRYPT_ROUNDS=5)
+    verified, new_hash = context.verify_and_update(PASSWORD, new_hash)
+    assert verified and new_hash.startswith("$2b$05$")
+
+
+def test_wrong_password_is_not_rehashed(monkeypatch):
+    old = _policy(monkeypatch, "bcrypt", BCRYPT_ROUNDS=6).hash(PASSWORD)
+    context = _policy(monkeypatch, "bcrypt", BCRYPT_ROUNDS=5)
+
+    assert context.verify_and_update("wrong", old) == (False, None)
+
+
+def test_sign_in_stores_the_upgraded_hash(clean_db, monkeypatch):
+    old = _policy(monkeypatch, "bcrypt", BCRYPT_ROUNDS=6).hash(PASSWORD)
+    monkeypatch.setattr(security, "pwd_context", _policy(monkeypatch, "bcrypt", BCRYPT_ROUNDS=5))
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            [user_id] = await create_users(db, 1)
+            await db.execute(text("UPDATE users SET password_hash = :hash"), {"hash": old})
+            await db.commit()
+            email = (await db.execute(text("SELECT email FROM users"))).scalar()
+
+        async with api_client() as client:
+            for _ in range(2):
+                response = await client.post(
+                    f"{settings.API_PREFIX}/auth/signin", json={"email": email, "password": PASSWORD}
+                )
+                assert response.status_code == 200
+
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(text("SELECT password_hash FROM users"))).scalar()
+
+    assert run(scenario()).startswith("$2b$05$")
+
+
+POLICIES = {
+    "bcrypt-10": ("bcrypt", {"BCRYPT_ROUNDS": 10}),
+    "bcrypt-12": ("bcrypt", {"BCRYPT_ROUNDS": 12}),
+    "argon2-t2-m19MiB": ("argon2", {"ARGON2_TIME_COST": 2, "ARGON2_MEMORY_COST": 19456, "ARGON2_PARALLELISM": 1}),
+    "argon2-t3-m64MiB": ("argon2", {"ARGON2_TIME_COST": 3, "ARGON2_MEMORY_COST": 65536, "ARGON2_PARALLELISM": 4}),
+}
+FULL_POLICIES = {
+    "bcrypt-14": ("bcrypt", {"BCRYPT_ROUNDS": 14}),
+    "argon2-t4-m256MiB": ("argon2", {"ARGON2_TIME_COST": 4, "ARGON2_MEMORY_COST": 262144, "ARGON2_PARALLELISM": 4}),
+}
+
+
+def _login_latency(monkeypatch, scheme: str, parameters: dict, logins: int) -> float:
+    """Mean seconds per sign-in through the API for users stored under this policy"""
+    context = _policy(monkeypatch, scheme, **parameters)
+    monkeypatch.setattr(security, "pwd_context", context)
+    password_hash = context.hash(PASSWORD)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("TRUNCATE users CASCADE"))
+            await create_users(db, 1)
+            await db.execute(text("UPDATE users SET password_hash = :hash"), {"hash": password_hash})
+            await db.commit()
+            email = (await db.execute(text("SELECT email FROM users"))).scalar()
+
+        async with api_client() as client:
+            started = time.perf_counter()
+            for _ in range(logins):
+                response = await client.post(
+                    f"{settings.API_PREFIX}/auth/signin", json={"email": email, "password": PASSWORD}
+                )
+                assert response.status_code == 200
+            return (time.perf_counter() - started) / logins
+
+    return run(scenario())
+
+
+def _matrix(monkeypatch, policies: dict, logins: int) -> dict:
+    latencies = {}
+    for name, (scheme, parameters) in policies.items():
+        with monkeypatch.context() as patch:
+            latencies[name] = _login_latency(patch, scheme, parameters, logins)
+        print(f"{name:>18}: {latencies[name] * 1000:.1f} ms per sign-in")
+    return latencies
+
+
+def test_login_latency_per_policy(clean_db, monkeypatch):
+    """Benchmark: sign-in latency for each hashing policy"""
+    latencies = _matrix(monkeypatch, POLICIES, logins=5)
+    assert latencies["bcrypt-12"] > latencies["bcrypt-10"]
+
+
+@pytest.mark.slow
+def test_login_latency_per_policy_including_expensive_ones(clean_db, monkeypatch):
+    latencies = _matrix(monkeypatch, {**POLICIES, **FULL_POLICIES}, logins=20)
+    assert latencies["bcrypt-14"] > latencies["bcrypt-12"]
@@ -0,0 +1,119 @@
+"""
+Read routing between the primary and the read replicas, with SQLite
+databases standing in for PostgreSQL. Each database holds one user whose
+email names it, so a read shows which database served it.
+"""
+import asyncio
+import itertools
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.config import database
+from app.config.database import RoutingSession, use_primary
+from app.models.user import User
+from app.repositories.user_repository import AsyncUserRepository
+
+pytest.importorskip("aiosqlite")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _database(path, name: str):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}/{name}.db")
+    async with engine.begin() as connection:
+        await connection.run_sync(User.__table__.create)
+    async with engine.begin() as connection:
+        await connection.execute(User.__table__.insert().values(id=name, email=name, password_hash="x"))
+    return engine
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """A session factory on the primary, with two replicas configured"""
+    async def create():
+        return [await _database(tmp_path, name) for name in ("primary", "replica-0", "replica-1")]
+
+    primary, *replicas = run(create())
+    monkeypatch.setattr(database, "replica_engines", replicas)
+    monkeypatch.setattr(database, "_replica_cycle", itertools.cycle(replicas))
+    yield async_sessionmaker(primary, sync_session_class=RoutingSession, expire_on_commit=False)
+
+    async def dispose():
+        for engine in [primary, *replicas]:
+            await engine.dispose()
+    run(dispose())
+
+
+async def _served_by(db) -> str:
+    [user] = await AsyncUserRepository(db).get_all()
+    return user.email
+
+
+def test_sessions_go_round_robin_and_keep_their_replica(databases):
+    async def scenario():
+        served = []
+        for _ in range(4):
+            async with databases() as db:
+                served.append([await _served_by(db) for _ in range(3)])
+        return served
+
+    assert run(scenario()) == [["replica-0"] * 3, ["replica-1"] * 3, ["replica-0"] * 3, ["replica-1"] * 3]
+
+
+def test_a_session_never_reads_from_a_more_lagged_replica(databases):
+    async def scenario():
+        # replica-1 has not yet replayed a user replica-0 already has
+        async with database.replica_engines[0].begin() as connection:
+            await connection.execute(User.__table__.insert().values(id="new", email="new", password_hash="x"))
+
+        seen = []
+        for _ in range(4):
+            async with databases() as db:
+                # A probe, then the page it vouches for, as get_messages does
+                probe = len(await AsyncUserRepository(db).get_all())
+                page = len(await AsyncUserRepository(db).get_all())
+                seen.append((probe, page))
+        return seen
+
+    assert run(scenario()) == [(2, 2), (1, 1), (2, 2), (1, 1)]
+
+
+def test_other_reads_use_the_primary(databases):
+    async def scenario():
+        async with databases() as db:
+            user = await AsyncUserRepository(db).get_by_email("primary")
+            return user.id
+
+    assert run(scenario()) == "primary"
+
+
+def test_reads_after_a_write_stay_on_the_primary(databases):
+    async def scenario():
+        async with databases() as db:
+            assert await _served_by(db) == "replica-0"
+            db.add(User(id="written", email="written", password_hash="x"))
+            await db.flush()
+            # The replica would not have the new row yet
+            return sorted(user.email for user in await AsyncUserRepository(db).get_all())
+
+    assert run(scenario()) == ["primary", "written"]
+
+
+def test_use_primary_pins_reads_before_any_write(databases):
+    async def scenario():
+        async with databases() as db:
+            use_primary(db)
+            return await _served_by(db)
+
+    assert run(scenario()) == "primary"
+
+
+def test_without_replicas_everything_reads_the_primary(databases, monkeypatch):
+    monkeypatch.setattr(database, "replica_engines", [])
+
+    async def scenario():
+        async with databases() as db:
+            return await _served_by(db)
+
+    assert run(scenario()) == "primary"
@@ -0,0 +1,188 @@
+import asyncio
+import time
+import pytest
+import socketio
+from handoff import FileHandoffStore, RedisHandoffStore
+from matchmaking import MatchQueue
+from signaling_models import Peer
+from tests.signaling_server import start_server, stop_server
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def _entry(token, **fields):
+    return dict({
+        "token": token,
+        "email": f"{token}@example.com",
+        "topic": "ai",
+        "level": 1,
+        "points": 0,
+        "ice_batch": False,
+        "enqueued_at": None,
+        "room": None
+    }, **fields)
+
+
+def test_file_handoff_round_trip(tmp_path):
+    path = str(tmp_path / "handoff.json")
+
+    async def scenario():
+        await FileHandoffStore(path, window=60).save([_entry("t1", enqueued_at=5.0), _entry("t2", room="r1")])
+
+        store = FileHandoffStore(path, window=60)
+        assert await store.load() == 2
+        # The snapshot is consumed, so a second restart does not replay it
+        assert await FileHandoffStore(path, window=60).load() == 0
+
+        assert (await store.claim("t1"))["enqueued_at"] == 5.0
+        assert await store.claim("t1") is None
+        assert (await store.claim("t2"))["room"] == "r1"
+        assert await store.claim("unknown") is None
+
+    run(scenario())
+
+
+def test_file_handoff_ignores_a_stale_snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / "handoff.json")
+
+    async def scenario():
+        await FileHandoffStore(path, window=60).save([_entry("t1")])
+        store = FileHandoffStore(path, window=60)
+
+        monkeypatch.setattr(time, "time", lambda: 10 ** 12)
+        assert await store.load() == 0
+        assert await store.claim("t1") is None
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("contents", ['{"taken_at": 1, "entr', '{"entries": []}', '[]'])
+def test_file_handoff_discards_an_unreadable_snapshot(tmp_path, contents):
+    path = tmp_path / "handoff.json"
+    path.write_text(contents)
+
+    async def scenario():
+        store = FileHandoffStore(str(path), window=60)
+        assert await store.load() == 0
+        assert await store.claim("t1") is None
+
+    run(scenario())
+    assert not path.exists()
+
+
+def test_redis_handoff_entries_are_claimed_once(fake_redis):
+    async def scenario():
+        store = RedisHandoffStore(fake_redis, window=60)
+        await store.save([_entry("t1", room="r1")])
+
+        assert 0 < await fake_redis.pttl("signaling:handoff:t1") <= 60_000
+        assert (await store.claim("t1"))["room"] == "r1"
+        assert await store.claim("t1") is None
+
+    run(scenario())
+
+
+def test_restored_user_keeps_their_place_in_the_queue():
+    queue = MatchQueue()
+    queue.enqueue(Peer("early", topic="ai"), enqueued_at=100.0)
+    queue.enqueue(Peer("late", topic="ai"), enqueued_at=300.0)
+
+    # Resumed with the time they first joined, ahead of anyone newer
+    queue.enqueue(Peer("resumed", topic="ai"), enqueued_at=200.0)
+    assert [peer.sid for peer in queue.peek("ai", 10)] == ["early", "resumed", "late"]
+    assert queue.peek("ai", 10)[1].enqueued_at == 200.0
+
+
+class Client:
+    """Socket.IO client that records every event it receives"""
+
+    def __init__(self):
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.received = {}
+        self._arrived = {}
+
+        @self.sio.on("*")
+        async def record(event, data=None):
+            self.received.setdefault(event, []).append(data)
+            self._signal(event).set()
+
+    def _signal(self, event):
+        return self._arrived.setdefault(event, asyncio.Event())
+
+    async def connect(self, port):
+        await self.sio.connect(f"http://127.0.0.1:{port}", transports=["websocket"])
+        return self
+
+    async def wait_for(self, event, timeout=10):
+        await asyncio.wait_for(self._signal(event).wait(), timeout)
+        return self.received[event][-1]
+
+
+def test_restart_hands_rooms_and_queue_positions_to_the_next_process(tmp_path):
+    """Integration: drain one server process and resume its clients on a second one"""
+    env = {
+        "WEBSOCKET_USE_REDIS": "false",
+        "WEBSOCKET_WORKERS": "1",
+        "WEBSOCKET_HANDOFF_PATH": str(tmp_path / "handoff.json"),
+        "WEBSOCKET_DRAIN_GRACE_SECONDS": "0.5",
+        "WEBSOCKET_RECONNECT_SPREAD_MS": "100"
+    }
+
+    async def scenario():
+        old_server, port = start_server(env)
+        try:
+            alice, bob, carol = [await Client().connect(port) for _ in range(3)]
+            await alice.sio.emit("find_match", {"topic": "ai", "email": "alice@example.com"})
+            await bob.sio.emit("find_match", {"topic": "ai", "email": "bob@example.com"})
+            for client, partner in ((alice, bob), (bob, alice)):
+                await client.wait_for("match-request")
+                await client.sio.emit("accept_match", {"partnerId": partner.sio.get_sid()})
+            room_id = (await alice.wait_for("match-found"))["roomId"]
+            await carol.sio.emit("find_match", {"topic": "law", "email": "carol@example.com", "level": 4})
+            await carol.wait_for("waiting")
+
+            exit_code = asyncio.ensure_future(asyncio.to_thread(stop_server, old_server))
+            notices = [await client.wait_for("server-restarting") for client in (alice, bob, carol)]
+            assert await exit_code == 0
+        finally:
+            stop_server(old_server)
+
+        assert all(notice["resumeToken"] and 0 <= notice["reconnectIn"] <= 100 for notice in notices)
+        for client in (alice, bob, carol):
+            await client.sio.disconnect()
+
+        new_server, port = start_server(env)
+        try:
+            clients = [await Client().connect(port) for _ in range(3)]
+            for client, notice in zip(clients, notices):
+                await client.sio.emit("resume", {"token": notice["resumeToken"]})
+            alice, bob, carol = clients
+
+            assert (await alice.wait_for("resumed"))["roomId"] == room_id
+            assert (await bob.wait_for("resumed"))["roomId"] == room_id
+            assert (await carol.wait_for("resumed"))["topic"] == "law"
+
+            # The room carries on relaying between the reconnected members
+            await alice.sio.emit("offer", {"sdp": "v=0"})
+            offer = await bob.wait_for("offer")
+            assert offer == {"sdp": "v=0", "sender": alice.sio.get_sid()}
+
+            # carol is still first in line on her topic
+            dave = await Client().connect(port)
+            await dave.sio.emit("find_match", {"topic": "law", "email": "dave@example.com"})
+            request = await dave.wait_for("match-request")
+            assert request["partnerId"] == carol.sio.get_sid()
+            assert request["partnerEmail"] == "carol@example.com"
+
+            # Tokens are single use
+            await dave.sio.emit("resume", {"token": notices[0]["resumeToken"]})
+            await dave.wait_for("resume-failed")
+
+            for client in (alice, bob, carol, dave):
+                await client.sio.disconnect()
+        finally:
+            stop_server(new_server)
+
+    run(scenario())
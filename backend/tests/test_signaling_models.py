@@ -0,0 +1,122 @@
+import asyncio
+import json
+import tracemalloc
+import uuid
+from collections import OrderedDict
+import pytest
+from signaling_models import InvalidPayload, Peer, find_match_peer
+from signaling_state import LocalSignalingState
+
+
+def _payloads(connections):
+    """find_match payloads as decoded off the wire, one fresh string per field"""
+    for i in range(connections):
+        yield f"sid-{i:08d}", json.loads(json.dumps({
+            "topic": f"topic-{i % 20}",
+            "email": f"user{i}@example.com",
+            "level": i % 10,
+            "points": i
+        }))
+
+
+def _old_layout(connections):
+    """Loose dicts and sets, as the server kept them before Peer/Room"""
+    user_info, queues, waiting_topics = {}, {}, {}
+    rooms, user_rooms, pending_acceptances = {}, {}, {}
+    partner = None
+
+    for i, (sid, data) in enumerate(_payloads(connections)):
+        user_info[sid] = {
+            "email": data["email"],
+            "topic": data["topic"],
+            "level": data["level"],
+            "points": data["points"],
+            "ice_batch": False
+        }
+        if i % 2 == 0:
+            queues.setdefault(data["topic"], OrderedDict())[sid] = {
+                "email": data["email"],
+                "topic": data["topic"],
+                "level": data["level"],
+                "points": data["points"],
+                "enqueued_at": 0.0
+            }
+            waiting_topics[sid] = data["topic"]
+        elif partner is None:
+            partner = sid
+        else:
+            room_id = str(uuid.uuid4())
+            rooms[room_id] = {partner, sid}
+            user_rooms[partner] = user_rooms[sid] = room_id
+            partner = None
+
+    return user_info, queues, waiting_topics, rooms, user_rooms, pending_acceptances
+
+
+def _new_layout(connections):
+    state = LocalSignalingState()
+
+    async def connect_all():
+        partner = None
+        for i, (sid, data) in enumerate(_payloads(connections)):
+            peer = await state.set_user(Peer(sid, data["email"], data["topic"], data["level"], data["points"]))
+            if i % 2 == 0:
+                await state.enqueue(peer)
+            elif partner is None:
+                partner = sid
+            else:
+                await state.open_offer(partner, sid, 30)
+                await state.accept(partner, sid)
+                await state.accept(sid, partner)
+                partner = None
+
+    asyncio.run(connect_all())
+    return state
+
+
+def _traced_size(build, connections):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build(connections)
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def test_memory_per_connection_old_vs_new_layout():
+    """Benchmark: traced memory for 50k connections, half waiting and half in rooms"""
+    connections = 50_000
+    old = _traced_size(_old_layout, connections)
+    new = _traced_size(_new_layout, connections)
+    print(
+        f"{connections} connections: old layout {old / connections:.0f} B/conn, "
+        f"Peer/Room {new / connections:.0f} B/conn"
+    )
+
+    assert new < old * 0.75
+
+
+def test_topics_are_interned():
+    first = Peer("a", topic="".join(["topic-", "1"]))
+    second = Peer("b", topic="".join(["topic-", "1"]))
+    assert first.topic is second.topic
+
+
+def test_records_have_no_instance_dict():
+    peer = Peer("a")
+    with pytest.raises(AttributeError):
+        peer.nickname = "x"
+
+
+def test_find_match_payload_numbers_are_validated():
+    peer = find_match_peer("a", {"topic": "ai", "level": "3", "points": 250.0})
+    assert (peer.topic, peer.level, peer.points, peer.email) == ("ai", 3, 250, "Anonymous")
+    assert find_match_peer("a", {"level": None}).level == 1
+
+    for payload in ({"level": "expert"}, {"points": [1]}, {"level": 2.5}, {"topic": 7}, "ai"):
+        with pytest.raises(InvalidPayload):
+            find_match_peer("a", payload)
+
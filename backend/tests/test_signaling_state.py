@@ -0,0 +1,173 @@
+import asyncio
+import pytest
+from signaling_models import Peer
+from signaling_state import LocalSignalingState, RedisSignalingState
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture(params=["local", "redis"])
+def state(request):
+    if request.param == "local":
+        return LocalSignalingState()
+    return RedisSignalingState(request.getfixturevalue("fake_redis"))
+
+
+async def _join(state, sid, topic="ai", **profile):
+    peer = await state.set_user(Peer(sid, topic=topic, **profile))
+    await state.enqueue(peer)
+    return peer
+
+
+def test_queue_is_fifo_and_cancellable(state):
+    async def scenario():
+        for sid in ("a", "b", "c"):
+            await _join(state, sid)
+
+        assert await state.remove_waiting("b")
+        assert not await state.remove_waiting("b")
+        assert (await state.pop_waiting("ai")).sid == "a"
+        assert (await state.pop_waiting("ai")).sid == "c"
+        assert await state.pop_waiting("ai") is None
+        assert await state.queue_depths() == {}
+
+    run(scenario())
+
+
+def test_waiting_pool_keeps_profile_and_wait_origin(state):
+    async def scenario():
+        peer = await state.set_user(Peer("a", "a@example.com", "ai", level=3, points=250))
+        await state.enqueue(peer, enqueued_at=100.0)
+
+        [peer] = await state.waiting_pool("ai", 10)
+        assert (peer.sid, peer.email, peer.level, peer.points) == ("a", "a@example.com", 3, 250)
+        assert peer.enqueued_at == 100.0
+
+    run(scenario())
+
+
+def test_claim_pair_only_when_both_waiting(state):
+    async def scenario():
+        await _join(state, "a")
+        await _join(state, "b")
+        await _join(state, "c", topic="law")
+
+        assert not await state.claim_pair("a", "c")
+        assert await state.claim_pair("a", "b")
+        assert not await state.claim_pair("a", "b")
+        assert await state.queue_depths() == {"law": 1}
+
+    run(scenario())
+
+
+def test_redis_user_records_expire_unless_touched(fake_redis):
+    async def scenario():
+        state = RedisSignalingState(fake_redis, user_ttl=60)
+        await state.set_user(Peer("a"))
+        await state.set_user(Peer("b"))
+
+        assert 0 < await fake_redis.pttl("signaling:user:a") <= 60_000
+
+        await fake_redis.pexpire("signaling:user:a", 10)
+        await state.touch(["a"])
+        assert await fake_redis.pttl("signaling:user:a") > 10_000
+
+    run(scenario())
+
+
+def test_redis_queue_skips_users_of_a_dead_worker(fake_redis):
+    async def scenario():
+        state = RedisSignalingState(fake_redis)
+        for sid in ("gone", "a", "also-gone", "b"):
+            await _join(state, sid)
+
+        # Their worker crashed, so nothing refreshed their records
+        await fake_redis.delete("signaling:user:gone", "signaling:user:also-gone")
+
+        assert [peer.sid for peer in await state.waiting_pool("ai", 10)] == ["a", "b"]
+        assert await state.queue_depths() == {"ai": 2}
+
+        await _join(state, "gone-again")
+        await state.claim_pair("a", "b")
+        await fake_redis.delete("signaling:user:gone-again")
+        assert await state.pop_waiting("ai") is None
+        assert await state.counts() == {"waiting_users": 0, "rooms": 0, "pending_acceptances": 0}
+
+    run(scenario())
+
+
+def test_concurrent_arrivals_are_matched_not_both_queued(state):
+    async def scenario():
+        users = [await state.set_user(Peer(f"u{i}", topic="ai")) for i in range(50)]
+        matches = await asyncio.gather(*(state.match_or_enqueue(user) for user in users))
+
+        # However the calls interleave, at most one user is left waiting
+        assert sum(match is not None for match in matches) == 25
+        assert await state.queue_depths() == {}
+
+    run(scenario())
+
+
+def test_redis_tick_lock_is_held_until_released(fake_redis):
+    async def scenario():
+        state = RedisSignalingState(fake_redis)
+        token = await state.acquire_tick(lease_ms=30_000)
+        assert token
+        assert await state.acquire_tick(lease_ms=30_000) is None
+
+        # Only the holder can release it, and it keeps it for `hold_ms`
+        await state.release_tick("someone-else", 0)
+        assert await state.acquire_tick(lease_ms=30_000) is None
+        await state.release_tick(token, 500)
+        assert 0 < await fake_redis.pttl("signaling:tick-lock") <= 500
+
+        await fake_redis.delete("signaling:tick-lock")
+        token = await state.acquire_tick(lease_ms=30_000)
+        await state.release_tick(token, -20)
+        assert await state.acquire_tick(lease_ms=30_000)
+
+    run(scenario())
+
+
+def test_accept_needs_an_open_offer(state):
+    async def scenario():
+        assert await state.accept("a", "b") is None
+        assert await state.counts() == {"waiting_users": 0, "rooms": 0, "pending_acceptances": 0}
+
+        await state.open_offer("a", "b", 30)
+        room_id, initiator = await state.accept("a", "b")
+        assert initiator is None
+        # Accepting twice before the partner answers does not open a second room
+        assert await state.accept("a", "b") == (room_id, None)
+        assert await state.counts() == {"waiting_users": 0, "rooms": 1, "pending_acceptances": 1}
+
+        assert await state.accept("b", "a") == (room_id, "a")
+        # Both accepting closed the offer, so nothing is left to expire or accept
+        assert await state.expire_offer("a", "b") is None
+        assert await state.accept("b", "a") is None
+        assert await state.counts() == {"waiting_users": 0, "rooms": 1, "pending_acceptances": 0}
+
+    run(scenario())
+
+
+def test_late_accept_after_expiry_leaves_nothing_behind(state):
+    async def scenario():
+        for sid in ("a", "b", "c", "d"):
+            await state.set_user(Peer(sid, topic="ai"))
+
+        # a accepted, the offer expired, then b's answer arrives
+        await state.open_offer("a", "b", 30)
+        await state.accept("a", "b")
+        assert await state.expire_offer("a", "b") == ["a"]
+        assert await state.accept("b", "a") is None
+
+        # c's offer to d was rejected before anyone accepted
+        await state.open_offer("c", "d", 30)
+        assert await state.expire_offer("c", "d") == []
+        assert await state.accept("c", "d") is None
+
+        assert await state.counts() == {"waiting_users": 0, "rooms": 0, "pending_acceptances": 0}
+
+    run(scenario())
@@ -0,0 +1,88 @@
+"""
+Throughput of the signaling server with several worker processes sharing
+matchmaking state through Redis. Needs TEST_REDIS_URL; the database is flushed.
+"""
+import asyncio
+import subprocess
+import time
+from urllib.parse import urlparse
+import pytest
+import redis
+import socketio
+from tests.signaling_server import start_server, stop_server
+
+
+def _start_server(redis_url: str, workers: int) -> (subprocess.Popen, int):
+    url = urlparse(redis_url)
+    return start_server({
+        "WEBSOCKET_WORKERS": str(workers),
+        "WEBSOCKET_USE_REDIS": "true",
+        "WEBSOCKET_DRAIN_GRACE_SECONDS": "0",
+        "REDIS_HOST": url.hostname,
+        "REDIS_PORT": str(url.port or 6379),
+        "REDIS_DB": url.path.lstrip("/") or "0"
+    })
+
+
+async def _match_everyone(port: int, clients: int) -> float:
+    """Connect `clients` users on one topic and return seconds until all are matched"""
+    matched = asyncio.Event()
+    found = {}
+    users = []
+
+    for _ in range(clients):
+        client = socketio.AsyncClient(reconnection=False)
+
+        def bind(client):
+            @client.on("match-request")
+            async def on_match_request(data):
+                await client.emit("accept_match", {"partnerId": data["partnerId"]})
+
+            @client.on("match-found")
+            async def on_match_found(data):
+                found[client.get_sid()] = data["partnerId"]
+                if len(found) == clients:
+                    matched.set()
+
+        bind(client)
+        await client.connect(f"http://127.0.0.1:{port}", transports=["websocket"])
+        users.append(client)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            client.emit("find_match", {"topic": "general", "email": f"user{i}@example.com"})
+            for i, client in enumerate(users)
+        ))
+        await asyncio.wait_for(matched.wait(), timeout=60)
+        elapsed = time.perf_counter() - started
+    finally:
+        await asyncio.gather(*(client.disconnect() for client in users))
+
+    # Every user was paired with someone who was paired back with them
+    assert all(found[partner] == sid for sid, partner in found.items())
+    return elapsed
+
+
+def _throughput(redis_url: str, workers: int, clients: int) -> float:
+    redis.Redis.from_url(redis_url).flushdb()
+    server, port = _start_server(redis_url, workers)
+    try:
+        elapsed = asyncio.run(_match_everyone(port, clients))
+    finally:
+        stop_server(server)
+        redis.Redis.from_url(redis_url).flushdb()
+
+    matches_per_second = clients / 2 / elapsed
+    print(f"{workers} workers, {clients} users: {matches_per_second:.0f} matches/s")
+    return matches_per_second
+
+
+def test_users_on_different_workers_are_matched(redis_url):
+    assert _throughput(redis_url, workers=2, clients=40) > 0
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_throughput_by_worker_count(redis_url, workers):
+    assert _throughput(redis_url, workers=workers, clients=1000) > 0
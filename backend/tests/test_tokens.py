@@ -0,0 +1,105 @@
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+import jwt as pyjwt
+import pytest
+from jose import jwt as jose_jwt
+from app.config.settings import settings
+from app.utils import security
+from app.utils.security import create_access_token, decode_token
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    security._token_cache.clear()
+    yield
+    security._token_cache.clear()
+
+
+@pytest.fixture
+def verifications(monkeypatch):
+    """Counts full signature verifications"""
+    calls = []
+    decode = security._decode
+
+    def counting_decode(token):
+        calls.append(token)
+        return decode(token)
+
+    monkeypatch.setattr(security, "_decode", counting_decode)
+    return calls
+
+
+def test_repeat_decodes_are_served_from_the_cache(verifications):
+    token = create_access_token({"sub": "user-1"})
+
+    assert decode_token(token)["sub"] == "user-1"
+    assert decode_token(token)["sub"] == "user-1"
+    assert len(verifications) == 1
+
+
+def test_callers_cannot_change_cached_claims():
+    token = create_access_token({"sub": "user-1"})
+    decode_token(token)["sub"] = "someone-else"
+
+    assert decode_token(token)["sub"] == "user-1"
+
+
+def test_invalid_tokens_are_rejected_and_not_cached(verifications):
+    token = create_access_token({"sub": "user-1"})
+    tampered = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+
+    assert decode_token(tampered) is None
+    assert decode_token("not-a-token") is None
+    assert len(security._token_cache) == 0
+    assert decode_token(token) is not None
+
+
+def test_cached_token_is_rejected_once_it_expires(monkeypatch, verifications):
+    token = create_access_token({"sub": "user-1"}, expires_delta=timedelta(minutes=10))
+    expires_at = decode_token(token)["exp"]
+
+    # The cache entry is still there, but the clock is past the token's `exp`
+    monkeypatch.setattr(security, "time", SimpleNamespace(time=lambda: expires_at + 1))
+
+    assert decode_token(token) is None
+    assert len(security._token_cache) == 0
+    assert len(verifications) == 1
+
+
+def test_cache_entry_lives_no_longer_than_the_token():
+    token = create_access_token({"sub": "user-1"}, expires_delta=timedelta(seconds=30))
+    decode_token(token)
+
+    [(_, expires_at)] = security._token_cache._data.values()
+    assert expires_at - time.monotonic() <= 30
+
+
+def test_backends_accept_each_others_tokens():
+    claims = {"sub": "user-1", "exp": int(time.time()) + 60}
+    jose_token = jose_jwt.encode(claims, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    pyjwt_token = pyjwt.encode(claims, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+    assert pyjwt.decode(jose_token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]) == claims
+    assert jose_jwt.decode(pyjwt_token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]) == claims
+
+
+def _per_second(verify, token, rounds: int = 20_000) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        verify(token)
+    return rounds / (time.perf_counter() - started)
+
+
+def test_verifications_per_second():
+    """Benchmark: python-jose, PyJWT and the claims cache"""
+    token = create_access_token({"sub": "user-1"})
+    key, algorithms = settings.JWT_SECRET_KEY, [settings.JWT_ALGORITHM]
+
+    jose_rate = _per_second(lambda t: jose_jwt.decode(t, key, algorithms=algorithms), token)
+    pyjwt_rate = _per_second(lambda t: pyjwt.decode(t, key, algorithms=algorithms), token)
+    cached_rate = _per_second(decode_token, token)
+    print(f"verifications/s: python-jose {jose_rate:.0f}, PyJWT {pyjwt_rate:.0f}, cached {cached_rate:.0f}")
+
+    assert pyjwt_rate > jose_rate
+    assert cached_rate > pyjwt_rate
@@ -0,0 +1,84 @@
+"""
+Atomic user stat counters. Needs TEST_DATABASE_URL.
+"""
+import asyncio
+import pytest
+from sqlalchemy import text
+from app.config.database import AsyncSessionLocal
+from app.repositories.unit_of_work import AsyncUnitOfWork
+from app.repositories.user_repository import AsyncUserRepository, _increment_stats_statement
+from tests.api import create_users, run
+
+ANALYSES = 50
+
+
+async def _totals(user_id: str) -> tuple:
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            text("SELECT points, debates_completed FROM users WHERE id = :id"), {"id": user_id}
+        )).first()
+        return tuple(row)
+
+
+async def _seed_user() -> str:
+    async with AsyncSessionLocal() as db:
+        [user_id] = await create_users(db, 1)
+        return user_id
+
+
+def test_concurrent_increments_are_not_lost(clean_db):
+    async def analysis(user_id: str, barrier: asyncio.Barrier):
+        async with AsyncSessionLocal() as db:
+            uow = AsyncUnitOfWork(db)
+            # Every analysis reaches the update before any of them commits
+            await barrier.wait()
+            async with uow:
+                await uow.users.increment_stats(user_id, points=7, debates_completed=1)
+
+    async def scenario():
+        user_id = await _seed_user()
+        barrier = asyncio.Barrier(ANALYSES)
+        await asyncio.gather(*(analysis(user_id, barrier) for _ in range(ANALYSES)))
+        return await _totals(user_id)
+
+    assert run(scenario()) == (7 * ANALYSES, ANALYSES)
+
+
+def test_load_modify_commit_loses_updates(clean_db):
+    """The pattern the atomic UPDATE replaced, for contrast"""
+    # Each analysis holds a connection while it waits, so stay inside the pool
+    analyses = 20
+
+    async def analysis(user_id: str, barrier: asyncio.Barrier):
+        async with AsyncSessionLocal() as db:
+            user = await AsyncUserRepository(db).get_by_id(user_id)
+            await barrier.wait()
+            user.points += 7
+            user.debates_completed += 1
+            await db.commit()
+
+    async def scenario():
+        user_id = await _seed_user()
+        barrier = asyncio.Barrier(analyses)
+        await asyncio.gather(*(analysis(user_id, barrier) for _ in range(analyses)))
+        return await _totals(user_id)
+
+    assert run(scenario()) == (7, 1)
+
+
+def test_increment_returns_new_totals(clean_db):
+    async def scenario():
+        user_id = await _seed_user()
+        async with AsyncSessionLocal() as db:
+            repo = AsyncUserRepository(db)
+            assert await repo.increment_points(user_id, 10) == {"points": 10, "debates_completed": 0, "streak_days": 0}
+            assert (await repo.increment_debates_completed(user_id))["debates_completed"] == 1
+            assert await repo.increment_stats("missing", points=1) is None
+            await db.commit()
+
+    run(scenario())
+
+
+def test_unknown_counters_are_refused():
+    with pytest.raises(ValueError, match="level"):
+        _increment_stats_statement("user-1", {"points": 1, "level": 1})
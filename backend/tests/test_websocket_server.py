@@ -0,0 +1,329 @@
+import asyncio
+import time
+import tracemalloc
+import pytest
+import websocket_server
+from ice_batching import IceCoalescer
+from signaling_models import Peer
+from signaling_state import LocalSignalingState, RedisSignalingState
+from timer_wheel import TimerWheel
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    """Events the server emits, as (event, data, room), instead of sending them"""
+    events = []
+
+    async def emit(event, data=None, room=None, **kwargs):
+        events.append((event, data, room))
+
+    monkeypatch.setattr(websocket_server.sio, "emit", emit)
+    return events
+
+
+@pytest.fixture
+def server(monkeypatch, emitted):
+    """websocket_server with fresh single-worker state"""
+    async def room_change(sid, room, **kwargs):
+        pass
+
+    monkeypatch.setattr(websocket_server.sio, "enter_room", room_change)
+    monkeypatch.setattr(websocket_server.sio, "leave_room", room_change)
+    monkeypatch.setattr(websocket_server, "state", LocalSignalingState())
+    monkeypatch.setattr(websocket_server, "relay_rooms", {})
+    monkeypatch.setattr(websocket_server, "batched_ice_senders", set())
+    monkeypatch.setattr(websocket_server, "local_sids", set())
+    monkeypatch.setattr(websocket_server, "offer_timers", TimerWheel(tick=1.0))
+    return websocket_server
+
+
+async def _matched_pair(server, sid="a", partner_sid="b", ice_batch=False):
+    for user in (sid, partner_sid):
+        await server.state.set_user(Peer(user, topic="ai", ice_batch=ice_batch))
+    await server.state.open_offer(sid, partner_sid, 30)
+    await server.accept_match(sid, {"partnerId": partner_sid})
+    await server.accept_match(partner_sid, {"partnerId": sid})
+    return server.relay_rooms[sid]
+
+
+def test_tick_budget_is_checked_between_pairs(server, monkeypatch):
+    sent = []
+
+    async def slow_send(sid, email, partner_sid, partner_email, topic):
+        sent.append((sid, partner_sid))
+        await asyncio.sleep(0.005)
+
+    monkeypatch.setattr(server, "send_match_request", slow_send)
+    monkeypatch.setattr(server.settings, "MATCHMAKING_TICK_BUDGET_MS", 20)
+
+    async def scenario():
+        for i in range(200):
+            await server.state.enqueue(await server.state.set_user(Peer(f"u{i}", topic="ai")))
+
+        visited = await server.run_matchmaking_tick(["ai", "law"])
+        return visited
+
+    visited = run(scenario())
+
+    # One topic of 100 pairs is cut off part way, so it is not counted as done
+    assert 0 < len(sent) < 20
+    assert visited == 0
+    assert len(server.state.match_queue) == 200 - 2 * len(sent)
+
+
+def test_relay_goes_to_the_room_without_a_state_lookup(server, emitted, monkeypatch):
+    relay = server.make_relay("offer")
+
+    async def scenario():
+        room_id = await _matched_pair(server)
+        assert server.relay_rooms == {"a": room_id, "b": room_id}
+
+        async def no_lookups(sid):
+            raise AssertionError("relay looked up the partner")
+
+        monkeypatch.setattr(server.state, "peer_of", no_lookups)
+        emitted.clear()
+        await relay("a", {"sdp": "v=0", "target": "someone-else"})
+        assert emitted == [("offer", {"sdp": "v=0", "sender": "a"}, room_id)]
+
+        # Leaving drops the cached room, so later relays go nowhere
+        await server.leave_room("a", {})
+        await server.disconnect("b")
+        assert server.relay_rooms == {}
+        emitted.clear()
+        await relay("a", {"sdp": "v=0"})
+        assert emitted == []
+
+    run(scenario())
+
+
+def test_ice_candidates_are_batched_for_partners_that_accept_batches(server, emitted, monkeypatch):
+    monkeypatch.setattr(server, "ice_coalescer", IceCoalescer(10, server.flush_ice_candidates))
+    relay = server.make_relay("ice_candidate")
+
+    async def scenario():
+        room_id = await _matched_pair(server, ice_batch=True)
+        emitted.clear()
+
+        await asyncio.gather(*(relay("a", {"candidate": {"candidate": f"c{i}"}}) for i in range(5)))
+        await relay("a", {"candidate": None})
+        return room_id
+
+    room_id = run(scenario())
+
+    [(event, data, room)] = emitted
+    assert (event, room, data["complete"], data["sender"]) == ("ice_candidates", room_id, True, "a")
+    assert data["candidates"] == [{"candidate": f"c{i}"} for i in range(5)]
+
+
+async def _relays_per_second(relay, sid, messages):
+    started = time.perf_counter()
+    for _ in range(messages):
+        await relay(sid, {"candidate": "candidate:1 1 udp 2122260223 10.0.0.1 50000 typ host"})
+    return messages / (time.perf_counter() - started)
+
+
+def test_relay_throughput_with_cached_room(server, fake_redis, monkeypatch):
+    """Benchmark: relayed messages/s, partner looked up in Redis vs cached room"""
+    monkeypatch.setattr(server, "state", RedisSignalingState(fake_redis))
+
+    async def lookup_relay(sid, data):
+        # What every relay did before: one Redis round trip for the partner
+        peer_sid = await server.state.peer_of(sid)
+        data["sender"] = sid
+        await server.sio.emit("ice_candidate", data, room=peer_sid)
+
+    async def scenario():
+        await _matched_pair(server)
+        lookup = await _relays_per_second(lookup_relay, "a", 2000)
+        cached = await _relays_per_second(server.make_relay("ice_candidate"), "a", 2000)
+        return lookup, cached
+
+    lookup, cached = run(scenario())
+    print(f"relays/s: partner lookup {lookup:.0f}, cached room {cached:.0f}")
+
+    assert cached > lookup * 2
+
+
+def test_metrics_view_reports_handlers_and_state(server):
+    async def failing(sid, data):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        await server.state.enqueue(await server.state.set_user(Peer("waiting", topic="ai")))
+        await _matched_pair(server)
+        with pytest.raises(RuntimeError):
+            await server.instrument("test_failing", failing)("a", {})
+        response = await server.metrics_view(None)
+        return response.text
+
+    text = run(scenario())
+
+    assert 'signaling_event_errors_total{event="test_failing"} 1' in text
+    assert 'signaling_event_duration_seconds_count{event="test_failing"}' in text
+    assert "signaling_waiting_users 1" in text
+    assert "signaling_rooms 1" in text
+    assert "signaling_pending_acceptances 0" in text
+
+
+def test_late_accept_is_refused_and_told(server, emitted):
+    async def scenario():
+        for sid in ("a", "b"):
+            await server.connect(sid, {})
+            await server.find_match(sid, {"topic": "ai"})
+        await server.reject_match("a", {"partnerId": "b"})
+        emitted.clear()
+
+        await server.accept_match("b", {"partnerId": "a"})
+        return await server.state.counts()
+
+    counts = run(scenario())
+
+    assert emitted == [("match-unavailable", {"partnerId": "a"}, "b")]
+    assert counts["rooms"] == counts["pending_acceptances"] == 0
+
+
+@pytest.mark.parametrize("ending", ["expiry", "rejection"])
+def test_relay_stops_once_a_half_accepted_offer_ends(server, emitted, monkeypatch, ending):
+    left = []
+
+    async def leave_room(sid, room, **kwargs):
+        left.append((sid, room))
+
+    monkeypatch.setattr(server.sio, "leave_room", leave_room)
+    relay = server.make_relay("signal")
+
+    async def scenario():
+        for sid in ("a", "b"):
+            await server.state.set_user(Peer(sid, topic="ai"))
+        await server.state.open_offer("a", "b", 30)
+        await server.accept_match("a", {"partnerId": "b"})
+        room_id = server.relay_rooms["a"]
+
+        if ending == "expiry":
+            await server.expire_match_offer("a", "b")
+        else:
+            await server.reject_match("b", {"partnerId": "a"})
+
+        emitted.clear()
+        await relay("a", {"sdp": "v=0"})
+        return room_id
+
+    room_id = run(scenario())
+    assert emitted == []
+    assert server.relay_rooms == {}
+    assert left == [("a", room_id)]
+
+
+def test_malformed_find_match_is_refused_not_crashed(server, emitted):
+    async def scenario():
+        await server.connect("a", {})
+        emitted.clear()
+        await server.find_match("a", {"topic": "ai", "level": "expert"})
+        return await server.state.queue_depths()
+
+    assert run(scenario()) == {}
+    [(event, data, room)] = emitted
+    assert (event, data["event"], room) == ("invalid-request", "find_match", "a")
+
+
+class AbandonCycles:
+    """Pairs of users who connect, get matched and walk away in different ways"""
+
+    def __init__(self, server):
+        self.server = server
+        self.clock = time.monotonic()
+
+    async def expire_offers(self):
+        self.clock += self.server.settings.MATCH_OFFER_TIMEOUT_SECONDS + 1
+        for (sid, partner_sid), _ in self.server.offer_timers.advance(self.clock):
+            await self.server.expire_match_offer(sid, partner_sid)
+
+    async def cycle(self, i):
+        server = self.server
+        a, b = f"{i}a", f"{i}b"
+        for sid in (a, b):
+            await server.connect(sid, {})
+            await server.find_match(sid, {"topic": "ai", "email": f"{sid}@example.com"})
+
+        variant = i % 5
+        if variant == 0:
+            # Nobody answers
+            await self.expire_offers()
+        elif variant == 1:
+            # One accepts, the other closes the tab
+            await server.accept_match(a, {"partnerId": b})
+            await server.disconnect(b)
+            await self.expire_offers()
+        elif variant == 2:
+            # One accepts, the other answers after the offer expired
+            await server.accept_match(a, {"partnerId": b})
+            await self.expire_offers()
+            await server.accept_match(b, {"partnerId": a})
+        elif variant == 3:
+            # One rejects, the other accepts afterwards
+            await server.reject_match(b, {"partnerId": a})
+            await server.accept_match(a, {"partnerId": b})
+        else:
+            # Both accept, talk, and one leaves the room
+            await server.accept_match(a, {"partnerId": b})
+            await server.accept_match(b, {"partnerId": a})
+            await server.leave_room(a, {})
+
+        for sid in (a, b):
+            if sid in server.local_sids:
+                await server.disconnect(sid)
+
+    def assert_empty(self):
+        server = self.server
+        state = server.state
+        assert (state.peers, state.rooms, state.pending_rooms, state.offers) == ({}, {}, set(), set())
+        assert len(state.match_queue) == 0
+        assert len(server.offer_timers) == 0
+        assert (server.local_sids, server.relay_rooms) == (set(), {})
+
+
+def _soak(server, cycles):
+    abandon = AbandonCycles(server)
+
+    async def scenario():
+        for i in range(1000):
+            await abandon.cycle(i)
+        abandon.assert_empty()
+
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            for i in range(1000, 1000 + cycles):
+                await abandon.cycle(i)
+            grown = tracemalloc.get_traced_memory()[0] - baseline
+        finally:
+            tracemalloc.stop()
+        abandon.assert_empty()
+        return grown
+
+    grown = run(scenario())
+    print(f"{cycles} connect/abandon cycles: {grown / 1024:.1f} KiB retained")
+
+    # Whatever is retained does not scale with the number of cycles
+    assert grown < 256 * 1024
+
+
+def test_connect_abandon_soak_keeps_memory_bounded(server, emitted, monkeypatch):
+    """Soak test: connect/abandon cycles leave no state behind"""
+    monkeypatch.setattr(server.sio, "emit", _discard_emit)
+    _soak(server, 20_000)
+
+
+@pytest.mark.slow
+def test_million_connect_abandon_cycles(server, monkeypatch):
+    monkeypatch.setattr(server.sio, "emit", _discard_emit)
+    _soak(server, 1_000_000)
+
+
+async def _discard_emit(*args, **kwargs):
+    pass
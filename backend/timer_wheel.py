@@ -0,0 +1,61 @@
+"""
+Hashed timer wheel for cheap, cancellable timeouts.
+
+Each timer lives in one slot of a fixed ring, so schedule and cancel are O(1)
+and advancing the wheel only touches the slots that came due. Timeouts longer
+than one revolution carry a round counter that is decremented each pass.
+"""
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import math
+import time
+
+
+class TimerWheel:
+    """Ring of `slots` buckets, each covering `tick` seconds"""
+
+    def __init__(self, tick: float = 1.0, slots: int = 512):
+        self.tick = tick
+        self.slots = slots
+        self._wheel: List[Dict[Hashable, list]] = [{} for _ in range(slots)]
+        self._index: Dict[Hashable, int] = {}
+        self._cursor = 0
+        self._last = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def schedule(self, key: Hashable, delay: float, payload: Any = None) -> None:
+        """Fire `key` after roughly `delay` seconds, replacing any existing timer"""
+        self.cancel(key)
+
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._cursor + ticks) % self.slots
+        self._wheel[slot][key] = [(ticks - 1) // self.slots, payload]
+        self._index[key] = slot
+
+    def cancel(self, key: Hashable) -> Optional[Any]:
+        """Remove a pending timer, returning its payload"""
+        slot = self._index.pop(key, None)
+        if slot is None:
+            return None
+        return self._wheel[slot].pop(key)[1]
+
+    def advance(self, now: Optional[float] = None) -> List[Tuple[Hashable, Any]]:
+        """Move the wheel up to `now` and return the timers that expired"""
+        now = time.monotonic() if now is None else now
+        expired = []
+
+        while self._last + self.tick <= now:
+            self._last += self.tick
+            self._cursor = (self._cursor + 1) % self.slots
+
+            bucket = self._wheel[self._cursor]
+            for key, entry in list(bucket.items()):
+                if entry[0] > 0:
+                    entry[0] -= 1
+                    continue
+                del bucket[key]
+                del self._index[key]
+                expired.append((key, entry[1]))
+
+        return expired
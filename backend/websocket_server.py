@@ -1,104 +1,212 @@
 import socketio
 from aiohttp import web
 import asyncio
-from typing import Dict, Set
+import multiprocessing
+import random
+import secrets
+import time
 import uuid
+from app.config.settings import settings
+from app.utils.logger import SampledLogger, enable_queue_logging, websocket_logger
+from app.utils.metrics import CONTENT_TYPE, registry
+from handoff import FileHandoffStore, RedisHandoffStore
+from ice_batching import IceCoalescer
+from matchmaking import BatchMatcher, MatchmakingStats
+from signaling_models import InvalidPayload, Peer, find_match_peer
+from signaling_state import LocalSignalingState, RedisSignalingState, offer_key
+from timer_wheel import TimerWheel
+
+if settings.WEBSOCKET_USE_REDIS:
+    # Every worker subscribes to the same Redis channel, so an emit to a sid
+    # reaches it whichever worker holds its connection
+    import redis.asyncio as aioredis
+
+    redis_client = aioredis.from_url(settings.REDIS_URL)
+    client_manager = socketio.AsyncRedisManager(settings.REDIS_URL)
+    state = RedisSignalingState(redis_client, user_ttl=settings.WEBSOCKET_USER_TTL_SECONDS)
+    handoff = RedisHandoffStore(redis_client, settings.WEBSOCKET_HANDOFF_WINDOW_SECONDS)
+else:
+    client_manager = None
+    state = LocalSignalingState()
+    handoff = FileHandoffStore(settings.WEBSOCKET_HANDOFF_PATH, settings.WEBSOCKET_HANDOFF_WINDOW_SECONDS)
 
 sio = socketio.AsyncServer(
     async_mode='aiohttp',
+    client_manager=client_manager,
+    # Long-polling requests would land on whichever worker the kernel picks
+    transports=['websocket'] if settings.WEBSOCKET_WORKERS > 1 else ['polling', 'websocket'],
     cors_allowed_origins='*',
-    logger=True,
-    engineio_logger=True
+    logger=settings.WEBSOCKET_SOCKETIO_LOGGER,
+    engineio_logger=settings.WEBSOCKET_ENGINEIO_LOGGER
 )
 
 app = web.Application()
 sio.attach(app)
 
-waiting_users: Dict[str, Dict] = {}
-rooms: Dict[str, Set[str]] = {}
-user_rooms: Dict[str, str] = {}
-user_info: Dict[str, Dict] = {}
-pending_acceptances: Dict[str, Set[str]] = {}  # room_id -> set of sids who accepted
+websocket_logger.set_level(settings.WEBSOCKET_LOG_LEVEL)
+relay_logger = SampledLogger(websocket_logger, every=settings.WEBSOCKET_LOG_SAMPLE_EVERY)
 
+event_duration = registry.histogram(
+    'signaling_event_duration_seconds', 'Socket.IO handler latency', ('event',)
+)
+event_errors = registry.counter(
+    'signaling_event_errors_total', 'Socket.IO handlers that raised', ('event',)
+)
+loop_lag = registry.histogram(
+    'signaling_event_loop_lag_seconds', 'Delay of a periodic wake-up on the event loop'
+)
+connected_sids = registry.gauge('signaling_connected_sids', 'Clients connected to this worker')
+state_gauges = {
+    'waiting_users': registry.gauge('signaling_waiting_users', 'Users waiting for a match'),
+    'rooms': registry.gauge('signaling_rooms', 'Open debate rooms'),
+    'pending_acceptances': registry.gauge(
+        'signaling_pending_acceptances', 'Rooms waiting for the second acceptance'
+    )
+}
+match_wait = registry.gauge(
+    'signaling_time_to_match_seconds', 'Recent time-to-match percentiles', ('quantile',)
+)
+tick_duration = registry.gauge('signaling_matchmaking_tick_seconds', 'Duration of the last matchmaking tick')
+
+LOOP_LAG_INTERVAL = 0.5
+
+# How long a worker that dies mid-tick can keep the others from matching
+TICK_LOCK_LEASE_MS = 30_000
+
+
+def instrument(name, handler):
+    async def wrapper(*args):
+        started = time.perf_counter()
+        try:
+            return await handler(*args)
+        except Exception:
+            event_errors.inc(name)
+            raise
+        finally:
+            event_duration.observe(time.perf_counter() - started, name)
+
+    return wrapper
+
+
+def sio_event(handler):
+    """Register a Socket.IO handler with latency and error metrics"""
+    sio.on(handler.__name__, instrument(handler.__name__, handler))
+    return handler
+
+matcher = BatchMatcher(
+    base_tolerance=settings.MATCHMAKING_BASE_TOLERANCE,
+    tolerance_per_second=settings.MATCHMAKING_TOLERANCE_PER_SECOND,
+    max_pool=settings.MATCHMAKING_MAX_POOL
+)
+matchmaking_stats = MatchmakingStats()
 
-@sio.event
+# Unanswered match offers expire through a timer wheel instead of lingering
+offer_timers = TimerWheel(tick=1.0)
+
+# Sids connected to this worker, and whether it is draining for a restart
+local_sids = set()
+draining = False
+
+# Room each local sid relays WebRTC signaling to. Only the sid's own worker
+# moves it between rooms, so relays never need to look the partner up
+relay_rooms = {}
+
+# Local sids whose partner takes batched `ice_candidates`, decided at accept
+batched_ice_senders = set()
+
+
+def reconnect_delay():
+    """Spread reconnects out so a restart does not bring every client back at once"""
+    return random.randint(0, settings.WEBSOCKET_RECONNECT_SPREAD_MS)
+
+
+@sio_event
 async def connect(sid, environ):
-    print(f'Client connected: {sid}')
+    websocket_logger.debug("Client connected", {"sid": sid})
+    connected_sids.inc()
+    local_sids.add(sid)
     await sio.emit('connected', {'sid': sid}, room=sid)
 
 
-@sio.event
+@sio_event
 async def disconnect(sid):
-    print(f'Client disconnected: {sid}')
+    websocket_logger.debug("Client disconnected", {"sid": sid})
+    connected_sids.dec()
+    local_sids.discard(sid)
+    forget_relay_room(sid)
+
+    await state.remove_waiting(sid)
+
+    left = await state.leave_room(sid)
+    if left:
+        room_id, remaining = left
+        for other_user in remaining:
+            await sio.emit('peer-disconnected', {'userId': sid}, room=other_user)
 
-    if sid in waiting_users:
-        del waiting_users[sid]
+    await state.drop_user(sid)
 
-    if sid in user_rooms:
-        room_id = user_rooms[sid]
-        if room_id in rooms:
-            rooms[room_id].discard(sid)
 
-            for other_user in rooms[room_id]:
-                await sio.emit('peer-disconnected', {'userId': sid}, room=other_user)
+async def send_match_request(sid, user_email, partner_sid, partner_email, topic):
+    # Opened first: an accept that arrives before it would be refused
+    timeout = settings.MATCH_OFFER_TIMEOUT_SECONDS
+    await state.open_offer(sid, partner_sid, timeout)
+    offer_timers.schedule(offer_key(sid, partner_sid), timeout)
 
-            if len(rooms[room_id]) == 0:
-                del rooms[room_id]
+    await sio.emit('match-request', {
+        'partnerId': sid,
+        'partnerEmail': user_email,
+        'topic': topic
+    }, room=partner_sid)
 
-        del user_rooms[sid]
-    
-    # Clean up pending acceptances
-    for room_id, accepted_sids in list(pending_acceptances.items()):
-        if sid in accepted_sids:
-            accepted_sids.discard(sid)
-            if len(accepted_sids) == 0:
-                del pending_acceptances[room_id]
+    await sio.emit('match-request', {
+        'partnerId': partner_sid,
+        'partnerEmail': partner_email,
+        'topic': topic
+    }, room=sid)
 
-    if sid in user_info:
-        del user_info[sid]
+    websocket_logger.info("Match request sent", {"sid": sid, "partner_sid": partner_sid, "topic": topic})
 
 
-@sio.event
+@sio_event
 async def find_match(sid, data):
     """Find a debate partner"""
-    topic = data.get('topic', 'general')
-    user_email = data.get('email', 'Anonymous')
-
-    print(f'User {sid} ({user_email}) looking for match on topic: {topic}')
+    if draining:
+        await sio.emit('server-draining', {'reconnectIn': reconnect_delay()}, room=sid)
+        return
 
-    user_info[sid] = {'email': user_email, 'topic': topic}
+    try:
+        peer = find_match_peer(sid, data)
+    except InvalidPayload as e:
+        await sio.emit('invalid-request', {'event': 'find_match', 'message': str(e)}, room=sid)
+        websocket_logger.debug("Malformed find_match", {"sid": sid, "error": str(e)})
+        return
 
-    matched = False
-    for waiting_sid, waiting_data in list(waiting_users.items()):
-        if waiting_data['topic'] == topic and waiting_sid != sid:
-            partner_sid = waiting_sid
-            del waiting_users[partner_sid]
+    topic = peer.topic
+    user_email = peer.email
 
-            partner_email = user_info.get(partner_sid, {}).get('email', 'Anonymous')
+    websocket_logger.debug("Looking for match", {"sid": sid, "topic": topic})
 
-            await sio.emit('match-request', {
-                'partnerId': sid,
-                'partnerEmail': user_email,
-                'topic': topic
-            }, room=partner_sid)
+    user = await state.set_user(peer)
 
-            await sio.emit('match-request', {
-                'partnerId': partner_sid,
-                'partnerEmail': partner_email,
-                'topic': topic
-            }, room=sid)
+    # A repeated find_match must not pair the user with themselves
+    await state.remove_waiting(sid)
 
-            print(f'Match request sent: {sid} ({user_email}) <-> {partner_sid} ({partner_email}) on topic: {topic}')
-            matched = True
-            break
+    # With a matchmaking tick configured, pairing is left to the batch matcher
+    if settings.MATCHMAKING_TICK_MS:
+        await state.enqueue(user)
+        match = None
+    else:
+        match = await state.match_or_enqueue(user)
 
-    if not matched:
-        waiting_users[sid] = {'topic': topic, 'email': user_email}
+    if match:
+        matchmaking_stats.record_match(time.time() - match.enqueued_at, 0.0)
+        await send_match_request(sid, user_email, match.sid, match.email, topic)
+    else:
         await sio.emit('waiting', {'message': f'Looking for a debate partner on {topic}...'}, room=sid)
-        print(f'User {sid} ({user_email}) added to waiting list for topic: {topic}')
+        websocket_logger.debug("Added to waiting list", {"sid": sid, "topic": topic})
 
 
-@sio.event
+@sio_event
 async def accept_match(sid, data):
     """Accept a match with a partner"""
     partner_sid = data.get('partnerId')
@@ -106,41 +214,29 @@ async def accept_match(sid, data):
     if not partner_sid:
         return
 
-    # Check if partner has already accepted (they would have created a room)
-    # Look for a room where partner_sid is waiting
-    room_id = None
-    initiator_sid = None
-    
-    # Check if partner already accepted and is waiting
-    if partner_sid in user_rooms:
-        room_id = user_rooms[partner_sid]
-        if room_id in pending_acceptances:
-            # Partner is waiting, this is the second acceptance
-            pending_acceptances[room_id].add(sid)
-            initiator_sid = list(pending_acceptances[room_id])[0]
-    else:
-        # This is the first acceptance, create new room
-        room_id = str(uuid.uuid4())
-        rooms[room_id] = {sid, partner_sid}
-        pending_acceptances[room_id] = {sid}
-        user_rooms[sid] = room_id
-        await sio.enter_room(sid, room_id)
-    
-    # Check if both users have accepted
-    if room_id in pending_acceptances and len(pending_acceptances[room_id]) == 2:
-        # Both users accepted, emit match-found to both
-        if partner_sid not in user_rooms:
-            user_rooms[partner_sid] = room_id
-            await sio.enter_room(partner_sid, room_id)
-        
-        if sid not in user_rooms:
-            user_rooms[sid] = room_id
-            await sio.enter_room(sid, room_id)
-        
-        # Determine initiator (first to accept)
-        if not initiator_sid:
-            initiator_sid = list(pending_acceptances[room_id])[0]
-        
+    accepted = await state.accept(sid, partner_sid)
+    if accepted is None:
+        # The offer expired, was rejected or is already taken up
+        await sio.emit('match-unavailable', {'partnerId': partner_sid}, room=sid)
+        websocket_logger.debug("Late match acceptance refused", {"sid": sid, "partner_sid": partner_sid})
+        return
+
+    room_id, initiator_sid = accepted
+    await sio.enter_room(sid, room_id)
+    relay_rooms[sid] = room_id
+
+    if ice_coalescer is not None:
+        partner = await state.get_user(partner_sid)
+        if partner is not None and partner.ice_batch:
+            batched_ice_senders.add(sid)
+        else:
+            batched_ice_senders.discard(sid)
+
+    if initiator_sid:
+        # Both users accepted; the first to accept initiates the WebRTC offer
+        # Accepting closed the offer; its timer has nothing left to expire
+        offer_timers.cancel(offer_key(sid, partner_sid))
+
         await sio.emit('match-found', {
             'roomId': room_id,
             'partnerId': partner_sid,
@@ -153,123 +249,417 @@ async def accept_match(sid, data):
             'initiator': (partner_sid == initiator_sid)
         }, room=partner_sid)
 
-        print(f'Match accepted by both: {sid} <-> {partner_sid} in room {room_id}')
-        # Clean up pending acceptances
-        del pending_acceptances[room_id]
+        websocket_logger.info("Match accepted by both", {"sid": sid, "partner_sid": partner_sid, "room_id": room_id})
     else:
         # Only one user accepted so far, notify them they're waiting
         await sio.emit('match-accepted-waiting', {
             'message': 'Waiting for partner to accept...'
         }, room=sid)
-        print(f'Match partially accepted: {sid} accepted, waiting for {partner_sid}')
+        websocket_logger.debug("Match partially accepted", {"sid": sid, "partner_sid": partner_sid})
 
 
-@sio.event
+@sio_event
 async def reject_match(sid, data):
     """Reject a match with a partner"""
     partner_sid = data.get('partnerId')
 
+    if partner_sid:
+        # Also frees the room if the partner had already accepted
+        offer_timers.cancel(offer_key(sid, partner_sid))
+        if await state.expire_offer(sid, partner_sid) is not None:
+            for user_sid in (sid, partner_sid):
+                await leave_pending_room(user_sid)
+
     await sio.emit('match-rejected', {}, room=partner_sid)
     await sio.emit('match-rejected', {}, room=sid)
 
-    print(f'Match rejected: {sid} rejected {partner_sid}')
+    websocket_logger.info("Match rejected", {"sid": sid, "partner_sid": partner_sid})
+
+    user = await state.get_user(sid)
+    if user:
+        await state.enqueue(user)
+
 
-    if sid in user_info:
-        topic = user_info[sid]['topic']
-        email = user_info[sid]['email']
-        waiting_users[sid] = {'topic': topic, 'email': email}
+@sio_event
+async def resume(sid, data):
+    """Restore a queue position or room handed over by the previous process"""
+    entry = await handoff.claim(str(data.get('token', '')))
+    if entry is None:
+        await sio.emit('resume-failed', {}, room=sid)
+        return
+
+    user = await state.set_user(Peer(
+        sid, entry['email'], entry['topic'], entry['level'], entry['points'], entry['ice_batch']
+    ))
+
+    if entry['room']:
+        await state.restore_room(entry['room'], sid)
+        await sio.enter_room(sid, entry['room'])
+        relay_rooms[sid] = entry['room']
+        await sio.emit('resumed', {'roomId': entry['room']}, room=sid)
+    else:
+        await state.enqueue(user, entry['enqueued_at'])
+        await sio.emit('resumed', {'topic': user.topic}, room=sid)
+
+    websocket_logger.debug("Session resumed", {"sid": sid, "room_id": entry['room']})
 
 
-@sio.event
+@sio_event
 async def cancel_search(sid, data):
     """Cancel the search for a partner"""
-    if sid in waiting_users:
-        del waiting_users[sid]
+    if await state.remove_waiting(sid):
         await sio.emit('search-cancelled', {}, room=sid)
-        print(f'User {sid} cancelled search')
+        websocket_logger.debug("Search cancelled", {"sid": sid})
+
 
+# WebRTC signaling events forwarded verbatim to the other member of the room
+RELAYED_EVENTS = ('signal', 'offer', 'answer', 'ice_candidate')
 
-@sio.event
-async def signal(sid, data):
-    """Forward WebRTC signaling data between peers"""
-    target = data.get('target')
-    signal_data = data.get('signal')
 
-    if target:
-        await sio.emit('signal', {
-            'signal': signal_data,
-            'sender': sid
-        }, room=target)
+def make_relay(event):
+    async def relay(sid, data):
+        """Forward a WebRTC signaling payload to the sender's room partner"""
+        # The partner is whoever else is in the sender's room; a client-supplied
+        # target is ignored. A partner who left the room no longer receives it
+        room_id = relay_rooms.get(sid)
+        if room_id is None or not isinstance(data, dict):
+            return
 
+        if event == 'ice_candidate' and sid in batched_ice_senders:
+            await ice_coalescer.add(sid, room_id, data.get('candidate'))
+            return
 
-@sio.event
-async def offer(sid, data):
-    """Forward WebRTC offer"""
-    target = data.get('target')
-    offer_data = data.get('offer')
+        relay_logger.log(event, "Relaying signaling event", {"event": event, "sid": sid})
 
-    if target:
-        await sio.emit('offer', {
-            'offer': offer_data,
-            'sender': sid
-        }, room=target)
+        # Reuse the decoded payload rather than rebuilding it per event
+        data.pop('target', None)
+        data['sender'] = sid
+        await sio.emit(event, data, room=room_id, skip_sid=sid)
 
+    return relay
 
-@sio.event
-async def answer(sid, data):
-    """Forward WebRTC answer"""
-    target = data.get('target')
-    answer_data = data.get('answer')
 
-    if target:
-        await sio.emit('answer', {
-            'answer': answer_data,
-            'sender': sid
-        }, room=target)
+def forget_relay_room(sid):
+    relay_rooms.pop(sid, None)
+    batched_ice_senders.discard(sid)
+    if ice_coalescer is not None:
+        ice_coalescer.discard(sid)
 
 
-@sio.event
-async def ice_candidate(sid, data):
-    """Forward ICE candidate"""
-    target = data.get('target')
-    candidate = data.get('candidate')
+async def leave_pending_room(sid):
+    """Take `sid` out of the room of an offer that fell through, if it accepted here"""
+    room_id = relay_rooms.get(sid)
+    forget_relay_room(sid)
+    if room_id is not None:
+        await sio.leave_room(sid, room_id)
+
+
+async def flush_ice_candidates(sender, room_id, candidates, complete):
+    await sio.emit('ice_candidates', {
+        'candidates': candidates,
+        'complete': complete,
+        'sender': sender
+    }, room=room_id, skip_sid=sender)
 
-    if target:
-        await sio.emit('ice_candidate', {
-            'candidate': candidate,
-            'sender': sid
-        }, room=target)
 
+for event in RELAYED_EVENTS:
+    sio.on(event, instrument(event, make_relay(event)))
 
-@sio.event
+ice_coalescer = IceCoalescer(
+    settings.ICE_BATCH_WINDOW_MS / 1000,
+    flush_ice_candidates
+) if settings.ICE_BATCH_WINDOW_MS else None
+
+
+@sio_event
 async def leave_room(sid, data):
     """Leave the current debate room"""
-    if sid in user_rooms:
-        room_id = user_rooms[sid]
+    forget_relay_room(sid)
+    left = await state.leave_room(sid)
+    if left:
+        room_id, remaining = left
+        for other_user in remaining:
+            await sio.emit('peer-left', {'userId': sid}, room=other_user)
+
+        await sio.leave_room(sid, room_id)
+        await sio.emit('left-room', {}, room=sid)
 
-        if room_id in rooms:
-            rooms[room_id].discard(sid)
 
-            for other_user in rooms[room_id]:
-                await sio.emit('peer-left', {'userId': sid}, room=other_user)
+async def expire_match_offer(sid, partner_sid):
+    """Cancel an offer nobody finished answering, re-queueing whoever accepted"""
+    acceptors = await state.expire_offer(sid, partner_sid)
+    if acceptors is None:
+        return
 
-            if len(rooms[room_id]) == 0:
-                del rooms[room_id]
+    for user_sid in (sid, partner_sid):
+        await leave_pending_room(user_sid)
+        requeued = False
+        if user_sid in acceptors:
+            user = await state.get_user(user_sid)
+            if user:
+                await state.enqueue(user)
+                requeued = True
+
+        await sio.emit('match-expired', {'requeued': requeued}, room=user_sid)
+
+    websocket_logger.info("Match offer expired", {
+        "sid": sid,
+        "partner_sid": partner_sid,
+        "requeued": acceptors
+    })
+
+
+async def offer_reaper():
+    while True:
+        await asyncio.sleep(offer_timers.tick)
+        for (sid, partner_sid), _ in offer_timers.advance():
+            try:
+                await expire_match_offer(sid, partner_sid)
+            except Exception as e:
+                websocket_logger.error("Failed to expire match offer", {"error": str(e)}, exc_info=True)
+
+
+async def run_matchmaking_tick(topics):
+    """
+    Pair waiting users topic by topic until the tick's time budget runs out.
+
+    Returns how many topics were fully processed; a topic cut off part way
+    is not counted, so the next tick starts with it.
+    """
+    started = time.perf_counter()
+    budget = settings.MATCHMAKING_TICK_BUDGET_MS / 1000
+    visited = 0
+
+    for topic in topics:
+        if time.perf_counter() - started > budget:
+            break
 
-        await sio.leave_room(sid, room_id)
-        del user_rooms[sid]
+        pool = await state.waiting_pool(topic, matcher.max_pool)
+        now = time.time()
 
-        await sio.emit('left-room', {}, room=sid)
+        finished = True
+        for user, partner in matcher.pair(pool, now):
+            if time.perf_counter() - started > budget:
+                finished = False
+                break
+
+            if not await state.claim_pair(user.sid, partner.sid):
+                continue
+
+            matchmaking_stats.record_match(now - user.enqueued_at, now - partner.enqueued_at)
+            await send_match_request(user.sid, user.email, partner.sid, partner.email, topic)
+
+        if not finished:
+            break
+        visited += 1
+
+    matchmaking_stats.record_tick(time.perf_counter() - started)
+    return visited
+
+
+async def matchmaking_loop():
+    interval = settings.MATCHMAKING_TICK_MS / 1000
+    offset = 0
+
+    while True:
+        await sio.sleep(interval)
+        try:
+            token = await state.acquire_tick(TICK_LOCK_LEASE_MS)
+            if token is None:
+                continue
+
+            started = time.perf_counter()
+            try:
+                topics = sorted(await state.queue_depths())
+                if topics:
+                    # Topics cut off by the time budget are visited first next tick
+                    offset %= len(topics)
+                    offset += await run_matchmaking_tick(topics[offset:] + topics[:offset])
+            finally:
+                # The lock is held for the whole tick, however long it takes,
+                # and then for the rest of the interval
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                await state.release_tick(token, int(settings.MATCHMAKING_TICK_MS - elapsed_ms))
+        except Exception as e:
+            websocket_logger.error("Matchmaking tick failed", {"error": str(e)}, exc_info=True)
+
+
+async def start_matchmaking(app):
+    if settings.MATCHMAKING_TICK_MS:
+        sio.start_background_task(matchmaking_loop)
+
+
+async def loop_lag_probe():
+    """Measure how late a timed wake-up fires; a busy loop shows up as lag"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        loop_lag.observe(max(0.0, time.perf_counter() - started - LOOP_LAG_INTERVAL))
+
+
+async def start_loop_lag_probe(app):
+    sio.start_background_task(loop_lag_probe)
+
+
+async def start_offer_reaper(app):
+    sio.start_background_task(offer_reaper)
+
+
+async def user_refresher():
+    """Keep this worker's users alive in shared state; they expire if it dies"""
+    while True:
+        await asyncio.sleep(settings.WEBSOCKET_USER_TTL_SECONDS / 3)
+        try:
+            await state.touch(list(local_sids))
+        except Exception as e:
+            websocket_logger.error("Failed to refresh users", {"error": str(e)}, exc_info=True)
+
+
+async def start_user_refresher(app):
+    if settings.WEBSOCKET_USE_REDIS:
+        sio.start_background_task(user_refresher)
+
+
+async def start_client_manager(app):
+    """
+    Subscribe to the other workers' emits before taking connections.
+
+    The manager otherwise subscribes on the first connection, and emits other
+    workers publish to that client in the meantime are lost.
+    """
+    if client_manager is None:
+        return
+
+    sio.manager_initialized = True
+    client_manager.initialize()
+    while not client_manager.pubsub.subscribed:
+        await asyncio.sleep(0.01)
+
+
+async def load_handoff(app):
+    restored = await handoff.load()
+    if restored:
+        websocket_logger.info("Loaded handoff snapshot", {"entries": restored})
+
+
+async def drain(app):
+    """
+    Hand waiting users and rooms to the next process before shutting down.
+
+    Each affected client gets a resume token to present after reconnecting;
+    everyone is told to reconnect after a random delay.
+    """
+    global draining
+    draining = True
+
+    entries = []
+    for sid in list(local_sids):
+        user = await state.get_user(sid)
+        detached = await state.detach(sid)
+        token = None
+
+        if user is not None and detached and (detached['enqueued_at'] or detached['room']):
+            token = secrets.token_urlsafe(16)
+            entries.append({
+                'token': token,
+                'email': user.email,
+                'topic': user.topic,
+                'level': user.level,
+                'points': user.points,
+                'ice_batch': user.ice_batch,
+                **detached
+            })
+
+        await sio.emit('server-restarting', {
+            'resumeToken': token,
+            'reconnectIn': reconnect_delay()
+        }, room=sid)
+
+    await handoff.save(entries)
+    websocket_logger.info("Drained for restart", {"connections": len(local_sids), "handed_off": len(entries)})
+
+    # Let the restart notices reach clients before connections are closed;
+    # an open websocket would otherwise hold up the shutdown
+    await asyncio.sleep(settings.WEBSOCKET_DRAIN_GRACE_SECONDS)
+    for sid in list(local_sids):
+        await sio.disconnect(sid)
+
+
+async def start_log_queue(app):
+    if settings.WEBSOCKET_LOG_QUEUE:
+        app['log_listener'] = enable_queue_logging(websocket_logger)
+
+
+async def stop_log_queue(app):
+    if 'log_listener' in app:
+        app['log_listener'].stop()
 
 
 async def index(request):
     return web.Response(text='WebSocket Signaling Server Running', content_type='text/html')
 
 
+async def matchmaking_stats_view(request):
+    return web.json_response(matchmaking_stats.snapshot(await state.queue_depths()))
+
+
+async def metrics_view(request):
+    # State gauges are sampled on scrape so handlers never pay for them
+    for name, value in (await state.counts()).items():
+        state_gauges[name].set(value)
+
+    match_wait.set(matchmaking_stats.percentile(0.50), '0.5')
+    match_wait.set(matchmaking_stats.percentile(0.99), '0.99')
+    tick_duration.set(matchmaking_stats.last_tick_duration)
+
+    return web.Response(text=registry.render(), headers={'Content-Type': CONTENT_TYPE})
+
+
+app.on_startup.append(start_log_queue)
+app.on_startup.append(start_client_manager)
+app.on_startup.append(load_handoff)
+app.on_startup.append(start_matchmaking)
+app.on_startup.append(start_loop_lag_probe)
+app.on_startup.append(start_offer_reaper)
+app.on_startup.append(start_user_refresher)
+app.on_shutdown.append(drain)
+app.on_cleanup.append(stop_log_queue)
 app.router.add_get('/', index)
+app.router.add_get('/matchmaking/stats', matchmaking_stats_view)
+app.router.add_get('/metrics', metrics_view)
+
+
+def run_worker():
+    if client_manager is not None:
+        # Workers are forked from one manager; emits carrying this worker's
+        # own id are ignored when they come back over pub/sub
+        client_manager.host_id = uuid.uuid4().hex
+
+    # With several workers the kernel spreads new connections across them
+    web.run_app(
+        app,
+        host='0.0.0.0',
+        port=settings.WEBSOCKET_PORT,
+        reuse_port=settings.WEBSOCKET_WORKERS > 1
+    )
 
 
 if __name__ == '__main__':
-    print('Starting WebSocket Server on port 8001...')
-    print('Waiting for connections...')
-    web.run_app(app, host='0.0.0.0', port=8001)
+    websocket_logger.info(f"Starting WebSocket Server on port {settings.WEBSOCKET_PORT}")
+
+    if settings.WEBSOCKET_WORKERS > 1:
+        if not settings.WEBSOCKET_USE_REDIS:
+            raise SystemExit('WEBSOCKET_WORKERS > 1 requires WEBSOCKET_USE_REDIS=true')
+
+        workers = [
+            multiprocessing.Process(target=run_worker)
+            for _ in range(settings.WEBSOCKET_WORKERS)
+        ]
+        for worker in workers:
+            worker.start()
+        websocket_logger.info(f"Started {len(workers)} workers, waiting for connections")
+        for worker in workers:
+            worker.join()
+    else:
+        websocket_logger.info("Waiting for connections")
+        run_worker()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Globe, Users, MessageSquare, Mic, Send, X } from 'lucide-react';
 import { useAuth } from '../contexts/AuthContext';
 
@@ -25,6 +25,15 @@ interface Message {
   country_code?: string;
 }
 
+// Merge by id, oldest first, so pushed and fetched messages can arrive in any order
+const mergeMessages = (current: Message[], incoming: Message[]) => {
+  const byId = new Map(current.map(m => [m.id, m]));
+  incoming.forEach(m => byId.set(m.id, m));
+  return [...byId.values()].sort((a, b) =>
+    a.created_at === b.created_at ? a.id.localeCompare(b.id) : a.created_at.localeCompare(b.created_at)
+  );
+};
+
 const COUNTRIES = [
   { code: 'US', name: 'United States' },
   { code: 'GB', name: 'United Kingdom' },
@@ -44,6 +53,7 @@ export default function CountryDebate() {
   const [debates, setDebates] = useState<CountryDebate[]>([]);
   const [currentDebate, setCurrentDebate] = useState<CountryDebate | null>(null);
   const [messages, setMessages] = useState<Message[]>([]);
+  const lastMessageIdRef = useRef<string | null>(null);
   const [newMessage, setNewMessage] = useState('');
   const [selectedCountry, setSelectedCountry] = useState(COUNTRIES[0]);
   const [isRecording, setIsRecording] = useState(false);
@@ -62,11 +72,24 @@ export default function CountryDebate() {
   }, [view]);
 
   useEffect(() => {
-    if (currentDebate) {
-      fetchMessages();
-      const interval = setInterval(fetchMessages, 3000);
-      return () => clearInterval(interval);
-    }
+    lastMessageIdRef.current = messages.length ? messages[messages.length - 1].id : null;
+  }, [messages]);
+
+  useEffect(() => {
+    if (!currentDebate) return;
+
+    // New messages are pushed over server-sent events. Each time the stream
+    // (re)opens, including after the server resets one that fell behind, we
+    // fetch whatever came after the last message we have
+    const stream = new EventSource(
+      `${import.meta.env.VITE_API_URL}/api/country-debates/${currentDebate.id}/stream?token=${encodeURIComponent(localStorage.getItem('token') || '')}`
+    );
+    stream.onopen = () => fetchMessages();
+    stream.onmessage = (event) => {
+      const message: Message = JSON.parse(event.data);
+      setMessages(prev => mergeMessages(prev, [message]));
+    };
+    return () => stream.close();
   }, [currentDebate]);
 
   const fetchDebates = async () => {
@@ -89,15 +112,24 @@ export default function CountryDebate() {
     if (!currentDebate) return;
 
     try {
-      const response = await fetch(`${import.meta.env.VITE_API_URL}/api/country-debates/${currentDebate.id}/messages`, {
-        headers: {
-          'Authorization': `Bearer ${localStorage.getItem('token')}`
-        }
-      });
-      if (response.ok) {
-        const data = await response.json();
-        setMessages(data);
-      }
+      // Messages come back a page at a time; follow X-Next-Cursor to the end
+      const allMessages: Message[] = [];
+      const after = lastMessageIdRef.current;
+      let cursor: string | null = null;
+      do {
+        const query = cursor
+          ? `?cursor=${encodeURIComponent(cursor)}`
+          : after ? `?after=${encodeURIComponent(after)}` : '';
+        const response = await fetch(`${import.meta.env.VITE_API_URL}/api/country-debates/${currentDebate.id}/messages${query}`, {
+          headers: {
+            'Authorization': `Bearer ${localStorage.getItem('token')}`
+          }
+        });
+        if (!response.ok) return;
+        allMessages.push(...await response.json());
+        cursor = response.headers.get('X-Next-Cursor');
+      } while (cursor);
+      setMessages(prev => mergeMessages(prev, allMessages));
     } catch (error) {
       console.error('Failed to fetch messages:', error);
     }
@@ -170,8 +202,9 @@ export default function CountryDebate() {
       });
 
       if (response.ok) {
+        const message: Message = await response.json();
         setNewMessage('');
-        fetchMessages();
+        setMessages(prev => mergeMessages(prev, [message]));
       }
     } catch (error) {
       console.error('Failed to send message:', error);
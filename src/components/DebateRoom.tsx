@@ -69,7 +69,7 @@ export function DebateRoom({ selectedTopic }: DebateRoomProps) {
       return;
     }
     setShowDebate(true);
-    startSearch(topic, user?.email || 'Anonymous');
+    startSearch(topic, user?.email || 'Anonymous', user?.level ?? 1, user?.points ?? 0);
   };
 
   const handleCancelSearch = () => {
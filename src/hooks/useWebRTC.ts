@@ -31,6 +31,8 @@ export function useWebRTC() {
   const peerConnectionRef = useRef<RTCPeerConnection | null>(null);
   const partnerIdRef = useRef<string | null>(null);
   const pendingMatchRef = useRef<MatchRequest | null>(null);
+  const lastSearchRef = useRef<Record<string, unknown> | null>(null);
+  const resumeTokenRef = useRef<string | null>(null);
 
   const initializeSocket = () => {
     if (socketRef.current || socketInitialized) return;
@@ -38,12 +40,50 @@ export function useWebRTC() {
     rtcLogger.info('Initializing WebRTC socket connection', { socketUrl: SOCKET_URL });
     setSocketInitialized(true);
     socketRef.current = io(SOCKET_URL, {
-      transports: ['websocket', 'polling'],
+      // Long-polling breaks when the server runs several workers without sticky sessions
+      transports: ['websocket'],
       autoConnect: true,
     });
 
     socketRef.current.on('connected', (data) => {
       rtcLogger.info('Connected to signaling server', { sessionId: data.sid });
+      if (resumeTokenRef.current) {
+        socketRef.current?.emit('resume', { token: resumeTokenRef.current });
+        resumeTokenRef.current = null;
+      } else if (lastSearchRef.current && !partnerIdRef.current && !pendingMatchRef.current) {
+        // Searching when the server restarted without a resume token
+        socketRef.current?.emit('find_match', lastSearchRef.current);
+      }
+    });
+
+    socketRef.current.on('server-restarting', (data) => {
+      rtcLogger.info('Signaling server restarting', { reconnectIn: data.reconnectIn });
+      resumeTokenRef.current = data.resumeToken;
+      if (pendingMatchRef.current) {
+        // Unanswered offers are not carried over
+        pendingMatchRef.current = null;
+        setMatchRequest(null);
+        setIsWaitingForPartner(false);
+      }
+      socketRef.current?.disconnect();
+      setTimeout(() => socketRef.current?.connect(), data.reconnectIn);
+    });
+
+    socketRef.current.on('server-draining', (data) => {
+      rtcLogger.info('Signaling server draining, retrying search', { reconnectIn: data.reconnectIn });
+      socketRef.current?.disconnect();
+      setTimeout(() => socketRef.current?.connect(), data.reconnectIn);
+    });
+
+    socketRef.current.on('resumed', (data) => {
+      rtcLogger.info('Session resumed', { roomId: data.roomId, topic: data.topic });
+    });
+
+    socketRef.current.on('resume-failed', () => {
+      rtcLogger.info('Session could not be resumed');
+      if (lastSearchRef.current && !partnerIdRef.current) {
+        socketRef.current?.emit('find_match', lastSearchRef.current);
+      }
     });
 
     socketRef.current.on('match-request', (data: MatchRequest) => {
@@ -55,6 +95,7 @@ export function useWebRTC() {
     socketRef.current.on('match-found', async (data) => {
       rtcLogger.info('Match found, establishing connection', { partnerId: data.partnerId, initiator: data.initiator });
       partnerIdRef.current = data.partnerId;
+      lastSearchRef.current = null;
       setIsSearching(false);
       setIsWaitingForPartner(false);
       setIsConnected(true);
@@ -77,6 +118,26 @@ export function useWebRTC() {
       setIsSearching(true);
     });
 
+    socketRef.current.on('match-expired', (data) => {
+      rtcLogger.info('Match request expired', { requeued: data.requeued });
+      setMatchRequest(null);
+      pendingMatchRef.current = null;
+      setIsWaitingForPartner(false);
+      setIsSearching(data.requeued);
+    });
+
+    socketRef.current.on('match-unavailable', () => {
+      // Accepted too late: the offer expired or the partner rejected it
+      rtcLogger.info('Match no longer available, searching again');
+      setMatchRequest(null);
+      pendingMatchRef.current = null;
+      setIsWaitingForPartner(false);
+      if (lastSearchRef.current && !partnerIdRef.current) {
+        setIsSearching(true);
+        socketRef.current?.emit('find_match', lastSearchRef.current);
+      }
+    });
+
     socketRef.current.on('waiting', (data) => {
       rtcLogger.debug('Waiting for match', { message: data.message });
     });
@@ -120,6 +181,19 @@ export function useWebRTC() {
       }
     });
 
+    socketRef.current.on('ice_candidates', async (data) => {
+      rtcLogger.debug('Received ICE candidate batch', { sender: data.sender, count: data.candidates.length });
+      if (peerConnectionRef.current) {
+        for (const candidate of data.candidates) {
+          try {
+            await peerConnectionRef.current.addIceCandidate(new RTCIceCandidate(candidate));
+          } catch (e) {
+            rtcLogger.error('Error adding ICE candidate', e);
+          }
+        }
+      }
+    });
+
     socketRef.current.on('peer-disconnected', () => {
       rtcLogger.info('Peer disconnected');
       cleanup();
@@ -170,13 +244,12 @@ export function useWebRTC() {
       };
 
       peerConnection.onicecandidate = (event) => {
-        if (event.candidate) {
-          rtcLogger.debug('Sending ICE candidate to peer');
-          socketRef.current?.emit('ice_candidate', {
-            target: partnerIdRef.current,
-            candidate: event.candidate,
-          });
-        }
+        // A null candidate marks end-of-candidates and lets the server flush its batch
+        rtcLogger.debug(event.candidate ? 'Sending ICE candidate to peer' : 'ICE gathering complete');
+        socketRef.current?.emit('ice_candidate', {
+          target: partnerIdRef.current,
+          candidate: event.candidate,
+        });
       };
 
       peerConnection.onconnectionstatechange = () => {
@@ -202,13 +275,19 @@ export function useWebRTC() {
     }
   };
 
-  const startSearch = (topic: string = 'general', email: string = 'Anonymous') => {
+  const startSearch = (
+    topic: string = 'general',
+    email: string = 'Anonymous',
+    level: number = 1,
+    points: number = 0
+  ) => {
     rtcLogger.info('Starting debate partner search', { topic, email });
     initializeSocket();
     setIsSearching(true);
     setError(null);
+    lastSearchRef.current = { topic, email, level, points, iceBatch: true };
     setTimeout(() => {
-      socketRef.current?.emit('find_match', { topic, email });
+      socketRef.current?.emit('find_match', lastSearchRef.current);
       rtcLogger.debug('Find match request sent', { topic });
     }, 100);
   };
@@ -239,6 +318,7 @@ export function useWebRTC() {
     rtcLogger.info('Cancelling debate partner search');
     setIsSearching(false);
     setMatchRequest(null);
+    lastSearchRef.current = null;
     socketRef.current?.emit('cancel_search', {});
   };
 
@@ -266,6 +346,7 @@ export function useWebRTC() {
     }
 
     partnerIdRef.current = null;
+    lastSearchRef.current = null;
     setIsConnected(false);
     setIsSearching(false);
     setIsWaitingForPartner(false);